@@ -0,0 +1,96 @@
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# pylint: disable=wrong-import-position
+from frontend import FrontendCache  # noqa: E402
+from interpreter import Interpreter  # noqa: E402
+from runtime import KAsyncCallable, KCallable, KInt, KObjectRef  # noqa: E402
+
+# pylint: enable=wrong-import-position
+
+LATENCY = 0.005
+QUERIES = 4
+
+PROGRAM = """
+fn fib(n) {
+    if (n < 2) return n;
+    return fib(n - 1) + fib(n - 2);
+}
+fn work(n, acc) {
+    if (n == 0) return acc;
+    return work(n - 1, acc + query(n) + fib(6));
+}
+return work(%d, 0);
+""" % QUERIES
+
+
+class StubService:
+    """进程内的模拟服务: 每个请求等待固定的延迟后返回参数的两倍"""
+
+    def __init__(self, latency: float) -> None:
+        self.latency = latency
+        self.requests = 0
+
+    async def query(self, args: list[KObjectRef]) -> KObjectRef:
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+        return KInt(args[0].v * 2)  # type:ignore
+
+    def blocking_query(self, args: list[KObjectRef]) -> KObjectRef:
+        """改动之前只能这样接入: 同步等待, 阻塞整个事件循环"""
+        self.requests += 1
+        time.sleep(self.latency)
+        return KInt(args[0].v * 2)  # type:ignore
+
+
+async def script(interpreter: Interpreter, latencies: list[float]) -> None:
+    begin = time.perf_counter()
+    await interpreter.run_async(PROGRAM)
+    latencies.append(time.perf_counter() - begin)
+
+
+async def concurrent(scripts: int, service: StubService) -> tuple[float, list[float]]:
+    latencies: list[float] = []
+    interpreters = []
+    # 脚本相同, 共享前端缓存后测的是执行与挂起的开销
+    cache = FrontendCache()
+    for _ in range(scripts):
+        interpreter = Interpreter(cache=cache)
+        interpreter.env.set("query", KAsyncCallable(service.query, "query"))
+        interpreters.append(interpreter)
+    begin = time.perf_counter()
+    await asyncio.gather(*(script(i, latencies) for i in interpreters))
+    return time.perf_counter() - begin, latencies
+
+
+def blocking(scripts: int, service: StubService) -> float:
+    begin = time.perf_counter()
+    cache = FrontendCache()
+    for _ in range(scripts):
+        interpreter = Interpreter(cache=cache)
+        interpreter.env.set("query", KCallable(service.blocking_query))
+        interpreter.run(PROGRAM)
+    return time.perf_counter() - begin
+
+
+def main() -> None:
+    print(f"{QUERIES} queries of {LATENCY * 1e3:g} ms per script")
+    service = StubService(LATENCY)
+    elapsed = blocking(50, service)
+    print(f"blocking     {50:5d} scripts  {50 / elapsed:8.1f} scripts/s")
+    for scripts in (1, 10, 100, 1_000, 5_000):
+        elapsed, latencies = asyncio.run(concurrent(scripts, service))
+        p99 = statistics.quantiles(latencies, n=100)[98] if scripts > 1 else latencies[0]
+        print(
+            f"run_async    {scripts:5d} scripts  {scripts / elapsed:8.1f} scripts/s  "
+            f"p50 {statistics.median(latencies) * 1e3:8.1f} ms  p99 {p99 * 1e3:8.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# pylint: disable=wrong-import-position
+from batch import Worker, collect_scripts, run_batch  # noqa: E402
+
+# pylint: enable=wrong-import-position
+
+SCRIPTS = 400
+
+# 每个脚本的常数不同, 前端缓存不会命中, 测的是完整的解析与执行
+PROGRAM = """
+fn fib(n) {
+    if (n < 2) return n;
+    return fib(n - 1) + fib(n - 2);
+}
+fn loop(n, acc) {
+    if (n == 0) return acc;
+    return loop(n - 1, acc + n %% %d);
+}
+print("script", %d);
+return fib(14) + loop(2000, 0);
+"""
+
+
+def main() -> None:
+    cores = os.cpu_count() or 1
+    # 超过核数的进程数只用来观察过度订阅的开销
+    workers = sorted({1, 2, 4, cores})
+    with tempfile.TemporaryDirectory() as directory:
+        for i in range(SCRIPTS):
+            with open(os.path.join(directory, f"s{i:04d}.k"), "w", encoding="utf-8") as f:
+                f.write(PROGRAM % (i + 2, i))
+        paths = collect_scripts(directory)
+        print(f"{SCRIPTS} scripts, {cores} cores")
+        worker = Worker()
+        worker.warmup()
+        begin = time.perf_counter()
+        assert all(worker.run(path)["ok"] for path in paths)
+        single = time.perf_counter() - begin
+        print(f"in-process  {single:6.2f} s  {SCRIPTS / single:8.1f} scripts/s")
+        for jobs in workers:
+            begin = time.perf_counter()
+            results = list(run_batch(paths, jobs))
+            elapsed = time.perf_counter() - begin
+            assert len(results) == SCRIPTS and all(r["ok"] for r in results)
+            print(
+                f"jobs={jobs:3d}  {elapsed:6.2f} s  {SCRIPTS / elapsed:8.1f} scripts/s  "
+                f"speedup {single / elapsed:5.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
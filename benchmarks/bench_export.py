@@ -0,0 +1,91 @@
+import os
+import statistics
+import sys
+import time
+import timeit
+from typing import Callable
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# pylint: disable=wrong-import-position
+from frontend import FrontendCache  # noqa: E402
+from interpreter import Interpreter  # noqa: E402
+from runtime import KCallable, KError, KInt, KObjectRef  # noqa: E402
+from runtime_meta import KExportFunction  # noqa: E402
+
+# pylint: enable=wrong-import-position
+
+CALLS = 100_000
+MICRO = 1_000_000
+REPEAT = 7
+
+PROGRAM = """
+fn loop(n, acc) {
+    if (n == 0) return acc;
+    return loop(n - 1, acc + %s);
+}
+return loop(%d, 0);
+"""
+
+
+def clamp(v: int, limit: int) -> int:
+    return v if v < limit else limit
+
+
+def legacy_clamp(args: list[KObjectRef]) -> KObjectRef:
+    """改动之前的写法: 接收参数列表, 手工检查与拆装"""
+    if len(args) != 2 or not all(type(a) is KInt for a in args):  # pylint: disable=unidiomatic-typecheck
+        raise KError("clamp() expects (int, int).")
+    return KInt(clamp(args[0].v, args[1].v))  # type:ignore
+
+
+def runner(engine: str, fn: KCallable, expr: str) -> Callable[[], float]:
+    """返回执行一次并计时的函数; 共享前端缓存, 计时不包含解析"""
+    src = PROGRAM % (expr, CALLS)
+    cache = FrontendCache()
+
+    def once() -> float:
+        interpreter = Interpreter(engine, cache=cache)
+        interpreter.env.set("clamp", fn)
+        begin = time.perf_counter()
+        interpreter.run(src)
+        return time.perf_counter() - begin
+
+    once()
+    return once
+
+
+def per_call(base: Callable[[], float], measured: Callable[[], float]) -> float:
+    """与不含调用的循环交替执行, 取每轮差值的中位数, 减小机器负载变化的影响"""
+    return statistics.median(measured() - base() for _ in range(REPEAT)) / CALLS
+
+
+def micro(label: str, stmt: Callable[[], object]) -> float:
+    elapsed = min(timeit.repeat(stmt, number=MICRO, repeat=5)) / MICRO
+    print(f"  {label:36s} {elapsed * 1e9:6.0f} ns/call")
+    return elapsed
+
+
+def main() -> None:
+    legacy, exported = KCallable(legacy_clamp), KExportFunction(clamp)
+    a, b = KInt(5000), KInt(3000)
+    print("direct calls:")
+    plain = micro("python clamp(5000, 3000)", lambda: clamp(5000, 3000))
+    micro("KCallable([a, b])", lambda: legacy([a, b]))
+    fast = micro("KExportFunction.call(a, b)", lambda: exported.call(a, b))
+    # 返回值装箱的代价与调用方式无关, K 中的每次整数运算都要付出
+    boxing = micro("KInt(3000) alone", lambda: KInt(3000))
+    print(f"  export overhead over plain call + boxing: {(fast - plain - boxing) * 1e9:.0f} ns")
+    print(f"K loop of {CALLS} calls (time beyond the loop without the call):")
+    for engine in ("vm", "tree"):
+        base = runner(engine, legacy, "n % 7")
+        old = per_call(base, runner(engine, legacy, "clamp(n, 3000)"))
+        new = per_call(base, runner(engine, exported, "clamp(n, 3000)"))
+        print(
+            f"  {engine:4s} KCallable {old * 1e9:6.0f} ns/call  "
+            f"KExportFunction {new * 1e9:6.0f} ns/call"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# pylint: disable=wrong-import-position
+from frontend import FrontendCache  # noqa: E402
+from interpreter import ENGINES, Interpreter  # noqa: E402
+
+# pylint: enable=wrong-import-position
+
+SNIPPETS = [
+    f"fn score(x) {{ if (x > {i}) return x * 2 + {i}; return x - 1; }} return score({i * 3});"
+    for i in range(50)
+]
+ROUNDS = 40
+THREADS = 4
+
+
+def evaluate(engine: str, cache: FrontendCache | None) -> float:
+    begin = time.perf_counter()
+    for _ in range(ROUNDS):
+        for src in SNIPPETS:
+            Interpreter(engine, cache=cache).run(src)
+    return time.perf_counter() - begin
+
+
+def threaded(cache: FrontendCache) -> float:
+    workers = [threading.Thread(target=evaluate, args=("vm", cache)) for _ in range(THREADS)]
+    begin = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return time.perf_counter() - begin
+
+
+def main() -> None:
+    runs = ROUNDS * len(SNIPPETS)
+    for engine in ENGINES:
+        cache = FrontendCache()
+        cold, warm = evaluate(engine, None), evaluate(engine, cache)
+        print(
+            f"{engine:4s} uncached {cold / runs * 1e6:6.1f} us/run  "
+            f"cached {warm / runs * 1e6:6.1f} us/run  speedup {cold / warm:5.2f}x  "
+            f"{cache.stats()}"
+        )
+    cache = FrontendCache(max_entries=32)
+    elapsed = threaded(cache)
+    print(
+        f"{THREADS} threads, 32-entry LRU  {elapsed / (runs * THREADS) * 1e6:6.1f} us/run  "
+        f"{cache.stats()}"
+    )
+
+
+if __name__ == "__main__":
+    main()
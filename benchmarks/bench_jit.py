@@ -0,0 +1,41 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from interpreter import Interpreter  # noqa: E402  pylint: disable=wrong-import-position
+
+FIB = """
+fn fib(n) {
+    if (n < 2) return n;
+    return fib(n - 1) + fib(n - 2);
+}
+return fib(%d);
+"""
+
+
+def fib(n: int) -> int:
+    if n < 2:
+        return n
+    return fib(n - 1) + fib(n - 2)
+
+
+def timed(fn) -> float:
+    begin = time.perf_counter()
+    fn()
+    return time.perf_counter() - begin
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 24
+    src = FIB % n
+    tree = timed(lambda: Interpreter("tree").run(src))
+    jit = timed(lambda: Interpreter("jit").run(src))
+    python = timed(lambda: fib(n))
+    print(f"fib({n})  tree {tree:7.3f} s  jit {jit:7.3f} s  python {python:7.3f} s")
+    print(f"jit speedup over tree {tree / jit:6.1f}x, {jit / python:4.2f}x of plain Python time")
+
+
+if __name__ == "__main__":
+    main()
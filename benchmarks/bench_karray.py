@@ -0,0 +1,57 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# pylint: disable=wrong-import-position
+from interpreter import Interpreter  # noqa: E402
+import karray  # noqa: E402
+
+# pylint: enable=wrong-import-position
+
+# 逐元素递归: 每个元素经过一次 K 调用与若干次运算符分派
+SCALAR = """
+fn loop(i, n, acc) {
+    if (i == n) return acc;
+    return loop(i + 1, n, acc + (i * 2 + 1) * (i * 2 + 1));
+}
+return loop(0, %d, 0);
+"""
+
+VECTOR = """
+let v = range(%d) * 2 + 1;
+return sum(v * v);
+"""
+
+SCALAR_LIMIT = 200_000
+
+
+def run(program: str) -> tuple[float, object]:
+    interpreter = Interpreter("vm", stack_limit=100)
+    begin = time.perf_counter()
+    result = interpreter.run(program)
+    return time.perf_counter() - begin, result
+
+
+def main() -> None:
+    backend = "numpy" if karray.numpy is not None else "array + memoryview"
+    print(f"backend: {backend}")
+    for n in (10_000, 200_000, 1_000_000, 4_000_000):
+        vector, expected = run(VECTOR % n)
+        # 逐元素的版本只在较小的规模上运行
+        scalar = "       -   "
+        speedup = ""
+        if n <= SCALAR_LIMIT:
+            elapsed, result = run(SCALAR % n)
+            assert repr(result) == repr(expected), (result, expected)
+            scalar = f"{elapsed * 1e3:8.1f} ms"
+            speedup = f"  {elapsed / vector:6.1f}x"
+        print(
+            f"n={n:8d}  scalar {scalar}  array {vector * 1e3:8.1f} ms  "
+            f"{vector / n * 1e9:5.0f} ns/element{speedup}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# pylint: disable=wrong-import-position
+from interpreter import Interpreter  # noqa: E402
+from kcache import CACHE_DIR, cache_path, run_file  # noqa: E402
+
+# pylint: enable=wrong-import-position
+
+FUNCTIONS = 2000
+
+
+def generated_script() -> str:
+    """模拟生成的大脚本: 大量小函数, 启动时间主要花在词法与语法分析"""
+    lines = []
+    for i in range(FUNCTIONS):
+        lines.append(
+            f"fn f{i}(a, b) {{ let c = a * {i} + b; if (c > {i}) return c - 1; return c + 2; }}"
+        )
+    lines.append(" + ".join(f"f{i}(1, 2)" for i in range(0, FUNCTIONS, 100)) + ";")
+    lines.append("return f7(3, 4);")
+    return "\n".join(lines)
+
+
+def timed(path: str) -> tuple[float, object]:
+    begin = time.perf_counter()
+    result = run_file(path, Interpreter())
+    return time.perf_counter() - begin, result
+
+
+def main() -> None:
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, "generated.k")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(generated_script())
+        cold = warm = float("inf")
+        for _ in range(5):
+            shutil.rmtree(os.path.join(directory, CACHE_DIR), ignore_errors=True)
+            elapsed, expected = timed(path)
+            cold = min(cold, elapsed)
+            elapsed, result = timed(path)
+            warm = min(warm, elapsed)
+            assert repr(result) == repr(expected)
+        size = os.path.getsize(cache_path(path))
+        print(
+            f"{FUNCTIONS} functions ({os.path.getsize(path)} B source, {size} B .kc)  "
+            f"cold {cold * 1e3:7.1f} ms  warm {warm * 1e3:6.1f} ms  speedup {cold / warm:5.1f}x"
+        )
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
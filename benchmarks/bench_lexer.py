@@ -0,0 +1,48 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from lexer import Lexer  # noqa: E402  pylint: disable=wrong-import-position
+
+SNIPPET = """\
+fn fib_%(i)d(n) {
+    /* recursive /* nested */ fibonacci */
+    if (n < 2) return n;
+    return fib_%(i)d(n - 1) + fib_%(i)d(n - 2);
+}
+let value_%(i)d = 32.25 * %(i)d + 7 / 3;  // trailing comment
+print("value: \\"%(i)d\\"\\n");
+"""
+
+
+def generate_source(size: int) -> str:
+    parts, total, i = [], 0, 0
+    while total < size:
+        part = SNIPPET % {"i": i}
+        parts.append(part)
+        total += len(part)
+        i += 1
+    return "".join(parts)
+
+
+def bench(size: int) -> None:
+    src = generate_source(size)
+    begin = time.perf_counter()
+    count = len(Lexer(src).all())
+    elapsed = time.perf_counter() - begin
+    print(
+        f"{size / 2**20:6.1f} MiB  {count:9d} tokens  {elapsed:7.3f} s  "
+        f"{count / elapsed:12.0f} tokens/s  {len(src) / elapsed / 2**20:6.2f} MiB/s"
+    )
+
+
+def main() -> None:
+    sizes = [int(float(v) * 2**20) for v in sys.argv[1:]] or [1 << 20, 2 << 20, 4 << 20]
+    for size in sizes:
+        bench(size)
+
+
+if __name__ == "__main__":
+    main()
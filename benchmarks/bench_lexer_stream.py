@@ -0,0 +1,62 @@
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(__file__), "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+from lexer import Lexer  # noqa: E402  pylint: disable=wrong-import-position
+from bench_lexer import SNIPPET  # noqa: E402  pylint: disable=wrong-import-position
+
+
+def write_source(path: str, size: int) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        total, i = 0, 0
+        while total < size:
+            total += f.write(SNIPPET % {"i": i})
+            i += 1
+
+
+def write_comments(path: str, size: int) -> None:
+    """以行注释为主的源码, 每 50 行注释后一条语句; 注释会跨越读取块的边界"""
+    with open(path, "w", encoding="utf-8") as f:
+        total, i = 0, 0
+        while total < size:
+            total += f.write(f"// comment line {i} of the generated file\n")
+            if i % 50 == 0:
+                total += f.write(f"let v{i} = {i};\n")
+            i += 1
+
+
+def lex_file(path: str) -> None:
+    begin = time.perf_counter()
+    count = sum(1 for _ in Lexer.from_path(path).iter_tokens())
+    elapsed = time.perf_counter() - begin
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    size = os.path.getsize(path)
+    print(
+        f"{size / 2**20:7.1f} MiB  {count:10d} tokens  {elapsed:7.2f} s  "
+        f"{count / elapsed:10.0f} tokens/s  peak RSS {peak:6.1f} MiB"
+    )
+
+
+def main() -> None:
+    if len(sys.argv) == 3 and sys.argv[1] == "--lex":
+        lex_file(sys.argv[2])
+        return
+    sizes = [int(float(v) * 2**20) for v in sys.argv[1:]] or [4 << 20, 16 << 20, 64 << 20]
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, write in (("code", write_source), ("comments", write_comments)):
+            print(f"{label}:")
+            for size in sizes:
+                path = os.path.join(tmp, "bench.k")
+                write(path, size)
+                # 每种规模用独立进程, 使 ru_maxrss 互不影响
+                subprocess.run([sys.executable, __file__, "--lex", path], check=True)
+
+
+if __name__ == "__main__":
+    main()
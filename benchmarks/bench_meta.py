@@ -0,0 +1,68 @@
+import os
+import sys
+import timeit
+import tracemalloc
+import weakref
+from typing import Any, Callable
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# pylint: disable-next=wrong-import-position
+from runtime_meta import USER_TYPES, KUserDefinedObject  # noqa: E402
+
+OBJECTS = 10_000
+NUMBER = 200_000
+
+
+class LegacyMetaInfo:
+    """改动之前的实现: 每个实例一份, 带弱引用与属性名列表; 子类检查逐层遍历基类"""
+
+    def __init__(self, name: str, bind_: weakref.ref, attr: list[str], base: list[Any]) -> None:
+        self.name, self.bind, self.attr, self.base = name, bind_, attr, base
+
+    def is_subclass_of(self, base: "LegacyMetaInfo") -> bool:
+        return self is base or any(cls.is_subclass_of(base) for cls in self.base)
+
+
+class LegacyObject:
+    def __init__(self, name: str, attr: dict[str, Any], base: list[str]) -> None:
+        self.attr = attr
+        self.meta_info = LegacyMetaInfo(name, weakref.ref(self), list(attr.keys()), base)
+
+
+def allocated(factory: Callable[[int], Any]) -> float:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [factory(i) for i in range(OBJECTS)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+    return (after - before) / OBJECTS
+
+
+def per_call(fn: Callable[[], bool]) -> float:
+    return min(timeit.repeat(fn, number=NUMBER, repeat=5)) / NUMBER * 1e9
+
+
+def main() -> None:
+    for name, bases in (("Shape", []), ("Polygon", ["Shape"]), ("Square", ["Polygon"])):
+        USER_TYPES.define(name, bases)
+    attr: dict[str, Any] = {"x": 1, "y": 2}
+    legacy = allocated(lambda i: LegacyObject("Square", dict(attr), ["Polygon"]))
+    shared = allocated(lambda i: KUserDefinedObject("Square", attr, ["Polygon"]))
+    print(f"memory  legacy {legacy:6.0f} B/object  shared {shared:6.0f} B/object")
+
+    square, shape = USER_TYPES.define("Square", ["Polygon"]), USER_TYPES.define("Shape", [])
+    anchor = LegacyObject("Square", {}, [])
+    old_base = LegacyMetaInfo("Shape", weakref.ref(anchor), [], [])
+    polygon = LegacyMetaInfo("Polygon", weakref.ref(anchor), [], [old_base])
+    old = LegacyMetaInfo("Square", weakref.ref(anchor), [], [polygon])
+    assert square.is_subclass_of(shape) and old.is_subclass_of(old_base)
+    scan = per_call(lambda: old.is_subclass_of(old_base))
+    bitset = per_call(lambda: square.is_subclass_of(shape))
+    print(f"subclass check  legacy {scan:5.1f} ns  bitset {bitset:5.1f} ns  "
+          f"speedup {scan / bitset:4.2f}x")
+
+
+if __name__ == "__main__":
+    main()
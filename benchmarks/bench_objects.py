@@ -0,0 +1,101 @@
+import os
+import sys
+import time
+from typing import Any, Callable
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# pylint: disable=wrong-import-position
+from runtime_meta import (  # noqa: E402
+    GetAttrSite,
+    KOperatorType,
+    KResult,
+    KUserDefinedObject,
+    SetAttrSite,
+)
+
+# pylint: enable=wrong-import-position
+
+OBJECTS = 1000
+ROUNDS = 100
+
+
+class LegacyObject:
+    """改动之前的实现: 每个实例一个属性字典, send_msg 走 match 并分配 KResult"""
+
+    def __init__(self, attr: dict[str, Any]) -> None:
+        self.attr = attr
+
+    def send_msg(self, operator: KOperatorType, params: list[Any]) -> KResult:
+        match operator:
+            case KOperatorType.ADD if len(params) == 1:
+                pass
+            case KOperatorType.CALL:
+                pass
+            case KOperatorType.GET_ATTR if len(params) == 1:
+                return KResult.Ok(self.attr[params[0]]) if params[0] in self.attr else KResult.Err()
+            case KOperatorType.SET_ATTR if len(params) == 2:
+                self.attr[params[0]] = params[1]
+                return KResult.Ok(params[1])
+        return KResult.Err()
+
+
+def via_send_msg(objects: list) -> int:
+    get, put = KOperatorType.GET_ATTR, KOperatorType.SET_ATTR
+    total = 0
+    for _ in range(ROUNDS):
+        for obj in objects:
+            x = obj.send_msg(get, ["x"]).unwrap()
+            y = obj.send_msg(get, ["y"]).unwrap()
+            obj.send_msg(put, ["total", x * y])
+            total += obj.send_msg(get, ["total"]).unwrap()
+    return total
+
+
+def via_sites(objects: list) -> int:
+    get_x, get_y, get_total = GetAttrSite("x"), GetAttrSite("y"), GetAttrSite("total")
+    set_total = SetAttrSite("total")
+    total = 0
+    for _ in range(ROUNDS):
+        for obj in objects:
+            set_total.set(obj, get_x.get(obj) * get_y.get(obj))
+            total += get_total.get(obj)
+    return total
+
+
+def make_objects(cls: Callable[..., Any], shapes: int) -> list:
+    objects = []
+    for i in range(OBJECTS):
+        attr: dict[str, Any] = {"x": i, "y": i + 1, "total": 0}
+        # 不同的属性顺序产生不同的 shape
+        attr.update({f"extra{j}": j for j in range(i % shapes)})
+        if cls is KUserDefinedObject:
+            objects.append(KUserDefinedObject("Point", attr, []))
+        else:
+            objects.append(cls(attr))
+    return objects
+
+
+def timed(fn: Callable[[list], int], objects: list) -> tuple[float, int]:
+    begin = time.perf_counter()
+    result = fn(objects)
+    return time.perf_counter() - begin, result
+
+
+def main() -> None:
+    accesses = OBJECTS * ROUNDS * 4
+    for shapes in (1, 3, 8):
+        legacy, expected = timed(via_send_msg, make_objects(LegacyObject, shapes))
+        send, result = timed(via_send_msg, make_objects(KUserDefinedObject, shapes))
+        cached, cached_result = timed(via_sites, make_objects(KUserDefinedObject, shapes))
+        assert expected == result == cached_result
+        print(
+            f"{shapes} shapes  legacy {legacy / accesses * 1e9:6.1f} ns  "
+            f"send_msg {send / accesses * 1e9:6.1f} ns  "
+            f"inline cache {cached / accesses * 1e9:6.1f} ns  "
+            f"speedup {legacy / cached:5.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
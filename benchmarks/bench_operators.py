@@ -0,0 +1,61 @@
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# pylint: disable-next=wrong-import-position
+from runtime import OPERATORS, KFloat, KInt, KObjectRef, binary_operator  # noqa: E402
+
+NUMBER = 200_000
+OPERANDS: dict[str, tuple[KObjectRef, KObjectRef]] = {
+    "int,int": (KInt(123456), KInt(789)),
+    "float,int": (KFloat(1234.5), KInt(789)),
+}
+
+
+def legacy_int_add(left: KInt, right: KObjectRef) -> KObjectRef:
+    if isinstance(right, KInt):
+        return KInt(left.v + right.v)
+    if isinstance(right, KFloat):
+        return KInt(int(left.v + right.v))
+    raise TypeError
+
+
+def isinstance_ladder(left: KObjectRef, right: KObjectRef) -> KObjectRef:
+    """改动之前 BinAdd 的分派方式: 节点中一层 isinstance, KInt.add 中再一层"""
+    if isinstance(left, KInt):
+        if isinstance(right, KInt):
+            return legacy_int_add(left, right)
+        if isinstance(right, KFloat):
+            return KFloat(left.v + right.v)
+    elif isinstance(left, KFloat):
+        if isinstance(right, KInt | KFloat):
+            return KFloat(left.v + right.v)
+    raise TypeError
+
+
+def per_call(fn, left: KObjectRef, right: KObjectRef) -> float:
+    seconds = min(timeit.repeat(lambda: fn(left, right), number=NUMBER, repeat=5))
+    return seconds / NUMBER * 1e9
+
+
+def main() -> None:
+    print(f"{'op':3s} {'operands':10s} {'registry':>9s} {'direct':>9s} {'overhead':>9s}")
+    for op in ("+", "-", "*", "/", "%", "==", "!=", "<", ">"):
+        operate = binary_operator(op)
+        for label, (left, right) in OPERANDS.items():
+            if (fn := OPERATORS.get((op, type(left), type(right)))) is None:
+                continue
+            dispatched, direct = per_call(operate, left, right), per_call(fn, left, right)
+            print(
+                f"{op:3s} {label:10s} {dispatched:7.1f}ns {direct:7.1f}ns "
+                f"{dispatched - direct:7.1f}ns"
+            )
+    for label, (left, right) in OPERANDS.items():
+        ladder = per_call(isinstance_ladder, left, right)
+        print(f"+   {label:10s} isinstance ladder {ladder:7.1f}ns")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from interpreter import Interpreter  # noqa: E402  pylint: disable=wrong-import-position
+from optimizer import DEFAULT_PASSES  # noqa: E402  pylint: disable=wrong-import-position
+
+PROGRAM = """
+fn work(n) {
+    let size = 60 * 60 * 24 + 7 * 3 - 100 / 4;
+    let scale = (2 * 3 + 4) * (5 - 1);
+    if (1 == 0) print("debug", n);
+    let x = n * 1 + size % 97 - scale + 0;
+    if (n < 2) return x;
+    return work(n - 1) + work(n - 2) - x;
+    print("unreachable");
+}
+return work(20);
+"""
+
+
+def main() -> None:
+    for engine in ("tree", "vm"):
+        timings = {}
+        for label, passes in (("off", ()), ("on", DEFAULT_PASSES)):
+            interpreter = Interpreter(engine, passes)
+            begin = time.perf_counter()
+            interpreter.run(PROGRAM)
+            timings[label] = time.perf_counter() - begin
+        print(
+            f"{engine:4s} off {timings['off']:6.3f} s  on {timings['on']:6.3f} s  "
+            f"speedup {timings['off'] / timings['on']:5.2f}x"
+        )
+    print("removed nodes per pass:", interpreter.optimizer.report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from lexer import Lexer  # noqa: E402  pylint: disable=wrong-import-position
+from parsers import Parser  # noqa: E402  pylint: disable=wrong-import-position
+
+LONG = """\
+fn step_%(i)d(a, b) {
+    let c = a * 3 + b / 2 - %(i)d %% 7;
+    if (c > 10) return step_%(i)d(c - 1, b);
+    return c == b;
+}
+step_%(i)d(%(i)d, 2.5);
+"""
+
+
+def nested(i: int, depth: int) -> str:
+    expr = "(" * depth + f"x{i}" + "".join(f" + {j})" for j in range(depth))
+    ifs = "if (a < b) {" * depth + "a = b;" + "}" * depth
+    return f"fn deep_{i}(a, b) {{ let x{i} = {expr}; {ifs} return x{i}; }}\n"
+
+
+def generate(kind: str, size: int) -> str:
+    parts, total, i = [], 0, 0
+    while total < size:
+        part = LONG % {"i": i} if kind == "long" else nested(i, 100)
+        parts.append(part)
+        total += len(part)
+        i += 1
+    return "".join(parts)
+
+
+def bench(kind: str, size: int) -> None:
+    src = generate(kind, size)
+    stream = Lexer(src).stream()
+    begin = time.perf_counter()
+    parser = Parser(stream)
+    parser.program()
+    elapsed = time.perf_counter() - begin
+    print(
+        f"{kind:6s} {len(src) / 2**20:5.1f} MiB  {parser.node_count:9d} nodes  {elapsed:7.3f} s  "
+        f"{parser.node_count / elapsed:10.0f} nodes/s  {len(src) / elapsed / 2**20:6.2f} MiB/s"
+    )
+
+
+def deep(depth: int) -> None:
+    """单个深度嵌套的表达式; 超出递归上限时应报告语法错误, 而不是 RecursionError"""
+    src = "let x = " + "(" * depth + "1" + ")" * depth + ";"
+    stream = Lexer(src).stream()
+    begin = time.perf_counter()
+    try:
+        Parser(stream).program()
+        outcome = "parsed"
+    except RuntimeError as e:
+        outcome = str(e)
+    elapsed = time.perf_counter() - begin
+    print(f"depth  {depth:6d}  {elapsed * 1e3:7.2f} ms  {outcome}")
+
+
+def main() -> None:
+    sizes = [int(float(v) * 2**20) for v in sys.argv[1:]] or [1 << 20, 2 << 20, 4 << 20]
+    for kind in ("long", "nested"):
+        for size in sizes:
+            bench(kind, size)
+    for depth in (100, 400, 5_000, 50_000):
+        deep(depth)
+
+
+if __name__ == "__main__":
+    main()
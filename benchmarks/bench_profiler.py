@@ -0,0 +1,61 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# pylint: disable=wrong-import-position
+from interpreter import ENGINES, Interpreter  # noqa: E402
+from profiler import Profiler  # noqa: E402
+
+# pylint: enable=wrong-import-position
+
+PROGRAM = """
+fn fib(n) {
+    if (n < 2) return n;
+    return fib(n - 1) + fib(n - 2);
+}
+fn square(x) { return x * x; }
+fn sum(n, acc) {
+    if (n == 0) return acc;
+    return sum(n - 1, acc + square(n));
+}
+fib(20);
+sum(10000, 0);
+"""
+REPEAT = 7
+
+
+def run(engine: str, mode: str | None) -> tuple[float, float]:
+    """返回运行时间与其中采样本身花费的时间"""
+    begin = time.perf_counter()
+    if mode is None:
+        Interpreter(engine).run(PROGRAM)
+        return time.perf_counter() - begin, 0.0
+    profiler = Profiler(PROGRAM, 0.005, mode)
+    profiler.profile(lambda: Interpreter(engine).run(PROGRAM))
+    return time.perf_counter() - begin, profiler.overhead
+
+
+def main() -> None:
+    for engine in ENGINES:
+        best: dict[str | None, tuple[float, float]] = {}
+        # 交替运行, 减少机器负载波动的影响
+        for _ in range(REPEAT):
+            for mode in (None, "thread", "signal"):
+                best[mode] = min(best.get(mode, (float("inf"), 0.0)), run(engine, mode))
+        plain = best[None][0]
+        print(
+            f"{engine:4s} plain {plain * 1e3:7.1f} ms",
+            *(
+                f"{mode} {(elapsed / plain - 1) * 100:+5.1f}% "
+                f"(sampling {overhead / elapsed * 100:4.2f}%)"
+                for mode, (elapsed, overhead) in best.items()
+                if mode is not None
+            ),
+            sep="  ",
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from lexer import Lexer, TokenDocument  # noqa: E402  pylint: disable=wrong-import-position
+
+CHUNK = """\
+fn area(w, h) { /* 矩形 */ return w * h; }
+let label = "area: \\"w * h\\"";  // 注释
+print(label, area(3, 4.5));
+"""
+KEYSTROKES = 200
+
+
+def typing_session(lines: int) -> None:
+    src = CHUNK * (lines // CHUNK.count("\n"))
+    document = TokenDocument(src)
+    rng = random.Random(lines)
+    # 在函数体, 字符串与块注释中间插入字符
+    edits = []
+    for _ in range(KEYSTROKES):
+        anchor = rng.choice(("w * h;", "area: ", "矩形"))
+        edits.append((src.find(anchor, rng.randrange(len(src) - len(CHUNK))) + 1, "x"))
+
+    # 输入一个字符再退格删除, 文档保持原样, 后面的编辑位置仍然有效
+    begin = time.perf_counter()
+    for offset, text in edits:
+        document.edit(offset, 0, text)
+        document.edit(offset, len(text), "")
+    incremental = (time.perf_counter() - begin) / (2 * KEYSTROKES)
+
+    full_edits = edits[:10]
+    begin = time.perf_counter()
+    for offset, text in full_edits:
+        Lexer(src[:offset] + text + src[offset:]).stream()
+    full = (time.perf_counter() - begin) / len(full_edits)
+
+    print(
+        f"{lines:7d} lines ({len(document)} tokens)  full {full * 1e3:7.2f} ms  "
+        f"incremental {incremental * 1e3:6.3f} ms  speedup {full / incremental:6.1f}x"
+    )
+
+
+def main() -> None:
+    for lines in (1_000, 10_000, 100_000):
+        typing_session(lines)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import os
+import sys
+import time
+from typing import Any, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# pylint: disable=wrong-import-position
+from asts import ASTNode, FuntionDeclStatement, ReturnStatement  # noqa: E402
+from interpreter import global_env  # noqa: E402
+from optimizer import transform  # noqa: E402
+from parsers import parse  # noqa: E402
+from resolver import resolve  # noqa: E402
+from runtime import Environment, KError, KObjectRef  # noqa: E402
+
+# pylint: enable=wrong-import-position
+
+PROGRAMS = {
+    "fib": """
+fn fib(n) {
+    if (n < 2) return n;
+    return fib(n - 1) + fib(n - 2);
+}
+fib(22);
+""",
+    "nested": """
+fn pick(n) {
+    if (n % 3 == 0) { if (n % 2 == 0) { return 1; } return 2; }
+    { { return 3; } }
+}
+fn sum(n) {
+    if (n == 0) return 0;
+    return pick(n) + sum(n - 1);
+}
+fn loop(k) { if (k == 0) return 0; sum(100); return loop(k - 1); }
+loop(60); loop(60); loop(60); loop(60);
+""",
+}
+
+
+class ReturnSignal(BaseException):
+    """改动之前的实现: return 抛出异常, 由函数调用处捕获"""
+
+    def __init__(self, value: KObjectRef) -> None:
+        self.value = value
+
+
+class RaisingReturn(ReturnStatement):
+    __slots__ = ()
+
+    def exec(self, env: Environment) -> Any:
+        raise ReturnSignal(self.expr.eval(env))
+
+
+class CatchingFunctionDecl(FuntionDeclStatement):
+    __slots__ = ()
+
+    def apply(self, env: Environment, args: list[KObjectRef]) -> KObjectRef:
+        if len(args) != len(self.params.params):
+            raise KError(f"{self.name}() takes {len(self.params.params)} arguments.")
+        assert self.locals is not None
+        try:
+            self.body.exec(Environment.frame(env, self.locals, args))
+        except ReturnSignal as signal:
+            return signal.value
+        return None
+
+
+def use_exceptions(node: ASTNode) -> Optional[ASTNode]:
+    match node:
+        case ReturnStatement():
+            return RaisingReturn(node.expr)
+        case FuntionDeclStatement():
+            return CatchingFunctionDecl(node.name, node.params, node.body)
+    return node
+
+
+def run(src: str, exceptions: bool, repeat: int = 3) -> float:
+    tree = parse(src)
+    if exceptions:
+        transform(tree, use_exceptions)
+    resolve(tree)
+    best = float("inf")
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        tree.eval(global_env())
+        best = min(best, time.perf_counter() - begin)
+    return best
+
+
+def main() -> None:
+    for name, src in PROGRAMS.items():
+        raising, completion = run(src, True), run(src, False)
+        print(
+            f"{name:8s} exception {raising:6.3f} s  completion {completion:6.3f} s  "
+            f"speedup {raising / completion:5.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# pylint: disable=wrong-import-position
+from interpreter import Interpreter  # noqa: E402
+from runtime import KString  # noqa: E402
+
+# pylint: enable=wrong-import-position
+
+PIECE = "0123456789abcdef"
+FLAT_LIMIT = 16_384
+
+PROGRAM = """
+fn build(n, s) {
+    if (n == 0) return s;
+    return build(n - 1, s + "0123456789abcdef");
+}
+return build(%d, "");
+"""
+
+
+class FlatString:
+    """改动之前的实现: 每次拼接都复制全部内容"""
+
+    def __init__(self, value: str) -> None:
+        self.value = value
+
+    def extend(self, s: "FlatString") -> "FlatString":
+        return FlatString(self.value + s.value)
+
+
+def build(cls: type, pieces: int) -> float:
+    piece = cls(PIECE)
+    begin = time.perf_counter()
+    s = cls("")
+    for _ in range(pieces):
+        s = s.extend(piece)
+    assert len(s.value) == pieces * len(PIECE)
+    return time.perf_counter() - begin
+
+
+def main() -> None:
+    for pieces in (4_096, 16_384, 65_536, 262_144, 1_048_576):
+        size = pieces * len(PIECE) / 2**20
+        rope = build(KString, pieces)
+        # 逐次复制的版本是二次的, 只在较小的规模上运行
+        flat = "       -   "
+        if pieces <= FLAT_LIMIT:
+            flat = f"{build(FlatString, pieces) * 1e3:8.1f} ms"
+        print(
+            f"{size:6.2f} MB in {pieces:8d} pieces  flat {flat}  "
+            f"rope {rope * 1e3:7.1f} ms  {rope / pieces * 1e9:5.0f} ns/piece"
+        )
+    for pieces in (20_000, 80_000):
+        begin = time.perf_counter()
+        result = Interpreter("vm", stack_limit=100).run(PROGRAM % pieces)
+        elapsed = time.perf_counter() - begin
+        assert isinstance(result, KString) and len(result) == pieces * len(PIECE)
+        print(f"K program, {pieces:6d} pieces  {elapsed * 1e3:7.1f} ms  "
+              f"{elapsed / pieces * 1e6:5.2f} us/piece")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# pylint: disable=wrong-import-position
+from interpreter import Interpreter  # noqa: E402
+from scheduler import Scheduler  # noqa: E402
+
+# pylint: enable=wrong-import-position
+
+LONG = """
+fn loop(n, acc) {
+    if (n == 0) return acc;
+    return loop(n - 1, acc + n %% 7);
+}
+return loop(%d, 0);
+"""
+
+SHORT = """
+fn fib(n) {
+    if (n < 2) return n;
+    return fib(n - 1) + fib(n - 2);
+}
+return fib(8) + %d;
+"""
+
+LONG_SCRIPTS, LONG_CALLS = 4, 100_000
+SHORT_SCRIPTS = 200
+
+
+def programs() -> list[tuple[str, str]]:
+    """长程序排在前面, 短程序穿插在后; 不加调度时短程序要等所有长程序执行完"""
+    result = [("long", LONG % LONG_CALLS) for _ in range(LONG_SCRIPTS)]
+    result += [("short", SHORT % i) for i in range(SHORT_SCRIPTS)]
+    return result
+
+
+def percentiles(latencies: list[float]) -> str:
+    q = statistics.quantiles(latencies, n=100)
+    worst = max(latencies)
+    return f"p50 {q[49] * 1e3:8.1f} ms  p99 {q[98] * 1e3:8.1f} ms  max {worst * 1e3:8.1f} ms"
+
+
+def sequential() -> tuple[float, list[float]]:
+    """不计量, 按顺序逐个执行; 所有程序同时到达, 延迟从开始算起"""
+    begin = time.perf_counter()
+    latencies = []
+    for kind, src in programs():
+        Interpreter("vm").run(src)
+        if kind == "short":
+            latencies.append(time.perf_counter() - begin)
+    return time.perf_counter() - begin, latencies
+
+
+def scheduled(quantum: int) -> tuple[float, list[float]]:
+    begin = time.perf_counter()
+    scheduler = Scheduler(quantum)
+    tasks = [(kind, scheduler.spawn(src)) for kind, src in programs()]
+    scheduler.run()
+    elapsed = time.perf_counter() - begin
+    assert all(task.error is None for _, task in tasks)
+    return elapsed, [task.finished - begin for kind, task in tasks if kind == "short"]
+
+
+def main() -> None:
+    print(
+        f"{LONG_SCRIPTS} scripts of {LONG_CALLS} calls, "
+        f"then {SHORT_SCRIPTS} short scripts; latency of the short scripts:"
+    )
+    base, latencies = sequential()
+    print(f"unmetered       total {base * 1e3:8.1f} ms  {percentiles(latencies)}")
+    for quantum in (100, 1_000, 10_000):
+        elapsed, latencies = scheduled(quantum)
+        print(
+            f"quantum {quantum:6d}  total {elapsed * 1e3:8.1f} ms  {percentiles(latencies)}  "
+            f"overhead {(elapsed / base - 1) * 100:+5.1f}%"
+        )
+    # 单个程序的计量开销: 不限燃料与足够多的燃料走的是同一条路径, 这里对比时间片切换的代价
+    src = LONG % LONG_CALLS
+    begin = time.perf_counter()
+    Interpreter("vm").run(src)
+    plain = time.perf_counter() - begin
+    begin = time.perf_counter()
+    Interpreter("vm", fuel=LONG_CALLS * 2).run(src)
+    metered = time.perf_counter() - begin
+    print(f"single script   plain {plain * 1e3:8.1f} ms  with budget {metered * 1e3:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
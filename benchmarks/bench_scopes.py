@@ -0,0 +1,61 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from interpreter import global_env  # noqa: E402  pylint: disable=wrong-import-position
+from parsers import parse  # noqa: E402  pylint: disable=wrong-import-position
+from resolver import resolve  # noqa: E402  pylint: disable=wrong-import-position
+
+DEPTHS = (1, 4, 16)
+CALLS = 150
+ROUNDS = 40
+
+
+def generate_source(depth: int) -> str:
+    """depth 层嵌套函数, 最内层递归 CALLS 次, 每次读取各层的变量"""
+    lines = ["let g = 1;"]
+    for level in range(depth):
+        lines.append(f"fn f{level}(p{level}) {{")
+        lines.append(f"    let v{level} = p{level} + g;")
+    reads = " + ".join(f"v{level}" for level in range(depth))
+    lines.append("    fn loop(n, acc) {")
+    lines.append("        let a = acc; let b = n; let c = a + b;")
+    lines.append(f"        if (n == 0) return acc + {reads};")
+    lines.append(f"        return loop(n - 1, c - b + ({reads}) % 2);")
+    lines.append("    }")
+    lines.append(f"    return loop({CALLS}, 0);")
+    for level in reversed(range(1, depth)):
+        lines.append("}")
+        lines.append(f"return f{level}(v{level - 1});")
+    lines.append("}")
+    lines.append(f"let r = 0; {'r = f0(r % 2); ' * ROUNDS}")
+    return "\n".join(lines)
+
+
+def run(src: str, resolved: bool, repeat: int = 3) -> float:
+    tree = parse(src)
+    if resolved:
+        resolve(tree)
+    best = float("inf")
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        tree.eval(global_env())
+        best = min(best, time.perf_counter() - begin)
+    return best
+
+
+def main() -> None:
+    for depth in DEPTHS:
+        src = generate_source(depth)
+        by_name, by_slot = run(src, False), run(src, True)
+        calls = CALLS * ROUNDS
+        print(
+            f"depth {depth:3d}  names {by_name * 1e6 / calls:7.2f} us/call  "
+            f"slots {by_slot * 1e6 / calls:7.2f} us/call  speedup {by_name / by_slot:5.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
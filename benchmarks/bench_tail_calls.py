@@ -0,0 +1,53 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from interpreter import ENGINES, Interpreter  # noqa: E402  pylint: disable=wrong-import-position
+from runtime import KError  # noqa: E402  pylint: disable=wrong-import-position
+
+ACCUMULATE = """
+fn sum(n, acc) {
+    if (n == 0) return acc;
+    return sum(n - 1, acc + n);
+}
+return sum(%d, 0);
+"""
+
+MUTUAL = """
+fn even(n) { if (n == 0) return 1; return odd(n - 1); }
+fn odd(n) { if (n == 0) return 0; return even(n - 1); }
+return even(%d);
+"""
+
+DEEP = """
+fn count(n) {
+    if (n == 0) return 0;
+    return count(n - 1) + 1;
+}
+return count(%d);
+"""
+
+
+def main() -> None:
+    depth = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    recursion_limit = sys.getrecursionlimit()
+    for engine in ENGINES:
+        for name, src in (("accumulate", ACCUMULATE), ("mutual", MUTUAL)):
+            begin = time.perf_counter()
+            Interpreter(engine, stack_limit=1000).run(src % depth)
+            elapsed = time.perf_counter() - begin
+            print(
+                f"{engine:4s} {name:10s} depth {depth}  {elapsed:6.2f} s  "
+                f"{elapsed / depth * 1e6:5.2f} us/call"
+            )
+        try:
+            Interpreter(engine, stack_limit=1000).run(DEEP % 2000)
+        except KError as e:
+            print(f"{engine:4s} non-tail   depth 2000  {e}")
+    print(f"sys.getrecursionlimit() {recursion_limit} -> {sys.getrecursionlimit()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from bench_lexer import generate_source  # noqa: E402  pylint: disable=wrong-import-position
+from lexer import Lexer  # noqa: E402  pylint: disable=wrong-import-position
+
+
+def measure(name: str, src: str, build) -> None:
+    begin = time.perf_counter()
+    count = len(build(src))
+    elapsed = time.perf_counter() - begin
+
+    tracemalloc.start()
+    tokens = build(src)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del tokens
+    print(
+        f"{name:12s} {count:9d} tokens  {elapsed:7.3f} s  {count / elapsed:10.0f} tokens/s  "
+        f"{peak / count:6.1f} bytes/token"
+    )
+
+
+def main() -> None:
+    size = int(float(sys.argv[1]) * 2**20) if len(sys.argv) > 1 else 4 << 20
+    src = generate_source(size)
+    print(f"source: {len(src) / 2**20:.1f} MiB")
+    measure("Lexer.all", src, lambda s: Lexer(s).all())
+    measure("Lexer.stream", src, lambda s: Lexer(s).stream())
+
+
+if __name__ == "__main__":
+    main()
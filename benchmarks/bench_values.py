@@ -0,0 +1,72 @@
+import os
+import sys
+import tracemalloc
+from typing import Callable
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from interpreter import Interpreter  # noqa: E402  pylint: disable=wrong-import-position
+from runtime import KFloat, KInt, KString  # noqa: E402  pylint: disable=wrong-import-position
+
+COUNT = 100_000
+
+PROGRAM = """
+fn count(n, acc) {
+    if (n == 0) return acc;
+    let even = n % 2 == 0;
+    return count(n - 1, acc + even * 3 - (n < 10) + 1);
+}
+return count(150, 0) + count(150, 1) + count(150, 2);
+"""
+
+
+class DictValue:
+    """旧的值对象: 带 __dict__, 每次运算都新建实例"""
+
+    def __init__(self, v: object) -> None:
+        self.v = v
+
+
+def measure(make: Callable[[int], object]) -> tuple[float, int]:
+    """返回每个值占用的字节数与分配的内存块数"""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    values = [make(i) for i in range(COUNT)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    size = sum(stat.size_diff for stat in stats)
+    blocks = sum(stat.count_diff for stat in stats)
+    del values
+    return size / COUNT, blocks
+
+
+def run_program(engine: str) -> tuple[int, int]:
+    tracemalloc.start()
+    Interpreter(engine).run(PROGRAM)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current, peak
+
+
+def main() -> None:
+    cases: dict[str, Callable[[int], object]] = {
+        "dict value": DictValue,
+        "KInt small": lambda i: KInt(i % 1000),
+        "KInt large": lambda i: KInt(i + 10_000),
+        "KFloat": lambda i: KFloat(i + 0.5),
+        "KString": lambda i: KString("value"),
+    }
+    for name, make in cases.items():
+        per_value, blocks = measure(make)
+        print(f"{name:12s} {per_value:7.1f} bytes/value  {blocks:8d} blocks")
+    for engine in ("tree", "vm"):
+        current, peak = run_program(engine)
+        print(
+            f"program {engine:4s}  retained {current / 1024:8.1f} KiB  "
+            f"peak {peak / 1024:8.1f} KiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
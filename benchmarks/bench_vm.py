@@ -0,0 +1,48 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from interpreter import Interpreter  # noqa: E402  pylint: disable=wrong-import-position
+
+PROGRAMS = {
+    "calls": """
+fn fib(n) {
+    if (n < 2) return n;
+    return fib(n - 1) + fib(n - 2);
+}
+return fib(22);
+""",
+    "arithmetic": """
+fn work(n) {
+    let x = n * 3 + 7 / 2 - n % 5 * 11 + (n - 1) * (n + 1) / 3;
+    let y = x * x - x / 7 + (x % 13) * (n + 2) - 4 * n;
+    if (n < 2) return x + y;
+    return work(n - 1) + work(n - 2) - y % 1000;
+}
+return work(18);
+""",
+}
+
+
+def bench(name: str, src: str) -> None:
+    results = {}
+    for engine in ("tree", "vm"):
+        begin = time.perf_counter()
+        value = Interpreter(engine).run(src)
+        results[engine] = time.perf_counter() - begin
+        assert value is not None
+    print(
+        f"{name:10s} tree {results['tree']:7.3f} s  vm {results['vm']:7.3f} s  "
+        f"speedup {results['tree'] / results['vm']:5.2f}x"
+    )
+
+
+def main() -> None:
+    for name, src in PROGRAMS.items():
+        bench(name, src)
+
+
+if __name__ == "__main__":
+    main()
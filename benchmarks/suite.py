@@ -0,0 +1,185 @@
+"""
+基准测试套件: 词法分析, 语法分析与若干代表性 K 程序的执行.
+
+    python benchmarks/suite.py                          # 运行并打印统计
+    python benchmarks/suite.py --save baseline.json     # 保存为基线
+    python benchmarks/suite.py --baseline baseline.json --threshold 10
+
+与基线比较时, 任一用例的中位数变慢超过 threshold 百分比则以状态 1 退出.
+基线与机器相关, 应在同一台机器上生成与比较.
+"""
+
+import argparse
+import functools
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from typing import Any, Callable
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# pylint: disable=wrong-import-position
+from interpreter import ENGINES, Interpreter  # noqa: E402
+from lexer import Lexer  # noqa: E402
+from parsers import parse  # noqa: E402
+
+# pylint: enable=wrong-import-position
+
+PROGRAMS = {
+    "calls": """
+fn fib(n) {
+    if (n < 2) return n;
+    return fib(n - 1) + fib(n - 2);
+}
+return fib(18);
+""",
+    "arithmetic": """
+fn work(n, acc) {
+    if (n == 0) return acc;
+    let x = n * 3 + 7 / 2 - n % 5 * 11 + (n - 1) * (n + 1) / 3;
+    let y = x * x - x / 7 + (x % 13) * (n + 2) - 4 * n;
+    return work(n - 1, acc + y % 1000);
+}
+return work(5000, 0);
+""",
+    "strings": """
+fn build(n, s) {
+    if (n == 0) return s;
+    if (n % 2 == 0) return build(n - 1, s + "ab");
+    return build(n - 1, s + "c");
+}
+fn repeat(k, total) {
+    if (k == 0) return total;
+    return repeat(k - 1, build(300, "") + total);
+}
+return repeat(20, "");
+""",
+    "scopes": """
+fn outer(a) {
+    fn middle(b) {
+        fn inner(c) {
+            fn leaf(d) { return a + b + c + d; }
+            return leaf(c + 1);
+        }
+        return inner(b + 1);
+    }
+    return middle(a + 1);
+}
+fn loop(n, acc) {
+    if (n == 0) return acc;
+    return loop(n - 1, acc + outer(n));
+}
+return loop(3000, 0);
+""",
+}
+
+FRONTEND_LINES = 5000
+
+
+def frontend_source() -> str:
+    chunk = "\n\n".join(PROGRAMS.values())
+    return chunk * (FRONTEND_LINES // chunk.count("\n") + 1)
+
+
+def evaluate(engine: str, program: str) -> Any:
+    return Interpreter(engine).run(program)
+
+
+def cases(engines: tuple[str, ...]) -> dict[str, Callable[[], Any]]:
+    src = frontend_source()
+    result: dict[str, Callable[[], Any]] = {
+        "lexer.all": lambda: Lexer(src).all(),
+        "parser.parse": lambda: parse(src),
+    }
+    for name, program in PROGRAMS.items():
+        for engine in engines:
+            result[f"eval.{name}.{engine}"] = functools.partial(evaluate, engine, program)
+    return result
+
+
+def measure(fn: Callable[[], Any], warmup: int, repeat: int) -> dict[str, float]:
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - begin)
+    return {
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "mean": statistics.fmean(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "runs": len(samples),
+    }
+
+
+def compare(
+    results: dict[str, dict[str, float]], baseline: dict[str, dict[str, float]], threshold: float
+) -> list[str]:
+    """返回中位数变慢超过 threshold 百分比的用例"""
+    regressions = []
+    for name, stats in results.items():
+        if (base := baseline.get(name)) is None:
+            print(f"{name:26s} (no baseline)")
+            continue
+        change = (stats["median"] / base["median"] - 1) * 100
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(
+            f"{name:26s} {base['median'] * 1e3:9.2f} ms -> {stats['median'] * 1e3:9.2f} ms  "
+            f"{change:+6.1f}%{flag}"
+        )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--engine", choices=ENGINES, action="append", help="默认运行全部引擎")
+    parser.add_argument("--filter", default="", help="只运行名字包含该字符串的用例")
+    parser.add_argument("--save", metavar="PATH", help="把结果保存为 JSON 基线")
+    parser.add_argument("--baseline", metavar="PATH", help="与 JSON 基线比较")
+    parser.add_argument("--threshold", type=float, default=10.0, help="允许的变慢百分比")
+    args = parser.parse_args()
+
+    results: dict[str, dict[str, float]] = {}
+    selected = tuple(args.engine or ENGINES)
+    for name, fn in cases(selected).items():
+        if args.filter not in name:
+            continue
+        results[name] = stats = measure(fn, args.warmup, args.repeat)
+        print(
+            f"{name:26s} median {stats['median'] * 1e3:9.2f} ms  min {stats['min'] * 1e3:9.2f} ms  "
+            f"stdev {stats['stdev'] / stats['mean'] * 100:5.1f}%"
+        )
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "python": platform.python_version(),
+                    "machine": platform.machine(),
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        print(f"\ncompared with {args.baseline} (threshold {args.threshold}%)")
+        if regressions := compare(results, baseline, args.threshold):
+            print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,35 +1,64 @@
 from __future__ import annotations
-from typing import Any
+from typing import Any, Callable, Optional
 from runtime import (
+    SLOT_UNRESOLVED,
+    THREAD_CALL_STACK,
+    UNSET,
     Environment,
     KCallable,
     KError,
     KFloat,
-    KFunctionReturn,
     KInt,
     KObjectRef,
     KString,
+    binary_operator,
+    truthy,
 )
+from runtime_meta import KExportFunction
 from tokens import FloatTok, IdentifierTok, IntTok, StringTok
 
 
+type Span = tuple[int, int]
+NO_SPAN: Span = (0, 0)
+
+# 语句正常执行完毕; 遇到 return 时 exec 直接返回 return 的值
+NORMAL: Any = object()
+
+
 class ASTNode:
+    __slots__ = ("span",)
+
+    def __init__(self) -> None:
+        self.span = NO_SPAN
+
     def eval(self, env: Environment) -> KObjectRef:
         raise NotImplementedError
 
+    def exec(self, env: Environment) -> Any:
+        """作为语句执行, 返回 NORMAL 或 return 的值"""
+        self.eval(env)
+        return NORMAL
+
 
 class Literal(ASTNode):
+    __slots__ = ()
+
     def eval(self, env: Environment) -> KObjectRef:
         raise NotImplementedError
 
 
 class NumberLiteral(Literal):
+    __slots__ = ()
+
     def eval(self, env: Environment) -> KObjectRef:
         raise NotImplementedError
 
 
 class FloatLiteral(NumberLiteral):
+    __slots__ = ("tok",)
+
     def __init__(self, tok: FloatTok) -> None:
+        super().__init__()
         self.tok = tok
 
     def eval(self, _: Environment) -> KObjectRef:
@@ -37,7 +66,10 @@ class FloatLiteral(NumberLiteral):
 
 
 class IntLiteral(NumberLiteral):
+    __slots__ = ("tok",)
+
     def __init__(self, tok: IntTok) -> None:
+        super().__init__()
         self.tok = tok
 
     def eval(self, _: Environment) -> KObjectRef:
@@ -45,242 +77,326 @@ class IntLiteral(NumberLiteral):
 
 
 class StringLiteral(Literal):
+    __slots__ = ("tok", "value")
+
     def __init__(self, tok: StringTok) -> None:
+        super().__init__()
         self.tok = tok
+        self.value = KString(tok.get_value()[1:-1])
 
     def eval(self, _: Environment) -> KObjectRef:
-        return KString(self.tok.get_value())
+        return self.value
 
 
 class NameLiteral(Literal):
+    __slots__ = ("tok", "name", "depth", "slot")
+
     def __init__(self, tok: IdentifierTok) -> None:
+        super().__init__()
         self.tok = tok
+        self.name: str = tok.get_value()
+        self.depth, self.slot = 0, SLOT_UNRESOLVED
 
     def eval(self, env: Environment) -> KObjectRef:
-        if v := env.get(self.tok.get_value()):
-            return v
-        else:
-            raise KError(f"No such name: {self.tok.get_value()}")
+        if self.depth == 0 and self.slot >= 0:
+            if (v := env.slots[self.slot]) is not UNSET:
+                return v
+        return env.load(self.depth, self.slot, self.name)
 
 
 class ParamLiteral(Literal):
-    def __init__(self, params: tuple[Any]) -> None:
+    __slots__ = ("params",)
+
+    def __init__(self, params: tuple[Any, ...]) -> None:
+        super().__init__()
         self.params = params
 
     def eval(self, env: Environment) -> KObjectRef:
         raise NotImplementedError()
 
+    def eval_args(self, env: Environment) -> list[KObjectRef]:
+        return [param.eval(env) for param in self.params]
+
 
 class Expr(ASTNode):
-    ...
+    __slots__ = ()
 
 
 class BinOp(Expr):
+    __slots__ = ("a", "b")
+
     def __init__(self, a: ASTNode, b: ASTNode) -> None:
         self.a = a
         self.b = b
         super().__init__()
 
+    # 子类设置为 runtime.binary_operator(运算符)
+    operate: Callable[[KObjectRef, KObjectRef], KObjectRef]  # pylint: disable=declare-non-slot
 
-class BinAdd(BinOp):
     def eval(self, env: Environment) -> KObjectRef:
-        left = self.a.eval(env)
-        right = self.b.eval(env)
-        if isinstance(left, KInt):
-            if isinstance(right, KInt):
-                return left.add(right)
-            elif isinstance(right, KFloat):
-                return KFloat(left.v + right.v)
-            else:
-                raise KError(f"Obj {left}, {right} do not support to add.")
-        elif isinstance(left, KFloat):
-            if isinstance(right, KInt):
-                return left.add(right)
-            elif isinstance(right, KFloat):
-                return KFloat(left.v + right.v)
-            else:
-                raise KError(f"Obj {right} do not support to add.")
-        else:
-            raise KError(f"obj {left} do not support to add.")
+        return self.operate(self.a.eval(env), self.b.eval(env))
+
+
+class BinAdd(BinOp):
+    __slots__ = ()
+
+    operate = staticmethod(binary_operator("+"))
 
 
 class BinSub(BinOp):
-    def eval(self, env: Environment) -> KObjectRef:
-        left = self.a.eval(env)
-        right = self.b.eval(env)
-        if isinstance(left, KInt):
-            if isinstance(right, KInt):
-                return left.sub(right)
-            elif isinstance(right, KFloat):
-                return KFloat(left.v - right.v)
-            else:
-                raise KError(f"Obj {left}, {right} do not support to sub.")
-        elif isinstance(left, KFloat):
-            if isinstance(right, KInt):
-                return left.sub(right)
-            elif isinstance(right, KFloat):
-                return KFloat(left.v - right.v)
-            else:
-                raise KError(f"Obj {right} do not support to sub.")
-        else:
-            raise KError(f"obj {left} do not support to sub.")
+    __slots__ = ()
+
+    operate = staticmethod(binary_operator("-"))
 
 
 class BinMul(BinOp):
-    def eval(self, env: Environment) -> KObjectRef:
-        left = self.a.eval(env)
-        right = self.b.eval(env)
-        if isinstance(left, KInt):
-            if isinstance(right, KInt):
-                return left.mul(right)
-            elif isinstance(right, KFloat):
-                return KFloat(left.v * right.v)
-            else:
-                raise KError(f"Obj {left}, {right} do not support to mul.")
-        elif isinstance(left, KFloat):
-            if isinstance(right, KInt):
-                return left.mul(right)
-            elif isinstance(right, KFloat):
-                return KFloat(left.v * right.v)
-            else:
-                raise KError(f"Obj {right} do not support to mul.")
-        else:
-            raise KError(f"obj {left} do not support to mul.")
+    __slots__ = ()
+
+    operate = staticmethod(binary_operator("*"))
 
 
 class BinDiv(BinOp):
-    def eval(self, env: Environment) -> KObjectRef:
-        left = self.a.eval(env)
-        right = self.b.eval(env)
-        if isinstance(left, KInt):
-            if isinstance(right, KInt):
-                return left.div(right)
-            elif isinstance(right, KFloat):
-                return KFloat(left.v / right.v)
-            else:
-                raise KError(f"Obj {left}, {right} do not support to div.")
-        elif isinstance(left, KFloat):
-            if isinstance(right, KInt):
-                return left.div(right)
-            elif isinstance(right, KFloat):
-                return KFloat(left.v / right.v)
-            else:
-                raise KError(f"Obj {right} do not support to div.")
-        else:
-            raise KError(f"obj {left} do not support to div.")
+    __slots__ = ()
+
+    operate = staticmethod(binary_operator("/"))
+
+
+class BinMod(BinOp):
+    __slots__ = ()
+
+    operate = staticmethod(binary_operator("%"))
 
 
 class BinEq(BinOp):
-    def eval(self, env: Environment) -> KObjectRef:
-        left, right = self.a.eval(env), self.b.eval(env)
-        if isinstance(left, KInt | KFloat) and isinstance(right, KInt | KFloat):
-            return KInt(1) if left.v == right.v else KInt(0)
-        raise KError(f"obj {left} do not support to eq.")
+    __slots__ = ()
+
+    operate = staticmethod(binary_operator("=="))
 
 
 class BinNotEq(BinOp):
-    def eval(self, env: Environment) -> KObjectRef:
-        left, right = self.a.eval(env), self.b.eval(env)
-        if isinstance(left, KInt | KFloat) and isinstance(right, KInt | KFloat):
-            return KInt(1) if left.v != right.v else KInt(0)
-        raise KError(f"obj {left} do not support to eq.")
+    __slots__ = ()
+
+    operate = staticmethod(binary_operator("!="))
 
 
 class BinMt(BinOp):
-    def eval(self, env: Environment) -> KObjectRef:
-        left, right = self.a.eval(env), self.b.eval(env)
-        if isinstance(left, KInt | KFloat) and isinstance(right, KInt | KFloat):
-            return KInt(1) if left.v > right.v else KInt(0)
-        raise KError(f"obj {left} do not support to eq.")
+    __slots__ = ()
+
+    operate = staticmethod(binary_operator(">"))
 
 
 class BinSt(BinOp):
-    def eval(self, env: Environment) -> KObjectRef:
-        left, right = self.a.eval(env), self.b.eval(env)
-        if isinstance(left, KInt | KFloat) and isinstance(right, KInt | KFloat):
-            return KInt(1) if left.v < right.v else KInt(0)
-        raise KError(f"obj {left} do not support to eq.")
+    __slots__ = ()
+
+    operate = staticmethod(binary_operator("<"))
 
 
 # class UnaryOp(Expr):
 #     ...
 
 
+def store(env: Environment, slot: int, name: str, v: KObjectRef) -> None:
+    if slot >= 0:
+        env.slots[slot] = v
+    else:
+        env.set(name, v)
+
+
 class VarDeclExpr(Expr):
+    __slots__ = ("name", "slot")
+
     def __init__(self, name: str) -> None:
+        super().__init__()
         self.name = name
+        self.slot = SLOT_UNRESOLVED
 
     def eval(self, env: Environment) -> KObjectRef:
-        env.set(self.name, None)
+        store(env, self.slot, self.name, None)
         return None
 
 
 class VarAssignExpr(Expr):
-    def __init__(self, name: str, liter: Literal) -> None:
+    __slots__ = ("name", "v", "slot")
+
+    def __init__(self, name: str, liter: ASTNode) -> None:
+        super().__init__()
         self.name = name
         self.v = liter
+        self.slot = SLOT_UNRESOLVED
 
     def eval(self, env: Environment) -> KObjectRef:
-        env.set(self.name, self.v.eval(env))
-        return None
+        v = self.v.eval(env)
+        store(env, self.slot, self.name, v)
+        return v
 
 
 class VarDeclAssignExpr(Expr):
-    def __init__(self, name: str, liter: Literal) -> None:
+    __slots__ = ("name", "v", "slot")
+
+    def __init__(self, name: str, liter: ASTNode) -> None:
+        super().__init__()
         self.name = name
         self.v = liter
+        self.slot = SLOT_UNRESOLVED
 
     def eval(self, env: Environment) -> KObjectRef:
-        env.set(self.name, self.v.eval(env))
+        store(env, self.slot, self.name, self.v.eval(env))
         return None
 
 
 class FunctionCallExpr(Expr):
+    __slots__ = ("name", "params", "depth", "slot")
+
     def __init__(self, name: str, params: ParamLiteral) -> None:
+        super().__init__()
         self.name, self.params = name, params
+        self.depth, self.slot = 0, SLOT_UNRESOLVED
+
+    def callee(self, env: Environment) -> KCallable:
+        fn = env.load(self.depth, self.slot, self.name)
+        if not isinstance(fn, KCallable):
+            raise KError(f"{self.name} is not callable.")
+        return fn
 
     def eval(self, env: Environment) -> KObjectRef:
-        return env.get(self.name)(self.params.eval(env))  # type:ignore
+        fn = self.callee(env)
+        if type(fn) is Closure:  # pylint: disable=unidiomatic-typecheck
+            # 不经过 KCallable.__call__, K 调用只占用 Python 之间的调用
+            return fn.decl.apply(fn.env, self.params.eval_args(env))
+        if isinstance(fn, Closure):
+            # 分层编译的函数: fn.fn 为 Python 方法, 同样不经过 __call__
+            return fn.fn(self.params.eval_args(env))
+        params = self.params.params
+        if isinstance(fn, KExportFunction) and fn.arity == len(params):
+            # 与虚拟机相同, 0 到 2 个参数按位置传入
+            if fn.arity == 0:
+                return fn.call()
+            if fn.arity == 1:
+                return fn.call(params[0].eval(env))
+            if fn.arity == 2:
+                return fn.call(params[0].eval(env), params[1].eval(env))
+        return fn(self.params.eval_args(env))
 
 
 class Statement(ASTNode):
-    ...
+    __slots__ = ()
+
+    def eval(self, env: Environment) -> KObjectRef:
+        return None if (v := self.exec(env)) is NORMAL else v
+
+
+class BlockStatement(Statement):
+    __slots__ = ("body",)
+
+    def __init__(self, body: list[ASTNode]) -> None:
+        super().__init__()
+        self.body = body
+
+    def exec(self, env: Environment) -> Any:
+        for stmt in self.body:
+            if (v := stmt.exec(env)) is not NORMAL:
+                return v
+        return NORMAL
 
 
 class IfStatement(Statement):
-    def __init__(self, cond: Expr, body: Statement) -> None:
+    __slots__ = ("cond", "body")
+
+    def __init__(self, cond: ASTNode, body: ASTNode) -> None:
+        super().__init__()
         self.cond, self.body = cond, body
 
-    def eval(self, env: Environment) -> KObjectRef:
-        if self.cond.eval(env):
-            self.body.eval(env)
-        return None
+    def exec(self, env: Environment) -> Any:
+        if truthy(self.cond.eval(env)):
+            return self.body.exec(env)
+        return NORMAL
+
+
+class TailCall:
+    """尾位置的调用, 由 FuntionDeclStatement.apply 的蹦床循环执行"""
+
+    __slots__ = ("fn", "args")
+
+    def __init__(self, fn: KCallable, args: list[KObjectRef]) -> None:
+        self.fn, self.args = fn, args
 
 
 class ReturnStatement(Statement):
-    def __init__(self, expr: Expr) -> None:
+    __slots__ = ("expr", "tail")
+
+    def __init__(self, expr: ASTNode) -> None:
+        super().__init__()
         self.expr = expr
+        # 函数体内 return 一个调用时由 resolver 置为 True
+        self.tail = False
 
-    def eval(self, env: Environment) -> KObjectRef:
-        raise KFunctionReturn(self.expr.eval(env))
+    def exec(self, env: Environment) -> Any:
+        if self.tail:
+            call: FunctionCallExpr = self.expr  # type:ignore
+            return TailCall(call.callee(env), call.params.eval_args(env))
+        return self.expr.eval(env)
 
 
 class FuntionDeclStatement(Statement):
-    def __init__(self, fn_name: str, params: ParamLiteral, body: Statement) -> None:
+    __slots__ = ("name", "params", "body", "slot", "locals", "calls")
+
+    def __init__(self, fn_name: str, params: ParamLiteral, body: ASTNode) -> None:
+        super().__init__()
         self.name = fn_name
         self.params = params
         self.body = body
-
-    def apply(self, args: ParamLiteral) -> KObjectRef:
-        local_env = zip(self.params.params, args.params, strict=True)
+        self.slot = SLOT_UNRESOLVED
+        # 调用帧的槽位名 (参数在前), 由 resolver 填写
+        self.locals: Optional[tuple[str, ...]] = None
+        # 调用次数 (含尾调用), 供 profiler 读取
+        self.calls = 0
+
+    def bind(self, env: Environment, args: list[KObjectRef]) -> Environment:
+        if len(args) != len(self.params.params):
+            raise KError(
+                f"{self.name}() takes {len(self.params.params)} arguments, got {len(args)}."
+            )
+        if self.locals is not None:
+            return Environment.frame(env, self.locals, args)
+        return Environment(dict(zip(self.params.params, args)), env)
+
+    def apply(self, env: Environment, args: list[KObjectRef]) -> KObjectRef:
+        stack = THREAD_CALL_STACK.stack
+        if stack.depth >= stack.limit:
+            stack.overflow()
+        stack.depth += 1
         try:
-            self.body.eval(Environment(dict(local_env)))
-        except KFunctionReturn as return_v:
-            return return_v.value
-        else:
-            return None
+            decl = self
+            while True:
+                decl.calls += 1
+                v = decl.body.exec(decl.bind(env, args))
+                if type(v) is not TailCall:  # pylint: disable=unidiomatic-typecheck
+                    return None if v is NORMAL else v
+                # 尾调用: 在当前循环中执行被调函数, 不增加 Python 栈深度
+                fn, args = v.fn, v.args
+                if not isinstance(fn, Closure):
+                    return fn(args)
+                if not fn.enter():
+                    return fn.fn(args)
+                decl, env = fn.decl, fn.env
+        finally:
+            stack.depth -= 1
 
     def eval(self, env: Environment) -> KObjectRef:
-        fn = KCallable(self.apply)
-        env.set(self.name, fn)
+        store(env, self.slot, self.name, Closure(self, env))
         return None
+
+
+class Closure(KCallable):
+    """树遍历解释器中的 K 函数"""
+
+    def __init__(self, decl: FuntionDeclStatement, env: Environment) -> None:
+        super().__init__(self.call)
+        self.decl, self.env = decl, env
+
+    def call(self, args: list[KObjectRef]) -> KObjectRef:
+        return self.decl.apply(self.env, args)
+
+    def enter(self) -> bool:
+        """被尾调用时返回 True 表示由调用方的蹦床继续解释执行函数体"""
+        return True
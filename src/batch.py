@@ -0,0 +1,130 @@
+from __future__ import annotations
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import contextlib
+import io
+import os
+import time
+from typing import Any, Iterable, Iterator, Optional
+from frontend import FrontendCache
+from interpreter import Interpreter
+from optimizer import DEFAULT_PASSES
+from runtime import to_str
+from runtime_meta import USER_TYPES
+
+SCRIPT_SUFFIX = ".k"
+# 预热用的程序, 覆盖词法, 语法, 优化, 编译与调用的路径
+WARMUP = """
+fn f(n) { if (n < 2) return n; return f(n - 1) + f(n - 2); }
+return f(10);
+"""
+
+type Result = dict[str, Any]
+
+
+class Worker:
+    """
+    工作进程中的执行环境: 进程启动时创建一次, 之后的所有脚本共用导入的模块与前端缓存.
+    每个脚本使用新的 Interpreter, 全局变量互不影响
+    """
+
+    def __init__(self, engine: str = "vm", passes: Iterable[str] = DEFAULT_PASSES) -> None:
+        self.engine, self.passes = engine, tuple(passes)
+        self.cache = FrontendCache()
+
+    def warmup(self) -> None:
+        for _ in range(2):
+            Interpreter(self.engine, self.passes, cache=self.cache).run(WARMUP)
+        self.cache.clear()
+
+    def run(self, path: str) -> Result:
+        """执行一个脚本; 错误也作为结果返回, 不会终止工作进程"""
+        output = io.StringIO()
+        begin = time.perf_counter()
+        result: Result = {"script": path}
+        # 前一个脚本中扩展代码创建的类型不影响这一个
+        USER_TYPES.clear()
+        try:
+            with open(path, encoding="utf-8") as f:
+                src = f.read()
+            with contextlib.redirect_stdout(output):
+                v = Interpreter(self.engine, self.passes, cache=self.cache).run(src)
+            result.update(ok=True, result=None if v is None else to_str(v))
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            result.update(error_result(path, e))
+        result.update(output=output.getvalue(), elapsed=time.perf_counter() - begin)
+        return result
+
+
+def error_result(path: str, e: BaseException) -> Result:
+    return {
+        "script": path,
+        "ok": False,
+        "error": type(e).__name__,
+        "message": str(e),
+        "output": "",
+        "elapsed": 0.0,
+    }
+
+
+# 每个工作进程中的 Worker, 由 init_worker 创建
+WORKER: Optional[Worker] = None
+
+
+def init_worker(engine: str, passes: tuple[str, ...]) -> None:
+    global WORKER  # pylint: disable=global-statement
+    WORKER = Worker(engine, passes)
+    WORKER.warmup()
+
+
+def run_chunk(paths: list[str]) -> list[Result]:
+    assert WORKER is not None
+    return [WORKER.run(path) for path in paths]
+
+
+def collect_scripts(target: str) -> list[str]:
+    """
+    target 为目录时收集其下所有的 .k 脚本 (按路径排序, 跳过 __kcache__);
+    否则视为清单文件, 每行一个脚本路径, 相对清单所在目录, 忽略空行与 # 开头的行
+    """
+    if os.path.isdir(target):
+        paths: list[str] = []
+        for directory, dirs, files in os.walk(target):
+            dirs[:] = sorted(d for d in dirs if not d.startswith("__"))
+            paths.extend(
+                os.path.join(directory, name) for name in files if name.endswith(SCRIPT_SUFFIX)
+            )
+        return sorted(paths)
+    base = os.path.dirname(target)
+    with open(target, encoding="utf-8") as f:
+        lines = (line.strip() for line in f)
+        return [os.path.join(base, line) for line in lines if line and not line.startswith("#")]
+
+
+def run_batch(
+    paths: list[str],
+    jobs: Optional[int] = None,
+    engine: str = "vm",
+    passes: Iterable[str] = DEFAULT_PASSES,
+    chunksize: Optional[int] = None,
+) -> Iterator[Result]:
+    """
+    在 jobs 个工作进程中执行脚本, 按完成顺序逐个产生结果.
+    脚本按 chunksize 个一组分发, 减少进程间通信; 默认让每个进程大约分到 8 组
+    """
+    jobs = jobs or os.cpu_count() or 1
+    if chunksize is None:
+        chunksize = max(1, min(64, len(paths) // (jobs * 8)))
+    chunks = [paths[i : i + chunksize] for i in range(0, len(paths), chunksize)]
+    initargs = (engine, tuple(passes))
+    with ProcessPoolExecutor(jobs, initializer=init_worker, initargs=initargs) as pool:
+        pending = {pool.submit(run_chunk, chunk): chunk for chunk in chunks}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                chunk = pending.pop(future)
+                try:
+                    results = future.result()
+                except Exception as e:  # pylint: disable=broad-exception-caught
+                    # 工作进程异常退出等; 这一组的每个脚本都报告为失败, 其余的组照常执行
+                    results = [error_result(path, e) for path in chunk]
+                yield from results
@@ -0,0 +1,71 @@
+from __future__ import annotations
+from collections import OrderedDict
+from collections.abc import Hashable
+import hashlib
+import threading
+from typing import Callable, Optional
+from asts import ASTNode
+
+
+class FrontendCache:  # pylint: disable=too-many-instance-attributes
+    """
+    进程内的前端缓存: 以源码摘要为键保存已经解析 (并优化) 的 AST, 命中时跳过词法与语法分析.
+    按条目数与源码字节数做 LRU 淘汰, 可被多个线程共享.
+    同一段源码在不同配置下 (引擎, 优化遍) 得到的树不同, 由 variant 区分
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: Optional[int] = None) -> None:
+        self.max_entries, self.max_bytes = max_entries, max_bytes
+        self.entries: OrderedDict[tuple[bytes, Hashable], tuple[ASTNode, int]] = OrderedDict()
+        self.bytes = 0
+        self.hits = self.misses = self.evictions = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key(src: str, variant: Hashable) -> tuple[tuple[bytes, Hashable], int]:
+        data = src.encode("utf-8")
+        return (hashlib.blake2b(data, digest_size=16).digest(), variant), len(data)
+
+    def get(self, src: str, build: Callable[[str], ASTNode], variant: Hashable = None) -> ASTNode:
+        """返回 src 对应的树, 缺失时调用 build 构造; build 在锁外执行, 并发的缺失可能各自构造一次"""
+        key, size = self.key(src, variant)
+        with self.lock:
+            if (entry := self.entries.get(key)) is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        tree = build(src)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return tree
+        with self.lock:
+            if key not in self.entries:
+                self.entries[key] = (tree, size)
+                self.bytes += size
+                self.evict()
+        return tree
+
+    def evict(self) -> None:
+        # 调用者持有锁
+        while len(self.entries) > self.max_entries or (
+            self.max_bytes is not None and self.bytes > self.max_bytes
+        ):
+            _, (_, size) = self.entries.popitem(last=False)
+            self.bytes -= size
+            self.evictions += 1
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> dict[str, int]:
+        """供监控读取的计数"""
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "bytes": self.bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
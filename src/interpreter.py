@@ -0,0 +1,647 @@
+from __future__ import annotations
+import asyncio
+from typing import Any, Awaitable, Callable, Iterable, NoReturn, Optional
+from asts import (
+    NO_SPAN,
+    ASTNode,
+    BinAdd,
+    BinDiv,
+    BinEq,
+    BinMod,
+    BinMt,
+    BinMul,
+    BinNotEq,
+    BinOp,
+    BinSt,
+    BinSub,
+    BlockStatement,
+    FloatLiteral,
+    FunctionCallExpr,
+    FuntionDeclStatement,
+    IfStatement,
+    IntLiteral,
+    NameLiteral,
+    ReturnStatement,
+    StringLiteral,
+    VarAssignExpr,
+    VarDeclAssignExpr,
+    VarDeclExpr,
+)
+from frontend import FrontendCache
+import jit
+from karray import KArray
+from optimizer import DEFAULT_PASSES, Optimizer
+from parsers import parse
+from resolver import resolve
+from runtime import (
+    DEFAULT_STACK_LIMIT,
+    RECURSION_LIMIT,
+    SLOT_GLOBAL,
+    UNSET,
+    Environment,
+    KAsyncCallable,
+    KCallable,
+    KError,
+    KFloat,
+    KInt,
+    KObjectRef,
+    KString,
+    call_stack,
+    to_str,
+    truthy,
+    type_name,
+)
+from runtime_meta import EXPORTS, KExportFunction
+
+
+# 操作码; 用普通整数常量而不是枚举, 分派循环里的比较才足够快
+OPCODES = (
+    "LOAD_CONST",
+    "LOAD_NAME",
+    "STORE_NAME",
+    "BINARY",
+    "CALL",
+    "RETURN",
+    "JUMP",
+    "JUMP_IF_FALSE",
+    "POP",
+    "DUP",
+    "MAKE_FUNCTION",
+    "LOAD_FAST",
+    "STORE_FAST",
+    "LOAD_DEREF",
+    "LOAD_GLOBAL",
+    "TAIL_CALL",
+)
+(
+    LOAD_CONST,
+    LOAD_NAME,
+    STORE_NAME,
+    BINARY,
+    CALL,
+    RETURN,
+    JUMP,
+    JUMP_IF_FALSE,
+    POP,
+    DUP,
+    MAKE_FUNCTION,
+    LOAD_FAST,
+    STORE_FAST,
+    LOAD_DEREF,
+    LOAD_GLOBAL,
+    TAIL_CALL,
+) = range(len(OPCODES))
+
+
+BINARY_NODES: tuple[type[BinOp], ...] = (
+    BinAdd,
+    BinSub,
+    BinMul,
+    BinDiv,
+    BinMod,
+    BinEq,
+    BinNotEq,
+    BinMt,
+    BinSt,
+)
+BINARY_OPERATORS: tuple[Callable[[KObjectRef, KObjectRef], KObjectRef], ...] = tuple(
+    node.operate for node in BINARY_NODES
+)
+
+
+class CodeObject:  # pylint: disable=too-many-instance-attributes
+    """
+    编译后的函数体: code 为 (操作码, 参数) 交替排列的扁平整数列表
+    """
+
+    __slots__ = ("name", "params", "code", "consts", "names", "locals", "refs", "span", "calls")
+
+    def __init__(
+        self, name: str, params: tuple[str, ...], locals_: Optional[tuple[str, ...]] = None
+    ) -> None:
+        self.name, self.params = name, params
+        self.code: list[int] = []
+        self.consts: list[Any] = []
+        self.names: list[str] = []
+        # 调用帧的槽位名; None 表示未经解析, 调用时用字典作用域
+        self.locals = locals_
+        # LOAD_DEREF 的参数: 外层函数帧中的 (depth, slot, name)
+        self.refs: list[tuple[int, int, str]] = []
+        # 函数声明在源码中的位置与调用次数, 供 profiler 读取
+        self.span = NO_SPAN
+        self.calls = 0
+
+    def __repr__(self) -> str:
+        return f"<CodeObject {self.name}>"
+
+    def disassemble(self) -> str:
+        return "\n".join(
+            f"{pc:5d} {OPCODES[self.code[pc]]:14s} {self.code[pc + 1]}"
+            for pc in range(0, len(self.code), 2)
+        )
+
+
+class KFunction(KCallable):
+    def __init__(self, code: CodeObject, env: Environment) -> None:
+        super().__init__(lambda args: VM().call(self, args))
+        self.code, self.closure = code, env
+
+
+class Compiler:
+    def __init__(
+        self,
+        name: str = "<module>",
+        params: tuple[str, ...] = (),
+        locals_: Optional[tuple[str, ...]] = None,
+    ) -> None:
+        self.co = CodeObject(name, params, locals_)
+        self.const_index: dict[tuple[type, Any], int] = {}
+        self.name_index: dict[str, int] = {}
+        self.ref_index: dict[tuple[int, int, str], int] = {}
+
+    def emit(self, op: int, arg: int = 0) -> int:
+        self.co.code += (op, arg)
+        return len(self.co.code) - 1
+
+    def const(self, v: Any) -> int:
+        key = (type(v), v if not isinstance(v, CodeObject) else id(v))
+        if key not in self.const_index:
+            self.const_index[key] = len(self.co.consts)
+            self.co.consts.append(v)
+        return self.const_index[key]
+
+    def name(self, name: str) -> int:
+        if name not in self.name_index:
+            self.name_index[name] = len(self.co.names)
+            self.co.names.append(name)
+        return self.name_index[name]
+
+    def ref(self, depth: int, slot: int, name: str) -> int:
+        key = (depth, slot, name)
+        if key not in self.ref_index:
+            self.ref_index[key] = len(self.co.refs)
+            self.co.refs.append(key)
+        return self.ref_index[key]
+
+    def load(self, name: str, depth: int, slot: int) -> None:
+        if slot >= 0:
+            if depth == 0:
+                self.emit(LOAD_FAST, slot)
+            else:
+                self.emit(LOAD_DEREF, self.ref(depth, slot, name))
+        elif slot == SLOT_GLOBAL:
+            self.emit(LOAD_GLOBAL, self.name(name))
+        else:
+            self.emit(LOAD_NAME, self.name(name))
+
+    def store(self, name: str, slot: int) -> None:
+        if slot >= 0:
+            self.emit(STORE_FAST, slot)
+        else:
+            self.emit(STORE_NAME, self.name(name))
+
+    def call(self, node: FunctionCallExpr) -> None:
+        self.load(node.name, node.depth, node.slot)
+        for arg in node.params.params:
+            self.expression(arg)
+
+    def compile_body(self, body: ASTNode) -> CodeObject:
+        self.statement(body)
+        self.emit(LOAD_CONST, self.const(None))
+        self.emit(RETURN)
+        return self.co
+
+    def statement(self, node: ASTNode) -> None:
+        match node:
+            case BlockStatement():
+                for stmt in node.body:
+                    self.statement(stmt)
+            case IfStatement():
+                self.expression(node.cond)
+                jump = self.emit(JUMP_IF_FALSE)
+                self.statement(node.body)
+                self.co.code[jump] = len(self.co.code)
+            case ReturnStatement() if node.tail:
+                call: FunctionCallExpr = node.expr  # type:ignore
+                self.call(call)
+                self.emit(TAIL_CALL, len(call.params.params))
+            case ReturnStatement():
+                self.expression(node.expr)
+                self.emit(RETURN)
+            case FuntionDeclStatement():
+                compiler = Compiler(node.name, node.params.params, node.locals)
+                compiler.co.span = node.span
+                self.emit(MAKE_FUNCTION, self.const(compiler.compile_body(node.body)))
+                self.store(node.name, node.slot)
+            case VarDeclExpr():
+                self.emit(LOAD_CONST, self.const(None))
+                self.store(node.name, node.slot)
+            case VarDeclAssignExpr() | VarAssignExpr():
+                self.expression(node.v)
+                self.store(node.name, node.slot)
+            case _:
+                self.expression(node)
+                self.emit(POP)
+
+    def expression(self, node: ASTNode) -> None:
+        match node:
+            case BinOp():
+                self.expression(node.a)
+                self.expression(node.b)
+                self.emit(BINARY, BINARY_NODES.index(type(node)))
+            case NameLiteral():
+                self.load(node.name, node.depth, node.slot)
+            case IntLiteral() | FloatLiteral() | StringLiteral():
+                self.emit(LOAD_CONST, self.const(node.eval(Environment())))
+            case FunctionCallExpr():
+                self.call(node)
+                self.emit(CALL, len(node.params.params))
+            case VarAssignExpr():
+                self.expression(node.v)
+                self.emit(DUP)
+                self.store(node.name, node.slot)
+            case _:
+                raise KError(f"Can not compile {type(node).__name__} as an expression.")
+
+
+def compile_program(tree: ASTNode) -> CodeObject:
+    return Compiler().compile_body(resolve(tree))
+
+
+class Preempted(Exception):
+    """VM 的燃料耗尽; 执行状态保留在 VM 中, 补充燃料后可以用 resume 继续"""
+
+
+class Suspended(Exception):
+    """
+    VM 调用了异步内置函数, 等待 awaitable 完成. final 为真表示它的结果就是整个执行的结果,
+    否则把结果压栈后 resume
+    """
+
+    def __init__(self, fn: KAsyncCallable, args: list[KObjectRef], final: bool) -> None:
+        super().__init__()
+        self.fn, self.final = fn, final
+        self.awaitable: Awaitable[KObjectRef] = fn.fn(args)
+
+    def cancel(self) -> KError:
+        """不在异步模式下时放弃等待, 返回要报告的错误"""
+        if (close := getattr(self.awaitable, "close", None)) is not None:
+            close()
+        return KError(f"{self.fn.name}() is asynchronous and can only be called under run_async.")
+
+
+class VM:
+    """
+    单循环分派的栈式虚拟机; K 函数调用只压入调用栈, 不占用 Python 栈帧.
+    尾调用复用当前帧, 调用栈深度超过 stack_limit 时报告 KError.
+    K 没有循环语句, 函数体内只有向前跳转, 所以按调用计量的燃料足以限制执行的步数
+    """
+
+    def __init__(self, stack_limit: int = DEFAULT_STACK_LIMIT, fuel: Optional[int] = None) -> None:
+        self.stack: list[KObjectRef] = []
+        self.frames: list[tuple[CodeObject, int, Environment]] = []
+        self.stack_limit = stack_limit
+        # 剩余的燃料, 每次调用消耗一份, 耗尽时抛出 Preempted; -1 递减永远不会到 0, 表示不限
+        self.fuel = -1 if fuel is None else fuel
+        # 被抢占时的 (co, pc, env, base_depth), 由 resume 继续执行
+        self.state: Optional[tuple[CodeObject, int, Environment, int]] = None
+
+    def call(self, fn: KFunction, args: list[KObjectRef]) -> KObjectRef:
+        fn.code.calls += 1
+        return self.execute(fn.code, self.bind(fn, args))
+
+    @staticmethod
+    def bind(fn: KFunction, args: list[KObjectRef]) -> Environment:
+        co = fn.code
+        if len(args) != len(co.params):
+            raise KError(f"{co.name}() takes {len(co.params)} arguments, got {len(args)}.")
+        if co.locals is None:
+            return Environment(dict(zip(co.params, args)), fn.closure)
+        return Environment.frame(fn.closure, co.locals, args)
+
+    # pylint: disable-next=too-many-branches,too-many-statements,too-many-locals
+    def execute(
+        self, co: CodeObject, env: Environment, pc: int = 0, base_depth: Optional[int] = None
+    ) -> KObjectRef:
+        stack, frames = self.stack, self.frames
+        push, pop = stack.append, stack.pop
+        code, consts, names = co.code, co.consts, co.names
+        if base_depth is None:
+            base_depth = len(frames)
+        max_depth = base_depth + self.stack_limit
+        binary = BINARY_OPERATORS
+        fuel = self.fuel
+        slots = env.slots
+        while True:
+            op, arg = code[pc], code[pc + 1]
+            pc += 2
+            if op == LOAD_FAST:
+                v = slots[arg]
+                push(v if v is not UNSET else env.lookup(co.locals[arg]))  # type:ignore
+            elif op == LOAD_CONST:
+                push(consts[arg])
+            elif op == BINARY:
+                right = pop()
+                stack[-1] = binary[arg](stack[-1], right)
+            elif op == JUMP_IF_FALSE:
+                if not truthy(pop()):
+                    pc = arg
+            elif op == CALL:
+                if fuel == 0:
+                    self.preempt(co, pc - 2, env, base_depth)
+                fuel -= 1
+                fn = stack[-1 - arg]
+                if type(fn) is KFunction:  # pylint: disable=unidiomatic-typecheck
+                    args = stack[len(stack) - arg :]
+                    del stack[len(stack) - arg - 1 :]
+                    if len(frames) >= max_depth:
+                        raise KError(f"Stack overflow: more than {self.stack_limit} nested calls.")
+                    frames.append((co, pc, env))
+                    env = self.bind(fn, args)
+                    slots = env.slots
+                    co = fn.code
+                    co.calls += 1
+                    code, consts, names = co.code, co.consts, co.names
+                    pc = 0
+                elif isinstance(fn, KExportFunction) and fn.arity == arg and arg <= 2:
+                    # 导出函数按位置传参, 不构造参数列表; 结果写回函数所在的栈位置
+                    if arg == 0:
+                        stack[-1] = fn.call()
+                    elif arg == 1:
+                        a = pop()
+                        stack[-1] = fn.call(a)
+                    else:
+                        b, a = pop(), pop()
+                        stack[-1] = fn.call(a, b)
+                else:
+                    args = stack[len(stack) - arg :]
+                    del stack[len(stack) - arg - 1 :]
+                    if type(fn) is KAsyncCallable:  # pylint: disable=unidiomatic-typecheck
+                        self.state = (co, pc, env, base_depth)
+                        self.fuel = fuel
+                        raise Suspended(fn, args, False)
+                    if not isinstance(fn, KCallable):
+                        raise KError(f"{to_str(fn)} is not callable.")
+                    push(fn(args))
+            elif op == RETURN:
+                if len(frames) == base_depth:
+                    self.fuel = fuel
+                    return pop()
+                co, pc, env = frames.pop()
+                slots = env.slots
+                code, consts, names = co.code, co.consts, co.names
+            elif op == TAIL_CALL:
+                if fuel == 0:
+                    self.preempt(co, pc - 2, env, base_depth)
+                fuel -= 1
+                args = stack[len(stack) - arg :]
+                del stack[len(stack) - arg :]
+                fn = pop()
+                if type(fn) is KFunction:  # pylint: disable=unidiomatic-typecheck
+                    env = self.bind(fn, args)
+                    slots = env.slots
+                    co = fn.code
+                    co.calls += 1
+                    code, consts, names = co.code, co.consts, co.names
+                    pc = 0
+                    continue
+                if not isinstance(fn, KCallable):
+                    raise KError(f"{to_str(fn)} is not callable.")
+                if type(fn) is KAsyncCallable:  # pylint: disable=unidiomatic-typecheck
+                    # 结果交给调用者所在的帧, 没有调用者时就是整个执行的结果
+                    self.fuel = fuel
+                    if len(frames) == base_depth:
+                        raise Suspended(fn, args, True)
+                    co, pc, env = frames.pop()
+                    self.state = (co, pc, env, base_depth)
+                    raise Suspended(fn, args, False)
+                result = fn(args)
+                if len(frames) == base_depth:
+                    self.fuel = fuel
+                    return result
+                push(result)
+                co, pc, env = frames.pop()
+                slots = env.slots
+                code, consts, names = co.code, co.consts, co.names
+            elif op == STORE_FAST:
+                slots[arg] = pop()
+            elif op == LOAD_GLOBAL:
+                push(env.globals.lookup(names[arg]))
+            elif op == LOAD_DEREF:
+                push(env.load(*co.refs[arg]))
+            elif op == LOAD_NAME:
+                push(env.lookup(names[arg]))
+            elif op == STORE_NAME:
+                env.set(names[arg], pop())
+            elif op == POP:
+                pop()
+            elif op == DUP:
+                push(stack[-1])
+            elif op == JUMP:
+                pc = arg
+            elif op == MAKE_FUNCTION:
+                push(KFunction(consts[arg], env))
+            else:
+                raise KError(f"Unknown opcode {OPCODES[op]}.")
+
+    def preempt(self, co: CodeObject, pc: int, env: Environment, base_depth: int) -> NoReturn:
+        self.fuel = 0
+        self.state = (co, pc, env, base_depth)
+        raise Preempted()
+
+    def start(self, co: CodeObject, env: Environment) -> None:
+        """准备从头执行 co, 之后由 resume 开始"""
+        self.state = (co, 0, env, len(self.frames))
+
+    async def run_async(
+        self, co: CodeObject, env: Environment, quantum: Optional[int] = None
+    ) -> KObjectRef:
+        """
+        执行 co, 在异步内置函数处让出事件循环.
+        quantum 不为 None 时每 quantum 次调用也让出一次, 使纯计算的程序不会独占事件循环
+        """
+        self.start(co, env)
+        while True:
+            if quantum is not None:
+                self.fuel = quantum
+            try:
+                return self.resume()
+            except Preempted:
+                await asyncio.sleep(0)
+            except Suspended as e:
+                v = await e.awaitable
+                if e.final:
+                    return v
+                self.stack.append(v)
+
+    def resume(self) -> KObjectRef:
+        """从被抢占的调用指令处继续执行; 燃料须先由调用者补充"""
+        if self.state is None:
+            raise KError("Nothing to resume.")
+        co, pc, env, base_depth = self.state
+        self.state = None
+        return self.execute(co, env, pc, base_depth)
+
+
+def builtin_print(args: list[KObjectRef]) -> KObjectRef:
+    print(*(to_str(arg) for arg in args))
+    return None
+
+
+async def builtin_sleep(args: list[KObjectRef]) -> KObjectRef:
+    """sleep(毫秒), 只能在异步模式下调用"""
+    (ms,) = expect("sleep", args, KInt | KFloat)
+    await asyncio.sleep(ms.v / 1000)
+    return None
+
+
+def expect(name: str, args: list[KObjectRef], *types: Any) -> list[Any]:
+    """检查内置函数的参数个数与类型"""
+    if len(args) != len(types) or not all(isinstance(a, t) for a, t in zip(args, types)):
+        expected = ", ".join(getattr(t, "__name__", str(t)) for t in types)
+        got = ", ".join(type_name(a) for a in args)
+        raise KError(f"{name}() expects ({expected}), got ({got}).")
+    return args
+
+
+def builtin_array(args: list[KObjectRef]) -> KObjectRef:
+    if not all(isinstance(arg, KInt | KFloat) for arg in args):
+        raise KError("array() expects numbers.")
+    return KArray.of(arg.v for arg in args)  # type:ignore
+
+
+def builtin_range(args: list[KObjectRef]) -> KObjectRef:
+    (n,) = expect("range", args, KInt)
+    return KArray.range(n.v)  # type:ignore
+
+
+def builtin_at(args: list[KObjectRef]) -> KObjectRef:
+    v, index = expect("at", args, KArray, KInt)
+    return v.at(index.v)
+
+
+def builtin_len(args: list[KObjectRef]) -> KObjectRef:
+    (v,) = expect("len", args, KString | KArray)
+    return KInt(len(v))
+
+
+def builtin_slice(args: list[KObjectRef]) -> KObjectRef:
+    v, begin, end = expect("slice", args, KString | KArray, KInt, KInt)
+    return v.slice(begin.v, end.v)  # type:ignore
+
+
+def reduction(name: str) -> KCallable:
+    def reduce(args: list[KObjectRef]) -> KObjectRef:
+        (v,) = expect(name, args, KArray)
+        return getattr(v, name)()
+
+    return KCallable(reduce)
+
+
+BUILTINS: dict[str, KCallable] = {
+    "print": KCallable(builtin_print),
+    "array": KCallable(builtin_array),
+    "range": KCallable(builtin_range),
+    "len": KCallable(builtin_len),
+    "slice": KCallable(builtin_slice),
+    "at": KCallable(builtin_at),
+    "sum": reduction("sum"),
+    "min": reduction("min"),
+    "max": reduction("max"),
+    "any": reduction("any"),
+    "all": reduction("all"),
+    "sleep": KAsyncCallable(builtin_sleep, "sleep"),
+}
+
+
+def global_env() -> Environment:
+    """模块作用域; 内置函数与 runtime_meta 中导出的名字在其外层"""
+    return Environment({}, Environment(BUILTINS | EXPORTS))
+
+
+ENGINES = ("vm", "tree", "jit")
+
+
+class Interpreter:
+    """
+    执行 K 源码; engine 为 "vm" (字节码虚拟机), "tree" (直接遍历 AST)
+    或 "jit" (遍历 AST, 热点函数编译为 Python 函数).
+    passes 为解析后运行的优化遍, 各遍删除的节点数见 self.optimizer.report;
+    stack_limit 为 K 函数的最大嵌套调用深度, 尾调用不计入;
+    cache 为可在多个解释器间共享的 FrontendCache, 命中时跳过词法与语法分析;
+    fuel 为一次执行最多进行的调用次数, 只有字节码虚拟机支持
+    """
+
+    def __init__(
+        self,
+        engine: str = "vm",
+        passes: Iterable[str] = DEFAULT_PASSES,
+        stack_limit: int = DEFAULT_STACK_LIMIT,
+        cache: Optional[FrontendCache] = None,
+        fuel: Optional[int] = None,
+    ) -> None:
+        if engine not in ENGINES:
+            raise KError(f"Unknown engine {engine}, expected one of {ENGINES}.")
+        if fuel is not None and engine != "vm":
+            raise KError(f"Fuel metering is not supported by the {engine} engine.")
+        self.engine = engine
+        self.stack_limit = stack_limit
+        self.env = global_env()
+        self.optimizer = Optimizer(passes)
+        self.cache = cache
+        self.fuel = fuel
+
+    def prepare(self, src: str) -> ASTNode:
+        """前端: 解析, 优化并解析作用域, 得到可以直接执行的树"""
+        tree: ASTNode = self.optimizer.optimize(parse(src))
+        if self.engine == "jit":
+            tree = jit.install(tree)
+        return resolve(tree)
+
+    def frontend(self, src: str) -> ASTNode:
+        if self.cache is None:
+            return self.prepare(src)
+        return self.cache.get(src, self.prepare, (self.engine, self.optimizer.passes))
+
+    def run(self, src: str) -> KObjectRef:
+        tree = self.frontend(src)
+        if self.engine == "vm":
+            return self.execute(Compiler().compile_body(tree))
+        return self.evaluate(tree)
+
+    def evaluate(self, tree: ASTNode) -> KObjectRef:
+        """树遍历执行; 调用深度按线程记录, 嵌套执行时结束后恢复外层的上限"""
+        stack = call_stack()
+        saved, stack.limit = stack.limit, self.stack_limit
+        try:
+            with RECURSION_LIMIT.raised(self.stack_limit):
+                return tree.eval(self.env)
+        except RecursionError:
+            # 表达式嵌套过深等, 超出了按调用深度估算的 Python 递归上限
+            raise KError("Stack overflow: Python recursion limit exceeded.") from None
+        finally:
+            stack.limit = saved
+
+    def execute(self, co: CodeObject) -> KObjectRef:
+        try:
+            return VM(self.stack_limit, self.fuel).execute(co, self.env)
+        except Preempted:
+            raise KError(f"Out of fuel: more than {self.fuel} calls.") from None
+        except Suspended as e:
+            raise e.cancel() from None
+
+    async def run_async(self, src: str, quantum: Optional[int] = None) -> KObjectRef:
+        """
+        在当前事件循环中执行, 调用异步内置函数时挂起而不阻塞其他协程; 只有字节码虚拟机支持.
+        quantum 为两次主动让出之间最多进行的调用次数
+        """
+        if self.engine != "vm":
+            raise KError(f"Asynchronous execution is not supported by the {self.engine} engine.")
+        if self.fuel is not None:
+            raise KError("Fuel metering is not supported under run_async.")
+        co = Compiler().compile_body(self.frontend(src))
+        return await VM(self.stack_limit).run_async(co, self.env, quantum)
+
+
+def run(src: str, engine: str = "vm") -> KObjectRef:
+    return Interpreter(engine).run(src)
@@ -0,0 +1,264 @@
+from __future__ import annotations
+from typing import Any, Callable
+from asts import (
+    ASTNode,
+    BinAdd,
+    BinDiv,
+    BinEq,
+    BinMod,
+    BinMt,
+    BinMul,
+    BinNotEq,
+    BinOp,
+    BinSt,
+    BinSub,
+    BlockStatement,
+    Closure,
+    FunctionCallExpr,
+    FuntionDeclStatement,
+    IfStatement,
+    IntLiteral,
+    NameLiteral,
+    ReturnStatement,
+    VarAssignExpr,
+    VarDeclAssignExpr,
+    store,
+)
+from runtime import Environment, KError, KInt, KObjectRef, call_stack
+
+HOT_THRESHOLD = 50
+DEOPT_THRESHOLD = 20
+# 编译出的函数的文件名前缀, 以及其命名空间中保存函数声明的名字; profiler 据此识别 K 函数
+SOURCE_PREFIX = "<k-jit "
+DECL_NAME = "__k_decl__"
+
+ARITHMETIC = {BinAdd: "+", BinSub: "-", BinMul: "*"}
+COMPARISON = {BinEq: "==", BinNotEq: "!=", BinMt: ">", BinSt: "<"}
+
+
+class JitUnsupported(Exception):
+    ...
+
+
+def truncate_div(a: int, b: int) -> int:
+    """与 runtime.int_div 相同: 向零取整"""
+    q = abs(a) // abs(b)
+    return q if (a < 0) == (b < 0) else -q
+
+
+def truncate_mod(a: int, b: int) -> int:
+    """与 runtime.int_mod 相同: 余数的符号与被除数相同"""
+    r = abs(a) % abs(b)
+    return -r if a < 0 else r
+
+
+class Transpiler:
+    """
+    把只做整数运算的 K 函数翻译成 Python 源码.
+
+    生成的函数直接在 Python int 上计算, 入口处检查参数都是 KInt; 除自递归外
+    不调用其他函数, 因此函数体没有副作用, 与解释执行的结果一致.
+    """
+
+    def __init__(self, decl: FuntionDeclStatement) -> None:
+        self.decl = decl
+        self.params: tuple[str, ...] = decl.params.params
+        self.locals = set(self.params)
+        self.lines: list[str] = []
+
+    def transpile(self) -> str:
+        """
+        生成两个函数: k_<name> 执行一次函数体, 自身的尾调用返回新参数的元组;
+        run_<name> 循环执行直到得到结果, 非尾调用与入口都调用它
+        """
+        # budget 为还允许的嵌套调用层数; K 的名字都带 k_ 前缀, 不会与之冲突
+        name = self.decl.name
+        params = ", ".join([*map(self.var, self.params), "budget"])
+        self.lines.append(f"def k_{name}({params}):")
+        self.emit("if not budget:", 1)
+        self.emit("call_stack().overflow()", 2)
+        self.statement(self.decl.body, 1)
+        self.lines.append("    return None")
+        self.lines.append(f"def run_{name}({params}):")
+        self.emit(f"result = k_{name}({params})", 1)
+        self.emit("while type(result) is tuple:", 1)
+        self.emit(f"result = k_{name}(*result, budget)", 2)
+        self.emit("return result", 1)
+        return "\n".join(self.lines)
+
+    @staticmethod
+    def var(name: str) -> str:
+        return f"k_{name}"
+
+    def emit(self, line: str, depth: int) -> None:
+        self.lines.append("    " * depth + line)
+
+    def statement(self, node: ASTNode, depth: int) -> None:
+        match node:
+            case BlockStatement():
+                for stmt in node.body:
+                    self.statement(stmt, depth)
+                if not node.body:
+                    self.emit("pass", depth)
+            case IfStatement():
+                self.emit(f"if {self.condition(node.cond)}:", depth)
+                self.statement(node.body, depth + 1)
+            case ReturnStatement() if self.is_self_call(node.expr):
+                # 自身的尾调用返回新参数, 由入口函数循环调用, 不增加 Python 栈深度
+                assert isinstance(node.expr, FunctionCallExpr)
+                self.emit(f"return ({''.join(a + ', ' for a in self.arguments(node.expr))})", depth)
+            case ReturnStatement():
+                self.emit(f"return {self.expression(node.expr)}", depth)
+            case VarDeclAssignExpr() | VarAssignExpr():
+                value = self.expression(node.v)
+                self.locals.add(node.name)
+                self.emit(f"{self.var(node.name)} = {value}", depth)
+            case _:
+                self.emit(self.expression(node), depth)
+
+    def condition(self, node: ASTNode) -> str:
+        if type(node) in COMPARISON:
+            assert isinstance(node, BinOp)
+            op = COMPARISON[type(node)]  # type:ignore
+            return f"{self.expression(node.a)} {op} {self.expression(node.b)}"
+        return self.expression(node)
+
+    def expression(self, node: ASTNode) -> str:  # pylint: disable=too-many-return-statements
+        match node:
+            case IntLiteral():
+                return repr(node.tok.get_value())
+            case NameLiteral():
+                name = node.tok.get_value()
+                if name not in self.locals:
+                    raise JitUnsupported(f"non-local name {name}")
+                return self.var(name)
+            case BinDiv():
+                return f"div({self.expression(node.a)}, {self.expression(node.b)})"
+            case BinMod():
+                return f"mod({self.expression(node.a)}, {self.expression(node.b)})"
+            case BinOp() if type(node) in ARITHMETIC:
+                op = ARITHMETIC[type(node)]  # type:ignore
+                return f"({self.expression(node.a)} {op} {self.expression(node.b)})"
+            case BinOp() if type(node) in COMPARISON:
+                return f"(1 if {self.condition(node)} else 0)"
+            case VarAssignExpr():
+                self.locals.add(node.name)
+                return f"({self.var(node.name)} := {self.expression(node.v)})"
+            case FunctionCallExpr() if self.is_self_call(node):
+                return f"run_{node.name}({', '.join([*self.arguments(node), 'budget - 1'])})"
+        raise JitUnsupported(type(node).__name__)
+
+    def is_self_call(self, node: ASTNode) -> bool:
+        return isinstance(node, FunctionCallExpr) and node.name == self.decl.name
+
+    def arguments(self, node: FunctionCallExpr) -> list[str]:
+        if node.name in self.locals:
+            raise JitUnsupported(f"{node.name} is shadowed")
+        if len(node.params.params) != len(self.params):
+            raise JitUnsupported("arity mismatch")
+        return [self.expression(arg) for arg in node.params.params]
+
+
+class TieredFunction(Closure):
+    """
+    先解释执行并计数, 调用次数达到 HOT_THRESHOLD 后尝试编译为 Python 函数.
+    无法编译或参数类型检查反复失败时设置 deopt, 此后一直解释执行.
+    """
+
+    def __init__(self, decl: FuntionDeclStatement, env: Environment) -> None:
+        super().__init__(decl, env)
+        self.fn = self.interpret
+        self.calls = 0
+        self.guard_failures = 0
+        self.deopt = False
+        self.compiled = False
+
+    def enter(self) -> bool:
+        if not self.compiled and not self.deopt:
+            self.calls += 1
+            if self.calls >= HOT_THRESHOLD:
+                self.tier_up()
+        return not self.compiled
+
+    def interpret(self, args: list[KObjectRef]) -> KObjectRef:
+        self.calls += 1
+        if self.calls >= HOT_THRESHOLD:
+            self.tier_up()
+        return self.decl.apply(self.env, args)
+
+    def tier_up(self) -> None:
+        try:
+            self.fn = self.compile()
+        except Exception:  # pylint: disable=broad-exception-caught
+            # JitUnsupported 或生成的源码有误; 编译失败只影响性能, 不应传给 K 程序
+            self.deoptimize()
+        else:
+            self.compiled = True
+
+    def deoptimize(self) -> None:
+        self.deopt, self.compiled = True, False
+        self.fn = self.call
+
+    def guard_failed(self, args: list[KObjectRef]) -> KObjectRef:
+        self.guard_failures += 1
+        if self.guard_failures >= DEOPT_THRESHOLD:
+            self.deoptimize()
+        return self.decl.apply(self.env, args)
+
+    def compile(self) -> Callable[[list[KObjectRef]], KObjectRef]:
+        source = Transpiler(self.decl).transpile()
+        namespace: dict[str, Any] = {
+            "call_stack": call_stack,
+            "div": truncate_div,
+            "mod": truncate_mod,
+            DECL_NAME: self.decl,
+        }
+        filename = f"{SOURCE_PREFIX}{self.decl.name}>"
+        exec(compile(source, filename, "exec"), namespace)  # pylint: disable=exec-used
+        native = namespace[f"run_{self.decl.name}"]
+        arity, name = len(self.decl.params.params), self.decl.name
+
+        def entry(args: list[KObjectRef]) -> KObjectRef:
+            self.decl.calls += 1
+            if (
+                len(args) != arity
+                or self.env.get(name) is not self
+                or any(type(arg) is not KInt for arg in args)  # pylint: disable=unidiomatic-typecheck
+            ):
+                return self.guard_failed(args)
+            try:
+                stack = call_stack()
+                budget = stack.limit - stack.depth
+                result = native(*(arg.v for arg in args), budget)  # type:ignore
+            except (UnboundLocalError, TypeError):
+                # 局部变量未赋值时解释器会去外层作用域查找; 自递归返回 none 后参与运算时
+                # 解释器报告 KError. 函数体无副作用, 交回解释器重新执行即可
+                self.deoptimize()
+                return self.decl.apply(self.env, args)
+            except ZeroDivisionError as e:
+                raise KError("Division by zero.") from e
+            return None if result is None else KInt(result)
+
+        return entry
+
+
+class JitFunctionDecl(FuntionDeclStatement):
+    __slots__ = ()
+
+    def eval(self, env: Environment) -> KObjectRef:
+        store(env, self.slot, self.name, TieredFunction(self, env))
+        return None
+
+
+def install(node: ASTNode) -> ASTNode:
+    """把树中的函数声明替换为可分层编译的版本"""
+    match node:
+        case FuntionDeclStatement():
+            decl = JitFunctionDecl(node.name, node.params, install(node.body))
+            decl.span = node.span
+            return decl
+        case BlockStatement():
+            node.body = [install(stmt) for stmt in node.body]
+        case IfStatement():
+            node.body = install(node.body)
+    return node
@@ -0,0 +1,234 @@
+from __future__ import annotations
+from array import array
+import itertools
+import math
+import operator
+from typing import Any, Callable, Iterable
+from runtime import (
+    BinaryOperator,
+    KError,
+    KFloat,
+    KInt,
+    KObjectRef,
+    kbool,
+    register_operator,
+    register_str,
+    register_truthy,
+)
+
+try:
+    import numpy  # type:ignore
+except ImportError:
+    numpy = None  # pylint: disable=invalid-name
+
+# 元素类型: 64 位整数或双精度浮点数. 没有 NumPy 时数据是 array 上的 memoryview
+INT, FLOAT = "q", "d"
+ARITHMETIC = ("+", "-", "*", "/", "%")
+COMPARISON = ("==", "!=", "<", ">")
+
+if numpy is not None:
+    NUMPY_ARITHMETIC = {
+        "+": numpy.add,
+        "-": numpy.subtract,
+        "*": numpy.multiply,
+        "/": numpy.true_divide,
+        "%": numpy.fmod,
+    }
+    NUMPY_COMPARISON = {
+        "==": numpy.equal,
+        "!=": numpy.not_equal,
+        "<": numpy.less,
+        ">": numpy.greater,
+    }
+else:
+    NUMPY_ARITHMETIC = NUMPY_COMPARISON = {}
+
+
+class KArray:
+    """
+    不可变的数值数组, 数据保存在连续的类型化缓冲区中 (numpy.ndarray 或 array 上的 memoryview).
+    Bin* 运算符对数组逐元素计算, 与标量运算时广播; 切片返回共享缓冲区的视图, 不复制数据
+    """
+
+    __slots__ = ("data",)
+    data: Any
+
+    def __new__(cls, data: Any) -> KArray:
+        self = object.__new__(cls)
+        set_data(self, data)
+        return self
+
+    @classmethod
+    def of(cls, values: Iterable[int | float]) -> KArray:
+        values = list(values)
+        typecode = FLOAT if any(isinstance(v, float) for v in values) else INT
+        return cls.build(typecode, values)
+
+    @classmethod
+    def build(cls, typecode: str, values: Iterable[Any]) -> KArray:
+        try:
+            if numpy is not None:
+                return cls(numpy.fromiter(values, numpy.dtype(typecode)))
+            return cls(memoryview(array(typecode, values)))
+        except OverflowError as e:
+            raise KError("Array element does not fit in 64 bits.") from e
+
+    @classmethod
+    def range(cls, n: int) -> KArray:
+        if numpy is not None:
+            return cls(numpy.arange(n, dtype=numpy.int64))
+        return cls(memoryview(array(INT, range(n))))
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise KError("KArray is immutable.")
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __repr__(self) -> str:
+        return f"KArray({self.data.tolist()!r})"
+
+    @property
+    def typecode(self) -> str:
+        if numpy is not None:
+            return FLOAT if self.data.dtype.kind == "f" else INT
+        return self.data.format
+
+    def box(self, v: Any) -> KInt | KFloat:
+        return KFloat(float(v)) if self.typecode == FLOAT else KInt(int(v))
+
+    def at(self, index: int) -> KInt | KFloat:
+        if not -len(self) <= index < len(self):
+            raise KError(f"Array index {index} out of range for length {len(self)}.")
+        return self.box(self.data[index])
+
+    def slice(self, begin: int, end: int) -> KArray:
+        """与 str 切片相同的下标语义"""
+        return KArray(self.data[begin:end])
+
+    def sum(self) -> KInt | KFloat:
+        if numpy is not None:
+            return self.box(self.data.sum())
+        return self.box(sum(self.data))
+
+    def min(self) -> KInt | KFloat:
+        if len(self) == 0:
+            raise KError("min() of an empty array.")
+        return self.box(self.data.min() if numpy is not None else min(self.data))
+
+    def max(self) -> KInt | KFloat:
+        if len(self) == 0:
+            raise KError("max() of an empty array.")
+        return self.box(self.data.max() if numpy is not None else max(self.data))
+
+    def any(self) -> KInt:
+        return kbool(bool(self.data.any()) if numpy is not None else any(self.data))
+
+    def all(self) -> KInt:
+        return kbool(bool(self.data.all()) if numpy is not None else all(self.data))
+
+
+set_data = KArray.data.__set__  # type:ignore
+
+
+def trunc_div(a: int, b: int) -> int:
+    """与 KInt 的 / 相同, 向零取整"""
+    q = abs(a) // abs(b)
+    return q if (a < 0) == (b < 0) else -q
+
+
+def trunc_mod(a: int, b: int) -> int:
+    """与 KInt 的 % 相同, 余数的符号与被除数相同"""
+    r = abs(a) % abs(b)
+    return -r if a < 0 else r
+
+
+# 没有 NumPy 时逐元素计算所用的函数; map 在 C 中循环, 不经过解释器的分派
+ELEMENT_OPERATORS: dict[str, Callable[[Any, Any], Any]] = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "==": lambda a, b: int(a == b),
+    "!=": lambda a, b: int(a != b),
+    "<": lambda a, b: int(a < b),
+    ">": lambda a, b: int(a > b),
+}
+
+
+def operands(op: str, left: KObjectRef, right: KObjectRef) -> tuple[Any, Any, str]:
+    """取出两侧的缓冲区或标量, 以及运算结果的元素类型"""
+    is_float = False
+    values = []
+    for v in (left, right):
+        if isinstance(v, KArray):
+            values.append(v.data)
+            is_float = is_float or v.typecode == FLOAT
+        else:
+            values.append(v.v)  # type:ignore
+            is_float = is_float or isinstance(v, KFloat)
+    if isinstance(left, KArray) and isinstance(right, KArray) and len(left) != len(right):
+        raise KError(f"Array lengths differ for {op}: {len(left)} and {len(right)}.")
+    if op in COMPARISON:
+        return values[0], values[1], INT
+    return values[0], values[1], FLOAT if is_float else INT
+
+
+def has_zero(v: Any) -> bool:
+    if isinstance(v, int | float):
+        return v == 0
+    if numpy is not None:
+        return bool((v == 0).any())
+    return 0 in v
+
+
+def numpy_operate(op: str, a: Any, b: Any, typecode: str) -> Any:
+    if op == "/" and typecode == INT:
+        quotient = numpy.abs(a) // numpy.abs(b)
+        return numpy.where((a < 0) == (b < 0), quotient, -quotient)
+    if op in COMPARISON:
+        return NUMPY_COMPARISON[op](a, b).astype(numpy.int64)
+    return NUMPY_ARITHMETIC[op](a, b).astype(numpy.dtype(typecode), copy=False)
+
+
+def elementwise(op: str) -> BinaryOperator:
+    def operate(left: KObjectRef, right: KObjectRef) -> Any:
+        a, b, typecode = operands(op, left, right)
+        if op in ("/", "%") and has_zero(b):
+            raise KError("Division by zero.")
+        if numpy is not None:
+            return KArray(numpy_operate(op, a, b, typecode))
+        if op == "/":
+            fn = trunc_div if typecode == INT else operator.truediv
+        elif op == "%":
+            fn = trunc_mod if typecode == INT else math.fmod
+        else:
+            fn = ELEMENT_OPERATORS[op]
+        left_values = itertools.repeat(a) if isinstance(a, int | float) else a
+        right_values = itertools.repeat(b) if isinstance(b, int | float) else b
+        return KArray.build(typecode, map(fn, left_values, right_values))
+
+    return operate
+
+
+for _op in ARITHMETIC + COMPARISON:
+    _fn = elementwise(_op)
+    for _left, _right in (
+        (KArray, KArray),
+        (KArray, KInt),
+        (KArray, KFloat),
+        (KInt, KArray),
+        (KFloat, KArray),
+    ):
+        register_operator(_op, _left, _right, _fn)
+register_str(KArray, lambda a: "[" + ", ".join(str(v) for v in a.data.tolist()) + "]")
+
+
+def array_truth(_: KArray) -> bool:
+    """
+    比较运算逐元素进行, 结果仍是数组; 把它当作条件时无法确定意图, 与 NumPy 一样报错.
+    判断是否为空用 len(), 按元素判断用 any() 或 all()
+    """
+    raise KError("The truth value of an array is ambiguous, use any() or all().")
+
+
+register_truthy(KArray, array_truth)
@@ -0,0 +1,187 @@
+from __future__ import annotations
+from array import array
+import hashlib
+import importlib
+import marshal
+import mmap
+import os
+import tempfile
+from typing import Any, Iterable, Optional
+from interpreter import BINARY_NODES, OPCODES, CodeObject, Interpreter, compile_program
+from optimizer import Optimizer
+from parsers import parse
+from runtime import KError, KFloat, KInt, KObjectRef, KString
+
+# 编译缓存, 仿照 __pycache__: 脚本 dir/name.k 的字节码存放在 dir/__kcache__/name.kc.
+# 文件头: MAGIC, 格式版本, marshal 版本, 编译器版本, 源码与编译配置的摘要; 之后是 marshal 数据.
+CACHE_DIR = "__kcache__"
+CACHE_SUFFIX = ".kc"
+MAGIC = b"K\x00kc"
+FORMAT_VERSION = 3
+VERSION_SIZE = 8
+DIGEST_SIZE = 16
+HEADER_SIZE = len(MAGIC) + 2 + VERSION_SIZE + DIGEST_SIZE
+# 决定字节码内容的模块: 语法树, 优化, 名字解析与编译; 任何一个改变都使缓存失效
+COMPILER_MODULES = (
+    "tokens",
+    "lexer",
+    "parsers",
+    "asts",
+    "optimizer",
+    "resolver",
+    "interpreter",
+    "kcache",
+)
+
+# 常量的类型标记; marshal 只认识内置类型
+CONST_INT, CONST_FLOAT, CONST_STRING, CONST_CODE = range(4)
+
+
+def cache_path(path: str) -> str:
+    directory, filename = os.path.split(os.path.abspath(path))
+    stem = os.path.splitext(filename)[0]
+    return os.path.join(directory, CACHE_DIR, stem + CACHE_SUFFIX)
+
+
+def compiler_version() -> bytes:
+    """
+    编译器的版本: COMPILER_MODULES 的文件内容, 指令集与 BINARY 指令参数所指的运算的摘要.
+    不依赖手工维护的版本号, 修改编译器后旧的缓存自动失效
+    """
+    h = hashlib.blake2b(digest_size=VERSION_SIZE)
+    for name in COMPILER_MODULES:
+        with open(importlib.import_module(name).__file__ or "", "rb") as f:
+            h.update(f.read())
+    h.update(b"\0".join(op.encode() for op in OPCODES))
+    h.update(b"\0".join(node.__name__.encode() for node in BINARY_NODES))
+    return h.digest()
+
+
+COMPILER_VERSION = compiler_version()
+
+
+def source_digest(src: bytes, passes: Iterable[str]) -> bytes:
+    """缓存键: 源码与优化遍任一改变都会使缓存失效"""
+    h = hashlib.blake2b(digest_size=DIGEST_SIZE)
+    h.update(src)
+    h.update(b"\0".join(p.encode() for p in sorted(passes)))
+    return h.digest()
+
+
+def header(digest: bytes) -> bytes:
+    return MAGIC + bytes((FORMAT_VERSION, marshal.version)) + COMPILER_VERSION + digest
+
+
+def dump_const(v: Any) -> Any:
+    match v:
+        case None:
+            return None
+        case KInt():
+            return (CONST_INT, v.v)
+        case KFloat():
+            return (CONST_FLOAT, v.v)
+        case KString():
+            return (CONST_STRING, v.value)
+        case CodeObject():
+            return (CONST_CODE, dump_code(v))
+    raise KError(f"Can not cache constant {v!r}.")
+
+
+def load_const(v: Any) -> Any:
+    if v is None:
+        return None
+    tag, value = v
+    if tag == CONST_INT:
+        return KInt(value)
+    if tag == CONST_FLOAT:
+        return KFloat(value)
+    if tag == CONST_STRING:
+        return KString(value)
+    if tag == CONST_CODE:
+        return load_code(value)
+    raise ValueError(f"Bad constant tag {tag}.")
+
+
+def pack_code(code: list[int]) -> tuple[str, bytes]:
+    """指令流按最大参数选用最窄的数组类型"""
+    top = max(code, default=0)
+    typecode = "B" if top < 1 << 8 else "H" if top < 1 << 16 else "l"
+    return typecode, array(typecode, code).tobytes()
+
+
+def dump_code(co: CodeObject) -> tuple:
+    consts = tuple(dump_const(v) for v in co.consts)
+    code = pack_code(co.code)
+    return (co.name, co.params, code, consts, tuple(co.names), co.locals, tuple(co.refs), co.span)
+
+
+def load_code(data: tuple) -> CodeObject:
+    name, params, code, consts, names, locals_, refs, span = data
+    co = CodeObject(name, params, locals_)
+    co.span = tuple(span)
+    typecode, packed = code
+    co.code = array(typecode, packed).tolist()
+    co.consts = [load_const(v) for v in consts]
+    co.names = list(names)
+    co.refs = [tuple(ref) for ref in refs]
+    return co
+
+
+def read_cache(path: str, digest: bytes) -> Optional[CodeObject]:
+    """读取并校验缓存; 文件不存在, 过期或损坏时返回 None"""
+    try:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if mm[:HEADER_SIZE] != header(digest):
+                return None
+            with memoryview(mm) as view:
+                return load_code(marshal.loads(view[HEADER_SIZE:]))
+    except (OSError, EOFError, ValueError, TypeError):
+        # 空文件无法 mmap; 截断或损坏的数据当作缓存缺失
+        return None
+
+
+def write_cache(path: str, digest: bytes, co: CodeObject) -> None:
+    """
+    先写入同目录下的临时文件再 os.replace, 并发运行的进程只会看到完整的旧文件或新文件.
+    目录不可写时静默放弃, 与 __pycache__ 相同
+    """
+    data = header(digest) + marshal.dumps(dump_code(co))
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    except OSError:
+        return
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except OSError:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+
+
+def load_or_compile(path: str, optimizer: Optimizer) -> CodeObject:
+    """编译 K 脚本, 优先使用 __kcache__ 中与源码匹配的缓存"""
+    with open(path, "rb") as f:
+        src = f.read()
+    digest = source_digest(src, optimizer.passes)
+    kc = cache_path(path)
+    if (co := read_cache(kc, digest)) is not None:
+        return co
+    co = compile_program(optimizer.optimize(parse(src.decode("utf-8"))))
+    write_cache(kc, digest, co)
+    return co
+
+
+def run_file(path: str, interpreter: Optional[Interpreter] = None) -> KObjectRef:
+    """
+    执行 K 脚本文件. 字节码虚拟机使用 __kcache__ 缓存;
+    tree 与 jit 引擎执行 AST, 不经过缓存
+    """
+    interpreter = interpreter or Interpreter()
+    if interpreter.engine == "vm":
+        return interpreter.execute(load_or_compile(path, interpreter.optimizer))
+    with open(path, encoding="utf-8") as f:
+        return interpreter.run(f.read())
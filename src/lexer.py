@@ -1,4 +1,10 @@
+from __future__ import annotations
+import bisect
+import os
 import re
+import sys
+from array import array
+from typing import Callable, Iterator, Optional, TextIO
 from tokens import (
     EOFTok,
     FloatTok,
@@ -7,17 +13,48 @@ from tokens import (
     OperatorTok,
     StringTok,
     Token,
+    TokenStream,
+    TokKind,
 )
-from utils import error, unreachable
+from utils import error
 
+WHITESPACE = r"\s+"
 INTEGER = r"[0-9]+"
-FLOAT = INTEGER + "." + INTEGER
-STRING = r'"((\")?|\d|\D)*"'
-COMMENT = r"(//(\W|\w)*$)|(/\*(\W|\w|\*/|\*/)*\*/)"
-OPERATOR = r"\(|\)|;|\+|-|\*|/|%|=|==|!=|<|>|{|}|[|]"
-IDENTIFIER = r"([a-z_A-Z][a-z_0-9A-Z]*)"
+FLOAT = INTEGER + r"\." + INTEGER
+STRING = r'"(?:\\.|[^"\\])*"'
+LINE_COMMENT = r"//[^\n]*+"
+COMMENT_BEGIN, COMMENT_END = "/*", "*/"
+OPERATOR = r"==|!=|[(),;+\-*/%=<>{}\[\]]"
+IDENTIFIER = r"[a-z_A-Z][a-z_0-9A-Z]*"
 
-RE_EXPRS = (FLOAT, INTEGER, STRING, COMMENT, OPERATOR, IDENTIFIER)
+TOKEN_SPECS = (
+    (TokKind.FLOAT, FLOAT),
+    (TokKind.INT, INTEGER),
+    (TokKind.STRING, STRING),
+    (TokKind.OPERATOR, OPERATOR),
+    (TokKind.IDENTIFIER, IDENTIFIER),
+)
+SKIP = f"(?:{WHITESPACE}|{LINE_COMMENT})*+"
+TOKEN_PATTERN = re.compile(
+    SKIP + "(?:" + "|".join(f"(?P<{kind.name.lower()}>{expr})" for kind, expr in TOKEN_SPECS) + ")",
+    re.DOTALL,
+)
+SKIP_PATTERN = re.compile(SKIP)
+# 正则分组编号 -> token 种类
+GROUP_KINDS = [TokKind.EOF] + [kind for kind, _ in TOKEN_SPECS]
+COMMENT_PATTERN = re.compile(f"{re.escape(COMMENT_BEGIN)}|{re.escape(COMMENT_END)}")
+
+CHUNK_SIZE = 1 << 20
+# 流式读取时, 距缓冲区末尾不足 LOOKAHEAD 个字符的匹配可能被下一块延长 (如 "12." 与 "5")
+LOOKAHEAD = 2
+
+TOKEN_BUILDERS: dict[str, Callable[[str], Token]] = {
+    "float": lambda s: FloatTok(float(s)),
+    "int": lambda s: IntTok(int(s)),
+    "string": StringTok,
+    "operator": OperatorTok,
+    "identifier": IdentifierTok,
+}
 
 
 class Lexer:
@@ -25,58 +62,344 @@ class Lexer:
         self.src = src
         self.current_index = 0
         self.max_index = len(self.src)
+        self.offset = 0
+        self.reader: Optional[TextIO] = None
+        self.chunk_size = CHUNK_SIZE
+
+    @classmethod
+    def from_path(cls, path: str | os.PathLike, chunk_size: int = CHUNK_SIZE) -> Lexer:
+        lexer = cls("")
+        lexer.reader = open(path, encoding="utf-8")  # pylint: disable=consider-using-with
+        lexer.chunk_size = chunk_size
+        return lexer
+
+    def close(self) -> None:
+        if self.reader is not None:
+            self.reader.close()
+            self.reader = None
+
+    def refill(self, keep_from: int) -> int:
+        """丢弃 keep_from 之前的文本并读入下一块, 返回下标的偏移量"""
+        assert self.reader is not None
+        chunk = self.reader.read(self.chunk_size)
+        if not chunk:
+            self.close()
+            return 0
+        self.src = self.src[keep_from:] + chunk
+        self.offset += keep_from
+        self.current_index -= keep_from
+        self.max_index = len(self.src)
+        return keep_from
+
+    def discardable(self, index: int) -> int:
+        """
+        index 之后的空白与行注释在读入下一块前丢弃, 返回它们的结束位置;
+        到达缓冲区末尾的行注释可能还没有结束, 从它所在的行首保留
+        """
+        end = SKIP_PATTERN.match(self.src, index).end()  # type:ignore
+        if end == self.max_index:
+            end = max(index, self.src.rfind("\n", index, end) + 1)
+        return end
 
     def advance(self, v: int = 1) -> None:
         self.current_index += v
         self.skip()
 
     def skip(self) -> None:
-        while (
-            self.current_index < self.max_index
-            and self.src[self.current_index].isspace()
-        ):
-            self.advance()
+        while True:
+            self.current_index = SKIP_PATTERN.match(self.src, self.current_index).end()  # type:ignore
+            if not self.src.startswith(COMMENT_BEGIN, self.current_index):
+                return
+            self.current_index = self.skip_block_comment(self.current_index)
+
+    def skip_block_comment(self, begin: int) -> int:
+        depth, index = 0, begin
+        while True:
+            while m := COMMENT_PATTERN.search(self.src, index):
+                depth += 1 if m.group() == COMMENT_BEGIN else -1
+                index = m.end()
+                if depth == 0:
+                    return index
+            if self.reader is None:
+                error("Unterminated comment.")
+            index -= self.refill(max(index, self.max_index - 1))
 
     def next_token(self) -> Token:
+        while True:
+            m = TOKEN_PATTERN.match(self.src, self.current_index)
+            if self.reader is not None and (
+                m is None or self.max_index - m.end() < LOOKAHEAD
+            ):
+                self.refill(self.discardable(self.current_index))
+                continue
+            if m is None:
+                break
+            kind = m.lastgroup
+            begin = m.start(kind)  # type:ignore
+            if kind == "operator" and self.src.startswith(COMMENT_BEGIN, begin):
+                self.current_index = self.skip_block_comment(begin)
+                continue
+            self.current_index = m.end()
+            return TOKEN_BUILDERS[kind](m.group(kind))  # type:ignore
+
+        self.skip()
         if self.current_index >= self.max_index:
             return EOFTok()
+        error("Invalid Syntax.")
 
-        results = []
-        for i in RE_EXPRS:
-            results.append(re.match(i, self.src[self.current_index :], re.MULTILINE))
-
-        if any(results):
-            if v := results[0]:
-                begin, end = v.span()
-                self.advance(end)
-                return FloatTok(float(v.string[begin:end]))
-            elif v := results[1]:
-                begin, end = v.span()
-                self.advance(end)
-                return IntTok(int(v.string[begin:end]))
-            elif v := results[2]:
-                begin, end = v.span()
-                self.advance(end)
-                return StringTok(v.string[begin:end])
-            elif v := results[3]:
-                begin, end = v.span()
-                self.advance(end)
-                return self.next_token()
-            elif v := results[4]:
-                begin, end = v.span()
-                self.advance(end)
-                return OperatorTok(v.string[begin:end])
-            elif v := results[5]:
-                begin, end = v.span()
-                self.advance(end)
-                return IdentifierTok(v.string[begin:end])
-            else:
-                unreachable()
-        else:
-            error("Invalid Syntax.")
+    def iter_tokens(self) -> Iterator[Token]:
+        try:
+            while not (tok := self.next_token()).is_eof():
+                yield tok
+        finally:
+            self.close()
 
     def all(self) -> list[Token]:
-        v: list[Token] = []
-        while not isinstance((tok := self.next_token()), EOFTok):
-            v.append(tok)
-        return v
+        return list(self.iter_tokens())
+
+    def stream(self) -> TokenStream:
+        if self.reader is not None:
+            error("Lexer.stream() needs the whole source in memory.")
+        stream = TokenStream(self.src)
+        add_kind, add_start, add_end = (
+            stream.kinds.append,
+            stream.starts.append,
+            stream.ends.append,
+        )
+        src, match, index = self.src, TOKEN_PATTERN.match, self.current_index
+        operator = TokKind.OPERATOR
+        while m := match(src, index):
+            group = m.lastindex
+            kind = GROUP_KINDS[group]  # type:ignore
+            begin = m.start(group)  # type:ignore
+            if kind == operator and src.startswith(COMMENT_BEGIN, begin):
+                index = self.skip_block_comment(begin)
+                continue
+            index = m.end()
+            add_kind(kind)
+            add_start(begin)
+            add_end(index)
+
+        self.current_index = index
+        self.skip()
+        if self.current_index < self.max_index:
+            error("Invalid Syntax.")
+        return stream
+
+
+def shifted(offsets: array, delta: int) -> array:
+    """
+    每个偏移量加上 delta. 把整个数组当作一个大整数, 与每个元素位置上都是 delta 的整数相加;
+    结果不会溢出或低于零, 所以各元素之间没有进位, 比逐个元素相加快数倍
+    """
+    if delta == 0 or not offsets:
+        return offsets
+    size = offsets.itemsize
+    unit = int.from_bytes((1).to_bytes(size, sys.byteorder) * len(offsets), sys.byteorder)
+    total = int.from_bytes(memoryview(offsets).cast("B"), sys.byteorder) + unit * delta
+    result = array(offsets.typecode)
+    result.frombytes(total.to_bytes(size * len(offsets), sys.byteorder))
+    return result
+
+
+# TokenDocument 每块的 token 数; 编辑时至少重新扫描所在的一块
+BLOCK_TOKENS = 256
+
+
+class TokenBlock:
+    """
+    一段连续的源码与其中的 token, 偏移量相对于块的起点. 块到下一块的起点为止,
+    块的起点总是处于两个 token 之间 (不在字符串或注释之内), 可以从那里独立扫描
+    """
+
+    __slots__ = ("text", "kinds", "starts", "ends")
+
+    def __init__(self, text: str, kinds: array, starts: array, ends: array) -> None:
+        self.text, self.kinds, self.starts, self.ends = text, kinds, starts, ends
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def has_start(self, offset: int) -> bool:
+        starts = self.starts
+        i = bisect.bisect_left(starts, offset)
+        return i < len(starts) and starts[i] == offset
+
+    def tail(self, index: int) -> TokenBlock:
+        """第 index 个 token 起的后半块"""
+        base = self.starts[index]
+        return TokenBlock(
+            self.text[base:],
+            self.kinds[index:],
+            shifted(self.starts[index:], -base),
+            shifted(self.ends[index:], -base),
+        )
+
+
+class TokenDocument:
+    """
+    供编辑器与 REPL 使用的可编辑 token 序列, 按 BLOCK_TOKENS 分块保存源码与 token.
+    edit() 从编辑位置所在块的起点重新扫描, 直到新 token 的起点与某个旧 token 平移后的起点重合;
+    之后的块原样保留, 只平移块的起点. 每次编辑的代价与编辑及重新扫描的范围成正比,
+    另外每块的起点各加一次 delta (块数为 token 数 / BLOCK_TOKENS).
+    解析器需要连续的数组, 由 stream() 拼接, 代价与文件大小成正比
+    """
+
+    __slots__ = ("blocks", "bases")
+
+    def __init__(self, src: str) -> None:
+        stream = Lexer(src).stream()
+        self.blocks: list[TokenBlock] = []
+        self.bases: list[int] = []
+        self.extend(0, src, stream.kinds, stream.starts, stream.ends)
+
+    def __len__(self) -> int:
+        return sum(len(block) for block in self.blocks)
+
+    @property
+    def size(self) -> int:
+        return self.bases[-1] + len(self.blocks[-1].text)
+
+    @property
+    def src(self) -> str:
+        return "".join(block.text for block in self.blocks)
+
+    def extend(self, base: int, text: str, kinds: array, starts: array, ends: array) -> None:
+        """把 text (起点为 base) 中的 token 按 BLOCK_TOKENS 分块追加到末尾"""
+        count = len(kinds)
+        for first in range(0, max(count, 1), BLOCK_TOKENS):
+            last = min(first + BLOCK_TOKENS, count)
+            begin = starts[first] if first else 0
+            end = starts[last] if last < count else len(text)
+            self.blocks.append(
+                TokenBlock(
+                    text[begin:end],
+                    kinds[first:last],
+                    shifted(starts[first:last], -begin),
+                    shifted(ends[first:last], -begin),
+                )
+            )
+            self.bases.append(base + begin)
+
+    def stream(self) -> TokenStream:
+        """拼接为连续的 TokenStream"""
+        stream = TokenStream(self.src)
+        for block, base in zip(self.blocks, self.bases):
+            stream.kinds.extend(block.kinds)
+            stream.starts.extend(shifted(block.starts, base))
+            stream.ends.extend(shifted(block.ends, base))
+        return stream
+
+    def grow(self, first: int, last: int, text: str) -> tuple[int, str]:
+        """
+        把后面的块并入扫描文本. 字符串或注释没有闭合时可能要扫描到文件末尾,
+        每次并入的块数与已扫描的块数相同, 总代价仍与扫描的长度成正比
+        """
+        end = min(last + 1 + (last - first + 1), len(self.blocks))
+        return end - 1, text + "".join(block.text for block in self.blocks[last + 1 : end])
+
+    def old_start(self, offset: int) -> Optional[tuple[int, int]]:
+        """编辑前的 offset 若是某个 token 的起点, 返回 (块号, 块内的 token 下标)"""
+        k = bisect.bisect_right(self.bases, offset) - 1
+        block, rel = self.blocks[k], offset - self.bases[k]
+        if not block.has_start(rel):
+            return None
+        return k, bisect.bisect_left(block.starts, rel)
+
+    # pylint: disable-next=too-many-locals
+    def edit(self, offset: int, deleted: int, inserted: str) -> None:
+        """把源码中 [offset, offset + deleted) 替换为 inserted"""
+        if not (0 <= offset and 0 <= deleted and offset + deleted <= self.size):
+            error(f"Edit ({offset}, {deleted}) is out of range.")
+        blocks, bases = self.blocks, self.bases
+        # 末尾恰好在 offset 的 token 可能被插入的文本延长, 从前一块开始扫描
+        first = bisect.bisect_right(bases, offset) - 1
+        if first and bases[first] == offset:
+            first -= 1
+        last = max(first, bisect.bisect_right(bases, offset + deleted) - 1)
+        base = bases[first]
+        old = "".join(block.text for block in blocks[first : last + 1])
+        rel = offset - base
+        text = old[:rel] + inserted + old[rel + deleted :]
+        delta = len(inserted) - deleted
+        scanned, resume = self.rescan(first, last, text, rel + len(inserted), delta)
+
+        tail: list[TokenBlock] = []
+        tail_bases: list[int] = []
+        if resume is not None:
+            k, t = resume
+            head, start = blocks[k], blocks[k].starts[t]
+            tail = [head.tail(t) if start else head, *blocks[k + 1 :]]
+            tail_bases = [bases[k] + start + delta, *(b + delta for b in bases[k + 1 :])]
+        del blocks[first:], bases[first:]
+        self.extend(base, scanned.src, scanned.kinds, scanned.starts, scanned.ends)
+        self.append(tail, tail_bases)
+
+    # pylint: disable-next=too-many-arguments,too-many-locals
+    def rescan(
+        self, first: int, last: int, text: str, edit_end: int, delta: int
+    ) -> tuple[TokenStream, Optional[tuple[int, int]]]:
+        """
+        从第 first 块的起点扫描编辑后的 text (其中已并入到第 last 块为止的文本).
+        编辑区之后, 新 token 的起点与旧 token 平移后的起点重合时, 其后的文本与扫描状态都相同,
+        余下的 token 直接沿用. 字符串或注释被打开或闭合时继续并入后面的块, 直到重新对齐或到达文件末尾.
+        返回重新扫描出的 token (src 为到对齐点为止的文本) 与沿用的第一个旧 token
+        """
+        base = self.bases[first]
+        kinds, starts, ends = array("B"), array("I"), array("I")
+        match, operator = TOKEN_PATTERN.match, TokKind.OPERATOR
+        index = 0
+        while True:
+            m = match(text, index)
+            more = last + 1 < len(self.blocks)
+            if m is not None:
+                group = m.lastindex
+                begin = m.start(group)  # type:ignore
+                if begin >= edit_end and (resume := self.old_start(base + begin - delta)):
+                    return TokenStream(text[:begin], kinds, starts, ends), resume
+            if more and (m is None or len(text) - m.end() < LOOKAHEAD):
+                last, text = self.grow(first, last, text)
+                continue
+            if m is None:
+                break
+            kind = GROUP_KINDS[group]  # type:ignore
+            if kind == operator and text.startswith(COMMENT_BEGIN, begin):
+                if (end := comment_end(text, begin)) < 0:
+                    if not more:
+                        error("Unterminated comment.")
+                    last, text = self.grow(first, last, text)
+                    continue
+                index = end
+                continue
+            index = m.end()
+            kinds.append(kind)
+            starts.append(begin)
+            ends.append(index)
+        if SKIP_PATTERN.match(text, index).end() < len(text):  # type:ignore
+            error("Invalid Syntax.")
+        return TokenStream(text, kinds, starts, ends), None
+
+    def append(self, tail: list[TokenBlock], tail_bases: list[int]) -> None:
+        """接上沿用的块; 重新扫描的最后一块与沿用的第一块合并, 避免编辑后留下很小的块"""
+        if tail and len(self.blocks[-1]) + len(tail[0]) <= 2 * BLOCK_TOKENS:
+            merged, head = self.blocks.pop(), tail[0]
+            width = len(merged.text)
+            tail[0] = TokenBlock(
+                merged.text + head.text,
+                merged.kinds + head.kinds,
+                merged.starts + shifted(head.starts, width),
+                merged.ends + shifted(head.ends, width),
+            )
+            tail_bases[0] = self.bases.pop()
+        self.blocks.extend(tail)
+        self.bases.extend(tail_bases)
+
+def comment_end(src: str, begin: int) -> int:
+    """begin 处的块注释 (可以嵌套) 结束后的位置; 在 src 中没有结束时返回 -1"""
+    depth, index = 0, begin
+    while m := COMMENT_PATTERN.search(src, index):
+        depth += 1 if m.group() == COMMENT_BEGIN else -1
+        index = m.end()
+        if depth == 0:
+            return index
+    return -1
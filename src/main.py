@@ -1,20 +1,81 @@
+import argparse
+import json
+import sys
+from batch import collect_scripts, run_batch
+from interpreter import ENGINES, Interpreter
+from kcache import run_file
 from lexer import Lexer
+from profiler import Profiler
+from runtime import KError
 
 
-lexer = Lexer(
-    """\
-let a = 32.2;
-fn helloworld() {
-    print("nothing.");
-    return 0;
-}
-helloworld();
-//helloworld
-/*
-hello world
-/**/
-*/
-"""
-)
-for t in lexer.all():
-    print(t, end="\t")
+def command_run(args: argparse.Namespace) -> int:
+    """K 的运行时错误 (KError) 与语法错误 (utils.error 抛出的 RuntimeError) 只打印消息, 以状态 1 退出"""
+    try:
+        run_script(args)
+    except (KError, RuntimeError) as e:
+        print(e, file=sys.stderr)
+        return 1
+    return 0
+
+
+def run_script(args: argparse.Namespace) -> None:
+    if args.tokens:
+        for t in Lexer.from_path(args.script).iter_tokens():
+            print(t, end="\t")
+        print()
+        return
+
+    interpreter = Interpreter(args.engine)
+    if args.profile is None:
+        run_file(args.script, interpreter)
+        return
+    with open(args.script, encoding="utf-8") as f:
+        src = f.read()
+    profiler = Profiler(src, args.profile_interval / 1000, args.profile_mode)
+    try:
+        profiler.profile(lambda: run_file(args.script, interpreter))
+    finally:
+        profiler.write_collapsed(args.profile)
+        print(profiler.report(), file=sys.stderr)
+
+
+def command_batch(args: argparse.Namespace) -> int:
+    """每个脚本的结果以一行 JSON 写到标准输出; 有脚本失败时以状态 1 退出"""
+    paths = collect_scripts(args.target)
+    failed = 0
+    for result in run_batch(paths, args.jobs, args.engine, chunksize=args.chunksize):
+        failed += not result["ok"]
+        print(json.dumps(result, ensure_ascii=False), flush=True)
+    print(f"{len(paths)} scripts, {failed} failed", file=sys.stderr)
+    return 1 if failed else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="k", description="执行 K 脚本")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="执行一个脚本")
+    run.add_argument("script")
+    run.add_argument("--engine", choices=ENGINES, default="vm")
+    run.add_argument("--tokens", action="store_true", help="只打印脚本的 token")
+    run.add_argument(
+        "--profile", metavar="PATH", help="采样分析, 折叠栈写入 PATH, 函数统计打印到 stderr"
+    )
+    run.add_argument("--profile-interval", type=float, default=5.0, metavar="MS")
+    run.add_argument("--profile-mode", choices=("thread", "signal"), default="thread")
+    run.set_defaults(handler=command_run)
+
+    batch = commands.add_parser("batch", help="在多个进程中执行一批脚本, 结果输出为 JSON 行")
+    batch.add_argument("target", help="脚本目录, 或每行一个脚本路径的清单文件")
+    batch.add_argument("--jobs", "-j", type=int, help="工作进程数, 默认为 CPU 核数")
+    batch.add_argument("--engine", choices=ENGINES, default="vm")
+    batch.add_argument("--chunksize", type=int, help="每次分发给工作进程的脚本数")
+    batch.set_defaults(handler=command_batch)
+
+    args = parser.parse_args()
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
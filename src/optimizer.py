@@ -0,0 +1,207 @@
+from __future__ import annotations
+from typing import Callable, Iterable, Iterator, Optional
+from asts import (
+    ASTNode,
+    BinAdd,
+    BinDiv,
+    BinMod,
+    BinMul,
+    BinOp,
+    BinSub,
+    BlockStatement,
+    FloatLiteral,
+    FunctionCallExpr,
+    FuntionDeclStatement,
+    IfStatement,
+    IntLiteral,
+    ReturnStatement,
+    StringLiteral,
+    VarAssignExpr,
+    VarDeclAssignExpr,
+)
+from runtime import Environment, KError, KFloat, KInt, KObjectRef, truthy
+from tokens import FloatTok, IntTok
+
+type Rewrite = Callable[[ASTNode], Optional[ASTNode]]
+
+CONSTANT_NODES = (IntLiteral, FloatLiteral, StringLiteral)
+
+
+def children(node: ASTNode) -> Iterator[ASTNode]:
+    match node:
+        case BlockStatement():
+            yield from node.body
+        case IfStatement():
+            yield node.cond
+            yield node.body
+        case ReturnStatement():
+            yield node.expr
+        case FuntionDeclStatement():
+            yield node.params
+            yield node.body
+        case VarDeclAssignExpr() | VarAssignExpr():
+            yield node.v
+        case BinOp():
+            yield node.a
+            yield node.b
+        case FunctionCallExpr():
+            yield node.params
+            yield from node.params.params
+
+
+def count_nodes(node: ASTNode) -> int:
+    count, pending = 0, [node]
+    while pending:
+        count += 1
+        pending.extend(children(pending.pop()))
+    return count
+
+
+def transform(node: ASTNode, rewrite: Rewrite) -> Optional[ASTNode]:
+    """自底向上改写; rewrite 返回 None 表示删除该语句"""
+    match node:
+        case BlockStatement():
+            body = (transform(stmt, rewrite) for stmt in node.body)
+            node.body = [stmt for stmt in body if stmt is not None]
+        case IfStatement():
+            node.cond = expression(node.cond, rewrite)
+            node.body = transform(node.body, rewrite) or BlockStatement([])
+        case ReturnStatement():
+            node.expr = expression(node.expr, rewrite)
+        case FuntionDeclStatement():
+            node.body = transform(node.body, rewrite) or BlockStatement([])
+        case VarDeclAssignExpr() | VarAssignExpr():
+            node.v = expression(node.v, rewrite)
+        case BinOp():
+            node.a = expression(node.a, rewrite)
+            node.b = expression(node.b, rewrite)
+        case FunctionCallExpr():
+            node.params.params = tuple(expression(arg, rewrite) for arg in node.params.params)
+    return rewrite(node)
+
+
+def expression(node: ASTNode, rewrite: Rewrite) -> ASTNode:
+    result = transform(node, rewrite)
+    assert result is not None, "expressions can not be removed"
+    return result
+
+
+def constant(v: KObjectRef, span: tuple[int, int]) -> Optional[ASTNode]:
+    node: ASTNode
+    if isinstance(v, KInt):
+        node = IntLiteral(IntTok(v.v))
+    elif isinstance(v, KFloat):
+        node = FloatLiteral(FloatTok(v.v))
+    else:
+        return None
+    node.span = span
+    return node
+
+
+def is_int(node: ASTNode, value: int) -> bool:
+    return isinstance(node, IntLiteral) and node.tok.get_value() == value
+
+
+def fold_constants(node: ASTNode) -> Optional[ASTNode]:
+    """两侧都是字面量的二元运算在编译期求值; 运行时会出错的运算保持原样"""
+    if not isinstance(node, BinOp):
+        return node
+    if isinstance(node.a, CONSTANT_NODES) and isinstance(node.b, CONSTANT_NODES):
+        env = Environment()
+        try:
+            v = node.operate(node.a.eval(env), node.b.eval(env))
+        except (KError, ArithmeticError):
+            return node
+        return constant(v, node.span) or node
+    return node
+
+
+def eliminate_dead_branches(node: ASTNode) -> Optional[ASTNode]:
+    """条件为字面量的 if: 恒真时替换为其语句, 恒假时删除"""
+    if isinstance(node, IfStatement) and isinstance(node.cond, CONSTANT_NODES):
+        return node.body if truthy(node.cond.eval(Environment())) else None
+    return node
+
+
+def remove_unreachable(node: ASTNode) -> Optional[ASTNode]:
+    """删除同一语句块中 return 之后的语句"""
+    if isinstance(node, BlockStatement):
+        for index, stmt in enumerate(node.body):
+            if isinstance(stmt, ReturnStatement):
+                del node.body[index + 1 :]
+                break
+    return node
+
+
+def numeric_type(node: ASTNode) -> Optional[type]:
+    """只由数值字面量与算术运算组成的子树的结果类型; 其他子树的类型在运行时才知道"""
+    match node:
+        case IntLiteral():
+            return KInt
+        case FloatLiteral():
+            return KFloat
+        case BinAdd() | BinSub() | BinMul() | BinDiv() | BinMod():
+            a, b = numeric_type(node.a), numeric_type(node.b)
+            if a is None or b is None:
+                return None
+            return KInt if a is b is KInt else KFloat
+    return None
+
+
+def simplify_algebra(node: ASTNode) -> Optional[ASTNode]:
+    """
+    化简 x * 1, 1 * x, x - 0, 以及整数的 x + 0, 0 + x.
+    只在 x 的类型可以静态确定为数值时化简, 不会掩盖运行时的类型错误;
+    浮点数 -0.0 + 0 为 0.0, 因此加 0 只对整数化简
+    """
+    match node:
+        case BinMul() if is_int(node.b, 1) and numeric_type(node.a):
+            return node.a
+        case BinMul() if is_int(node.a, 1) and numeric_type(node.b):
+            return node.b
+        case BinAdd() if is_int(node.a, 0) and numeric_type(node.b) is KInt:
+            return node.b
+        case BinAdd() if is_int(node.b, 0) and numeric_type(node.a) is KInt:
+            return node.a
+        case BinSub() if is_int(node.b, 0) and numeric_type(node.a):
+            return node.a
+    return node
+
+
+# 按顺序执行; 折叠出的常量条件再交给死分支消除
+PASSES: dict[str, Rewrite] = {
+    "fold": fold_constants,
+    "simplify": simplify_algebra,
+    "dead-branch": eliminate_dead_branches,
+    "unreachable": remove_unreachable,
+}
+DEFAULT_PASSES = tuple(PASSES)
+
+
+class Optimizer:
+    """
+    依次运行选中的优化遍, report 记录每一遍删除的节点数
+    """
+
+    def __init__(self, passes: Iterable[str] = DEFAULT_PASSES) -> None:
+        self.passes = tuple(passes)
+        for name in self.passes:
+            if name not in PASSES:
+                raise KError(f"Unknown optimization pass {name}, expected one of {tuple(PASSES)}")
+        self.report: dict[str, int] = {}
+
+    def optimize[T: ASTNode](self, tree: T) -> T:
+        before = count_nodes(tree)
+        for name, rewrite in PASSES.items():
+            if name not in self.passes:
+                continue
+            result = transform(tree, rewrite)
+            assert result is tree, "the root node can not be replaced"
+            after = count_nodes(tree)
+            self.report[name] = self.report.get(name, 0) + before - after
+            before = after
+        return tree
+
+
+def optimize[T: ASTNode](tree: T, passes: Iterable[str] = DEFAULT_PASSES) -> T:
+    return Optimizer(passes).optimize(tree)
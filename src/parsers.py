@@ -0,0 +1,240 @@
+from __future__ import annotations
+from typing import NoReturn
+from asts import (
+    ASTNode,
+    BinAdd,
+    BinDiv,
+    BinEq,
+    BinMod,
+    BinMt,
+    BinMul,
+    BinNotEq,
+    BinOp,
+    BinSt,
+    BinSub,
+    BlockStatement,
+    FloatLiteral,
+    FunctionCallExpr,
+    FuntionDeclStatement,
+    IfStatement,
+    IntLiteral,
+    NameLiteral,
+    ParamLiteral,
+    ReturnStatement,
+    StringLiteral,
+    VarAssignExpr,
+    VarDeclAssignExpr,
+    VarDeclExpr,
+)
+from lexer import Lexer
+from tokens import FloatTok, IdentifierTok, IntTok, StringTok, TokenStream, TokKind
+from utils import error, gc_paused
+
+KEYWORDS = frozenset(("let", "fn", "return", "if"))
+
+# 结合力, 对应 misc/introduction.md 中的优先级; ( ) 作为分组与调用在 primary 中处理
+ASSIGN_POWER = 10
+BINARY_OPERATORS: dict[str, tuple[int, type[BinOp]]] = {
+    "==": (20, BinEq),
+    "!=": (20, BinNotEq),
+    "<": (20, BinSt),
+    ">": (20, BinMt),
+    "+": (40, BinAdd),
+    "-": (40, BinSub),
+    "*": (50, BinMul),
+    "/": (50, BinDiv),
+    "%": (50, BinMod),
+}
+
+
+class Parser:
+    """
+    Pratt 解析器: 只向前看一个 token, 不回溯
+    """
+
+    def __init__(self, stream: TokenStream) -> None:
+        self.stream = stream
+        self.src = stream.src
+        self.kinds, self.starts, self.ends = stream.kinds, stream.starts, stream.ends
+        self.count = len(stream)
+        self.index = -1
+        self.node_count = 0
+        # 同名的标识符共享一个字符串; 只在本次解析内共享, 不用 sys.intern 使其常驻内存
+        self.names: dict[str, str] = {}
+        self.cur_kind: int = TokKind.EOF
+        self.cur_text = ""
+        self.advance()
+
+    def advance(self) -> None:
+        self.index += 1
+        if (index := self.index) < self.count:
+            self.cur_kind = self.kinds[index]
+            self.cur_text = self.src[self.starts[index] : self.ends[index]]
+        else:
+            self.cur_kind, self.cur_text = TokKind.EOF, ""
+
+    def begin(self) -> int:
+        return self.starts[self.index] if self.index < self.count else len(self.src)
+
+    def fail(self, expected: str) -> NoReturn:
+        line, col = self.stream.line_col(self.begin())
+        found = repr(self.cur_text) if self.cur_text else "end of file"
+        error(f"Invalid Syntax at {line}:{col}: expected {expected}, found {found}.")
+
+    def at_operator(self, op: str) -> bool:
+        return self.cur_kind == TokKind.OPERATOR and self.cur_text == op
+
+    def expect_operator(self, op: str) -> None:
+        if not self.at_operator(op):
+            self.fail(repr(op))
+        self.advance()
+
+    def expect_name(self) -> str:
+        if self.cur_kind != TokKind.IDENTIFIER or (name := self.cur_text) in KEYWORDS:
+            self.fail("a name")
+        self.advance()
+        return self.names.setdefault(name, name)
+
+    def node[T: ASTNode](self, node: T, begin: int) -> T:
+        node.span = (begin, self.ends[self.index - 1])
+        self.node_count += 1
+        return node
+
+    def program(self) -> BlockStatement:
+        body: list[ASTNode] = []
+        with gc_paused():
+            try:
+                while self.index < self.count:
+                    body.append(self.statement())
+            except RecursionError:
+                # 每层括号与语句块都递归一次; 超出 Python 的递归上限时报告语法错误.
+                # 在 except 之外抛出, 不把很长的 RecursionError 回溯附在错误上
+                too_deep = True
+            else:
+                too_deep = False
+        if too_deep:
+            line, col = self.stream.line_col(self.begin())
+            error(f"Invalid Syntax at {line}:{col}: expressions or blocks nested too deeply.")
+        return self.node(BlockStatement(body), 0) if body else BlockStatement(body)
+
+    def statement(self) -> ASTNode:
+        kind, begin = self.cur_kind, self.begin()
+        if kind == TokKind.IDENTIFIER:
+            match self.cur_text:
+                case "let":
+                    return self.let_statement(begin)
+                case "fn":
+                    return self.function(begin)
+                case "return":
+                    self.advance()
+                    expr = self.expression()
+                    self.expect_operator(";")
+                    return self.node(ReturnStatement(expr), begin)
+                case "if":
+                    self.advance()
+                    self.expect_operator("(")
+                    cond = self.expression()
+                    self.expect_operator(")")
+                    return self.node(IfStatement(cond, self.statement()), begin)
+        elif kind == TokKind.OPERATOR and self.cur_text == "{":
+            return self.block()
+        expr = self.expression()
+        self.expect_operator(";")
+        return expr
+
+    def let_statement(self, begin: int) -> ASTNode:
+        self.advance()
+        name = self.expect_name()
+        if self.at_operator(";"):
+            self.advance()
+            return self.node(VarDeclExpr(name), begin)
+        self.expect_operator("=")
+        value = self.expression()
+        self.expect_operator(";")
+        return self.node(VarDeclAssignExpr(name, value), begin)
+
+    def function(self, begin: int) -> ASTNode:
+        self.advance()
+        name = self.expect_name()
+        params_begin = self.begin()
+        self.expect_operator("(")
+        params: list[str] = []
+        while not self.at_operator(")"):
+            if params:
+                self.expect_operator(",")
+            params.append(self.expect_name())
+        self.advance()
+        param_literal = self.node(ParamLiteral(tuple(params)), params_begin)
+        return self.node(FuntionDeclStatement(name, param_literal, self.block()), begin)
+
+    def block(self) -> BlockStatement:
+        begin = self.begin()
+        self.expect_operator("{")
+        body: list[ASTNode] = []
+        while not self.at_operator("}"):
+            if self.index >= self.count:
+                self.fail("'}'")
+            body.append(self.statement())
+        self.advance()
+        return self.node(BlockStatement(body), begin)
+
+    def expression(self, min_power: int = 0) -> ASTNode:
+        begin = self.begin()
+        left = self.primary()
+        while self.cur_kind == TokKind.OPERATOR:
+            op = self.cur_text
+            if op == "=" and min_power < ASSIGN_POWER:
+                if not isinstance(left, NameLiteral):
+                    self.fail("a name before '='")
+                self.advance()
+                value = self.expression(ASSIGN_POWER - 1)
+                left = self.node(VarAssignExpr(left.tok.get_value(), value), begin)
+                continue
+            if (entry := BINARY_OPERATORS.get(op)) is None or entry[0] <= min_power:
+                break
+            power, node_type = entry
+            self.advance()
+            right = self.expression(power)
+            left = self.node(node_type(left, right), begin)
+        return left
+
+    def primary(self) -> ASTNode:
+        kind, begin, text = self.cur_kind, self.begin(), self.cur_text
+        match kind:
+            case TokKind.INT:
+                self.advance()
+                return self.node(IntLiteral(IntTok(int(text))), begin)
+            case TokKind.FLOAT:
+                self.advance()
+                return self.node(FloatLiteral(FloatTok(float(text))), begin)
+            case TokKind.STRING:
+                self.advance()
+                return self.node(StringLiteral(StringTok(text)), begin)
+            case TokKind.IDENTIFIER if text not in KEYWORDS:
+                text = self.names.setdefault(text, text)
+                self.advance()
+                if self.at_operator("("):
+                    return self.call(text, begin)
+                return self.node(NameLiteral(IdentifierTok(text)), begin)
+            case TokKind.OPERATOR if text == "(":
+                self.advance()
+                expr = self.expression()
+                self.expect_operator(")")
+                return expr
+        self.fail("an expression")
+
+    def call(self, name: str, begin: int) -> ASTNode:
+        args_begin = self.begin()
+        self.advance()
+        args: list[ASTNode] = []
+        while not self.at_operator(")"):
+            if args:
+                self.expect_operator(",")
+            args.append(self.expression())
+        self.advance()
+        params = self.node(ParamLiteral(tuple(args)), args_begin)
+        return self.node(FunctionCallExpr(name, params), begin)
+
+
+def parse(src: str) -> BlockStatement:
+    return Parser(Lexer(src).stream()).program()
@@ -0,0 +1,157 @@
+from __future__ import annotations
+from collections import Counter, defaultdict
+import signal
+import sys
+import threading
+import time
+from types import CodeType, FrameType
+from typing import Any, Callable, Iterable, Optional
+from asts import FuntionDeclStatement
+from interpreter import VM, CodeObject
+import jit
+from tokens import TokenStream
+
+# 识别解释器中与 K 函数对应的 Python 帧:
+# 树遍历 (以及 jit 的解释层) 每次 K 调用对应一个 apply 帧, 当前函数在局部变量 decl 中;
+# jit 编译出的函数在其全局命名空间中带有声明; 字节码虚拟机在一个 execute 帧中维护整个 K 调用栈
+APPLY_CODE = FuntionDeclStatement.apply.__code__
+EXECUTE_CODE = VM.execute.__code__
+MODULE = "<module>"
+
+type KFunctionInfo = FuntionDeclStatement | CodeObject
+
+
+class Profiler:  # pylint: disable=too-many-instance-attributes
+    """
+    K 层面的采样分析器. 每隔 interval 秒取一次正在执行 K 代码的线程的 Python 栈,
+    还原出 K 函数调用栈并计数; 被分析的程序不做任何插桩, 调用次数来自函数自身的计数器.
+    mode 为 "thread" (后台线程采样, 任何线程都可用) 或 "signal" (ITIMER_PROF, 只能在主线程使用)
+    """
+
+    def __init__(self, src: str = "", interval: float = 0.005, mode: str = "thread") -> None:
+        if mode not in ("thread", "signal"):
+            raise ValueError(f"Unknown sampling mode {mode}, expected thread or signal.")
+        self.interval, self.mode = interval, mode
+        self.lines = TokenStream(src)
+        self.stacks: Counter[tuple[KFunctionInfo | str, ...]] = Counter()
+        self.sample_time: defaultdict[tuple[KFunctionInfo | str, ...], float] = defaultdict(float)
+        self.target = threading.get_ident()
+        self.running = False
+        self.last = 0.0
+        # 采样本身花费的时间, 用来估计分析器的开销
+        self.overhead = 0.0
+        self.thread: Optional[threading.Thread] = None
+
+    def label(self, fn: KFunctionInfo | str) -> str:
+        if isinstance(fn, str):
+            return fn
+        if fn.span[1] == 0:
+            return fn.name
+        line, _ = self.lines.line_col(fn.span[0])
+        return f"{fn.name}:{line}"
+
+    @staticmethod
+    def k_stack(frame: Optional[FrameType]) -> tuple[KFunctionInfo | str, ...]:
+        """从最内层 Python 帧向外还原 K 调用栈, 返回由外到内的函数序列"""
+        stack: list[KFunctionInfo | str] = []
+        while frame is not None:
+            code: CodeType = frame.f_code
+            if code is APPLY_CODE:
+                # 尾调用在同一个 apply 帧中切换 decl
+                local = frame.f_locals
+                stack.append(local.get("decl") or local["self"])
+            elif code is EXECUTE_CODE:
+                local = frame.f_locals
+                codes = [co for co, _, _ in local["frames"][local["base_depth"] :]]
+                codes.append(local["co"])
+                # 模块的 CodeObject 由末尾的 MODULE 代表
+                stack.extend(co for co in reversed(codes) if co.name != MODULE)
+            elif code.co_filename.startswith(jit.SOURCE_PREFIX):
+                stack.append(frame.f_globals[jit.DECL_NAME])
+            frame = frame.f_back
+        stack.append(MODULE)
+        stack.reverse()
+        return tuple(stack)
+
+    def sample(self, frame: Optional[FrameType]) -> None:
+        now = time.perf_counter()
+        stack = self.k_stack(frame)
+        self.stacks[stack] += 1
+        # 按两次采样的实际间隔计时, 采样线程被推迟时不会低估
+        self.sample_time[stack] += now - self.last
+        self.last = time.perf_counter()
+        self.overhead += self.last - now
+
+    def sampler(self) -> None:
+        current_frames = sys._current_frames  # pylint: disable=protected-access
+        while self.running:
+            time.sleep(self.interval)
+            if (frame := current_frames().get(self.target)) is not None:
+                self.sample(frame)
+
+    def on_signal(self, _signum: int, frame: Optional[FrameType]) -> None:
+        self.sample(frame)
+
+    def start(self) -> None:
+        self.target = threading.get_ident()
+        self.running = True
+        self.last = time.perf_counter()
+        if self.mode == "signal":
+            signal.signal(signal.SIGPROF, self.on_signal)
+            signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        else:
+            self.thread = threading.Thread(target=self.sampler, name="k-profiler", daemon=True)
+            self.thread.start()
+
+    def stop(self) -> None:
+        self.running = False
+        if self.mode == "signal":
+            signal.setitimer(signal.ITIMER_PROF, 0, 0)
+            signal.signal(signal.SIGPROF, signal.SIG_DFL)
+        elif self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def profile(self, fn: Callable[[], Any]) -> Any:
+        self.start()
+        try:
+            return fn()
+        finally:
+            self.stop()
+
+    def collapsed(self) -> Iterable[str]:
+        """flamegraph.pl / speedscope 可读的折叠栈: 每行为 "外;...;内 样本数" """
+        for stack, count in sorted(self.stacks.items(), key=lambda item: item[1], reverse=True):
+            yield f"{';'.join(self.label(fn) for fn in stack)} {count}"
+
+    def write_collapsed(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            for line in self.collapsed():
+                f.write(line + "\n")
+
+    def functions(self) -> list[tuple[str, int, float, float]]:
+        """
+        每个函数的 (名字, 调用次数, 自身时间, 总时间), 按自身时间降序.
+        调用次数是函数声明以来的累计值; jit 编译后的函数内部的递归调用不计入
+        """
+        own: defaultdict[KFunctionInfo | str, float] = defaultdict(float)
+        total: defaultdict[KFunctionInfo | str, float] = defaultdict(float)
+        for stack, elapsed in self.sample_time.items():
+            own[stack[-1]] += elapsed
+            for fn in set(stack):
+                total[fn] += elapsed
+        rows: list[tuple[str, int, float, float]] = []
+        for fn, elapsed in total.items():
+            rows.append((self.label(fn), 0 if isinstance(fn, str) else fn.calls, own[fn], elapsed))
+        rows.sort(key=lambda row: row[2], reverse=True)
+        return rows
+
+    def report(self) -> str:
+        rows = [f"{'function':24s} {'calls':>10s} {'self ms':>10s} {'total ms':>10s}"]
+        for name, calls, own, total in self.functions():
+            rows.append(f"{name:24s} {calls:10d} {own * 1e3:10.1f} {total * 1e3:10.1f}")
+        rows.append(
+            f"{sum(self.stacks.values())} samples, interval {self.interval * 1e3:g} ms, "
+            f"sampling took {self.overhead * 1e3:.1f} ms"
+        )
+        return "\n".join(rows)
@@ -0,0 +1,102 @@
+from __future__ import annotations
+from typing import Optional
+from asts import (
+    ASTNode,
+    BinOp,
+    BlockStatement,
+    FunctionCallExpr,
+    FuntionDeclStatement,
+    IfStatement,
+    NameLiteral,
+    ReturnStatement,
+    VarAssignExpr,
+    VarDeclAssignExpr,
+    VarDeclExpr,
+)
+from runtime import SLOT_GLOBAL
+
+
+def collect_locals(decl: FuntionDeclStatement) -> tuple[str, ...]:
+    """函数帧中的名字: 参数在前, 之后是函数体内赋值或声明的名字 (不进入嵌套函数)"""
+    names: dict[str, None] = dict.fromkeys(decl.params.params)
+    pending: list[ASTNode] = [decl.body]
+    while pending:
+        match node := pending.pop():
+            case BlockStatement():
+                pending.extend(reversed(node.body))
+            case IfStatement():
+                pending.append(node.body)
+                pending.append(node.cond)
+            case ReturnStatement():
+                pending.append(node.expr)
+            case FuntionDeclStatement() | VarDeclExpr():
+                names.setdefault(node.name)
+            case VarDeclAssignExpr() | VarAssignExpr():
+                names.setdefault(node.name)
+                pending.append(node.v)
+            case BinOp():
+                pending.append(node.b)
+                pending.append(node.a)
+            case FunctionCallExpr():
+                pending.extend(reversed(node.params.params))
+    return tuple(names)
+
+
+class Resolver:
+    """
+    静态作用域解析: 把函数内的名字解析为 (depth, slot), depth 为向外跨过的函数帧数.
+    模块作用域仍用字典, 其中的名字标记为 SLOT_GLOBAL. 同时标记函数体内的尾调用.
+    """
+
+    def __init__(self) -> None:
+        self.scopes: list[dict[str, int]] = []
+
+    def lookup(self, name: str) -> tuple[int, int]:
+        for depth, scope in enumerate(reversed(self.scopes)):
+            if (slot := scope.get(name)) is not None:
+                return depth, slot
+        return 0, SLOT_GLOBAL
+
+    def local(self, name: str) -> int:
+        # 函数内的赋值总是写入当前帧
+        return self.scopes[-1][name] if self.scopes else SLOT_GLOBAL
+
+    def function(self, decl: FuntionDeclStatement) -> None:
+        decl.slot = self.local(decl.name)
+        decl.locals = collect_locals(decl)
+        self.scopes.append({name: slot for slot, name in enumerate(decl.locals)})
+        self.resolve(decl.body)
+        self.scopes.pop()
+
+    def resolve(self, node: Optional[ASTNode]) -> None:
+        match node:
+            case BlockStatement():
+                for stmt in node.body:
+                    self.resolve(stmt)
+            case IfStatement():
+                self.resolve(node.cond)
+                self.resolve(node.body)
+            case ReturnStatement():
+                self.resolve(node.expr)
+                node.tail = bool(self.scopes) and isinstance(node.expr, FunctionCallExpr)
+            case FuntionDeclStatement():
+                self.function(node)
+            case VarDeclExpr():
+                node.slot = self.local(node.name)
+            case VarDeclAssignExpr() | VarAssignExpr():
+                self.resolve(node.v)
+                node.slot = self.local(node.name)
+            case BinOp():
+                self.resolve(node.a)
+                self.resolve(node.b)
+            case NameLiteral():
+                node.depth, node.slot = self.lookup(node.name)
+            case FunctionCallExpr():
+                node.depth, node.slot = self.lookup(node.name)
+                for arg in node.params.params:
+                    self.resolve(arg)
+
+
+def resolve[T: ASTNode](tree: T) -> T:
+    Resolver().resolve(tree)
+    return tree
@@ -1,5 +1,9 @@
 from __future__ import annotations
-from typing import Any, Callable, Mapping, Optional
+import contextlib
+import math
+import sys
+import threading
+from typing import Any, Callable, Iterator, Mapping, NoReturn, Optional
 
 
 class KError(Exception):
@@ -7,31 +11,149 @@ class KError(Exception):
         super().__init__(*args)
 
 
-class KFunctionReturn(BaseException):
-    def __init__(self, value) -> None:
-        self.value: KObjectRef = value
+# K 函数的默认最大嵌套调用深度
+DEFAULT_STACK_LIMIT = 10_000
+# 树遍历解释器中一层 K 调用大约占用的 Python 栈帧数, 用于换算 Python 的递归上限
+PY_FRAMES_PER_CALL = 16
+
+
+class CallStack:
+    """
+    K 函数的调用深度. 超过 limit 时报告 KError, 而不是依赖 Python 的 RecursionError;
+    尾调用不增加深度. 每个线程一个, 通过 call_stack() 取得
+    """
+
+    __slots__ = ("depth", "limit")
+
+    def __init__(self, limit: int = DEFAULT_STACK_LIMIT) -> None:
+        self.depth = 0
+        self.limit = limit
+
+    def overflow(self) -> NoReturn:
+        raise KError(f"Stack overflow: more than {self.limit} nested calls.")
+
+
+class ThreadCallStack(threading.local):
+    def __init__(self) -> None:
+        super().__init__()
+        self.stack = CallStack()
+
+
+THREAD_CALL_STACK = ThreadCallStack()
+
+
+def call_stack() -> CallStack:
+    """当前线程的调用深度"""
+    return THREAD_CALL_STACK.stack
+
+
+class RecursionLimit:
+    """
+    树遍历解释器执行期间临时提高 Python 的递归上限, 最后一个执行结束后恢复原值.
+    Python 之间的调用不占用 C 栈, 提高上限只多用堆内存; 执行期间只提高不降低,
+    多个线程同时执行时也不会互相影响
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.active = 0
+        self.saved = 0
+
+    @contextlib.contextmanager
+    def raised(self, limit: int) -> Iterator[None]:
+        needed = limit * PY_FRAMES_PER_CALL + 1000
+        with self.lock:
+            if not self.active:
+                self.saved = sys.getrecursionlimit()
+            self.active += 1
+            if sys.getrecursionlimit() < needed:
+                sys.setrecursionlimit(needed)
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.active -= 1
+                if not self.active:
+                    sys.setrecursionlimit(self.saved)
+
+
+RECURSION_LIMIT = RecursionLimit()
+
+
+# 未赋值的槽位
+UNSET: Any = object()
+# 名字解析的结果: 非负数为槽位下标, 以下两个值表示全局名字与未经解析的名字
+SLOT_GLOBAL = -1
+SLOT_UNRESOLVED = -2
 
 
 class Environment:
+    """
+    作用域. 模块作用域用字典保存变量; 函数调用帧 (names 不为 None) 用定长列表保存,
+    名字解析后按 (depth, slot) 以下标读写.
+    """
+
+    __slots__ = ("parent", "env", "names", "slots", "globals")
+
     def __init__(
         self,
         dict_: Optional[Mapping[str, KObjectRef]] = None,
         parent: Optional[Environment] = None,
+        names: Optional[tuple[str, ...]] = None,
     ) -> None:
         self.parent = parent
         self.env: Mapping[str, KObjectRef] = dict_ if dict_ is not None else {}
+        self.names = names
+        self.slots: list[Any] = [UNSET] * len(names) if names is not None else []
+        self.globals: Environment = (
+            parent.globals if names is not None and parent is not None else self
+        )
+
+    @classmethod
+    def frame(
+        cls, parent: Environment, names: tuple[str, ...], args: list[KObjectRef]
+    ) -> Environment:
+        env = cls(None, parent, names)
+        env.slots[: len(args)] = args
+        return env
+
+    def find(self, name: str) -> Any:
+        env: Optional[Environment] = self
+        while env is not None:
+            if env.names is not None and name in env.names:
+                v = env.slots[env.names.index(name)]
+                if v is not UNSET:
+                    return v
+            if name in env.env:
+                return env.env[name]
+            env = env.parent
+        return UNSET
+
+    def lookup(self, name: str) -> KObjectRef:
+        if (v := self.find(name)) is UNSET:
+            raise KError(f"No such name: {name}")
+        return v
+
+    def load(self, depth: int, slot: int, name: str) -> KObjectRef:
+        if slot >= 0:
+            env = self
+            for _ in range(depth):
+                env = env.parent  # type:ignore
+            if (v := env.slots[slot]) is not UNSET:
+                return v
+            return self.lookup(name)
+        if slot == SLOT_GLOBAL:
+            return self.globals.lookup(name)
+        return self.lookup(name)
 
     def get(self, name: str) -> Optional[KObjectRef]:
-        if name in self.env.keys():
-            return self.env[name]
-        if self.parent:
-            outer_env_v = self.parent.get(name)
-            if outer_env_v:
-                return outer_env_v
-        return None
+        return None if (v := self.find(name)) is UNSET else v
 
     def set(self, name: str, v: KObjectRef) -> None:
-        self.env[name] = v  # type:ignore
+        if self.names is not None and name in self.names:
+            self.slots[self.names.index(name)] = v
+        else:
+            self.env[name] = v  # type:ignore
 
 
 class KType:
@@ -86,106 +208,336 @@ class KCallable(KObject):
     def ctor(cls, fn: KCallable) -> KCallable:
         return KCallable(fn.fn)
 
-    def __call__(self, args: list[KObject]) -> None:
-        self.fn(args)
+    def __call__(self, args: list[KObjectRef]) -> KObjectRef:
+        return self.fn(args)
+
+
+class KAsyncCallable(KCallable):
+    """
+    以协程函数实现的内置函数. 字节码虚拟机在 Interpreter.run_async 中调用它时挂起,
+    等待协程完成后继续; 同步执行时调用它是错误
+    """
+
+    def __init__(self, fn_impl: Callable, name: Optional[str] = None) -> None:
+        super().__init__(fn_impl)
+        self.name = name or fn_impl.__name__
+
+    def __call__(self, args: list[KObjectRef]) -> KObjectRef:
+        raise KError(f"{self.name}() is asynchronous and can only be called under run_async.")
+
+
+# 预先分配的小整数范围
+SMALL_INT_MIN, SMALL_INT_MAX = -5, 1024
 
 
 class KInt:
-    def __init__(self, value: int) -> None:
-        self.v = value
-
-    def add(self, obj: Any) -> KInt:
-        if isinstance(obj, KInt):
-            return KInt(self.v + obj.v)
-        elif isinstance(obj, KFloat):
-            return KInt(int(self.v + obj.v))
-        elif isinstance(obj, KObject):
-            raise NotImplementedError()
-        else:
-            raise KError(f"KInt does not support to add with {obj}")
-
-    def sub(self, obj: Any) -> KInt:
-        if isinstance(obj, KInt):
-            return KInt(self.v - obj.v)
-        elif isinstance(obj, KFloat):
-            return KInt(int(self.v - obj.v))
-        elif isinstance(obj, KObject):
-            raise NotImplementedError()
-        else:
-            raise KError(f"KInt does not support to add with {obj}")
-
-    def mul(self, obj: Any) -> KInt:
-        if isinstance(obj, KInt):
-            return KInt(self.v * obj.v)
-        elif isinstance(obj, KFloat):
-            return KInt(int(self.v * obj.v))
-        elif isinstance(obj, KObject):
-            raise NotImplementedError()
-        else:
-            raise KError(f"KInt does not support to add with {obj}")
-
-    def div(self, obj: Any) -> KInt:
-        if isinstance(obj, KInt):
-            return KInt(int(self.v / obj.v))
-        elif isinstance(obj, KFloat):
-            return KInt(int(self.v / obj.v))
-        elif isinstance(obj, KObject):
-            raise NotImplementedError()
-        else:
-            raise KError(f"KInt does not support to add with {obj}")
+    """
+    不可变整数. SMALL_INT_MIN..SMALL_INT_MAX 之间的值共享预先分配的实例,
+    因此不能用 is 以外的方式假设两个 KInt 是不同的对象.
+    """
+
+    __slots__ = ("v",)
+    v: int
+
+    def __new__(cls, value: int) -> KInt:
+        if SMALL_INT_MIN <= value <= SMALL_INT_MAX:
+            return SMALL_INTS[value - SMALL_INT_MIN]
+        self = object.__new__(cls)
+        set_int(self, value)
+        return self
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise KError("KInt is immutable.")
+
+    def __repr__(self) -> str:
+        return f"KInt({self.v!r})"
 
 
 class KFloat:
-    def __init__(self, value: float) -> None:
-        self.v = value
-
-    def add(self, obj: Any) -> KFloat:
-        if isinstance(obj, KFloat):
-            return KFloat(self.v + obj.v)
-        elif isinstance(obj, KFloat):
-            return KFloat(self.v + obj.v)
-        elif isinstance(obj, KObject):
-            raise NotImplementedError()
-        else:
-            raise KError(f"KFloat does not support to add with {obj}")
-
-    def sub(self, obj: Any) -> KFloat:
-        if isinstance(obj, KFloat):
-            return KFloat(self.v - obj.v)
-        elif isinstance(obj, KFloat):
-            return KFloat(self.v - obj.v)
-        elif isinstance(obj, KObject):
-            raise NotImplementedError()
-        else:
-            raise KError(f"KFloat does not support to sub with {obj}")
-
-    def mul(self, obj: Any) -> KFloat:
-        if isinstance(obj, KFloat):
-            return KFloat(self.v * obj.v)
-        elif isinstance(obj, KFloat):
-            return KFloat(self.v * obj.v)
-        elif isinstance(obj, KObject):
-            raise NotImplementedError()
-        else:
-            raise KError(f"KFloat does not support to mul with {obj}")
-
-    def div(self, obj: Any) -> KFloat:
-        if isinstance(obj, KFloat):
-            return KFloat(int(self.v / obj.v))
-        elif isinstance(obj, KFloat):
-            return KFloat(int(self.v / obj.v))
-        elif isinstance(obj, KObject):
-            raise NotImplementedError()
-        else:
-            raise KError(f"KFloat does not support to div with {obj}")
+    """不可变浮点数"""
+
+    __slots__ = ("v",)
+    v: float
+
+    def __new__(cls, value: float) -> KFloat:
+        self = object.__new__(cls)
+        set_float(self, value)
+        return self
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise KError("KFloat is immutable.")
+
+    def __repr__(self) -> str:
+        return f"KFloat({self.v!r})"
+
+
+# 拼接结果不短于此长度时改用 rope 表示
+ROPE_THRESHOLD = 256
 
 
 class KString:
-    def __init__(self, v: str) -> None:
-        self.value = v
+    """
+    不可变字符串; 字面量的实例保存在语法树节点上, 每次求值返回同一个.
+    较长的拼接结果是 rope: (chunks, count, length) 表示 chunks[:count] 依次相连.
+    在末尾继续拼接时, 若 chunks 之后没有被其他字符串追加过, 直接追加到同一个列表,
+    反复拼接的总代价与最终长度成线性关系. 第一次读取 value 时才合并为 str
+    """
+
+    __slots__ = ("flat", "rope")
+    flat: Optional[str]
+    rope: Optional[tuple[list[str], int, int]]
+
+    def __new__(cls, v: str) -> KString:
+        self = object.__new__(cls)
+        set_flat(self, v)
+        set_rope(self, None)
+        return self
+
+    @classmethod
+    def from_chunks(cls, chunks: list[str], count: int, length: int) -> KString:
+        self = object.__new__(cls)
+        set_flat(self, None)
+        set_rope(self, (chunks, count, length))
+        return self
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise KError("KString is immutable.")
+
+    def __repr__(self) -> str:
+        return f"KString({self.value!r})"
+
+    def __len__(self) -> int:
+        if self.flat is not None:
+            return len(self.flat)
+        return self.rope[2]  # type:ignore
+
+    @property
+    def value(self) -> str:
+        if (flat := self.flat) is None:
+            chunks, count, _ = self.rope  # type:ignore
+            flat = "".join(chunks if count == len(chunks) else chunks[:count])
+            set_flat(self, flat)
+            set_rope(self, None)
+        return flat
 
     def extend(self, s: KString) -> KString:
-        return KString(self.value + s.value)
+        length = len(self) + len(s)
+        if length < ROPE_THRESHOLD:
+            return KString(self.value + s.value)
+        if (rope := self.rope) is None:
+            chunks, count = [self.value], 1
+        else:
+            chunks, count, _ = rope
+            if count != len(chunks):
+                # 共享的列表已被另一次拼接延长, 复制自己的部分
+                chunks = chunks[:count]
+        chunks.append(s.value)
+        return KString.from_chunks(chunks, count + 1, length)
+
+    def slice(self, begin: int, end: int) -> KString:
+        """与 str 切片相同的下标语义; rope 只合并落在区间内的块"""
+        begin, end, _ = slice(begin, end).indices(len(self))
+        if self.flat is not None or begin >= end:
+            return KString(self.value[begin:end])
+        chunks, count, _ = self.rope  # type:ignore
+        parts, offset = [], 0
+        for chunk in chunks[:count]:
+            if offset >= end:
+                break
+            if offset + len(chunk) > begin:
+                parts.append(chunk[max(begin - offset, 0) : end - offset])
+            offset += len(chunk)
+        return KString("".join(parts))
+
+
+# __setattr__ 被禁用, 构造时直接调用槽描述符写入
+set_int = KInt.v.__set__  # type:ignore
+set_float = KFloat.v.__set__  # type:ignore
+set_flat = KString.flat.__set__  # type:ignore
+set_rope = KString.rope.__set__  # type:ignore
+
+
+def _small_int(value: int) -> KInt:
+    self = object.__new__(KInt)
+    set_int(self, value)
+    return self
+
+
+SMALL_INTS: list[KInt] = [_small_int(v) for v in range(SMALL_INT_MIN, SMALL_INT_MAX + 1)]
+TRUE, FALSE = KInt(1), KInt(0)
+
+
+def kbool(cond: bool) -> KInt:
+    return TRUE if cond else FALSE
 
 
 type KObjectRef = KInt | KFloat | KString | KType | KObject | KCallable | None  # type: ignore
+
+
+def truthy(v: KObjectRef) -> bool:
+    if isinstance(v, KInt | KFloat):
+        return v.v != 0
+    if isinstance(v, KString):
+        return len(v) != 0
+    if (fn := TRUTHINESS.get(type(v))) is not None:
+        return fn(v)
+    return v is not None
+
+
+# 其他模块中定义的值类型的真假判断, 未注册的类型除 none 外都为真
+TRUTHINESS: dict[type, Callable[[Any], bool]] = {}
+
+
+def register_truthy(cls: type, fn: Callable[[Any], bool]) -> None:
+    TRUTHINESS[cls] = fn
+
+
+def to_str(v: KObjectRef) -> str:
+    if isinstance(v, KInt | KFloat):
+        return str(v.v)
+    if isinstance(v, KString):
+        return v.value
+    if v is None:
+        return "none"
+    if (fn := STR_CONVERTERS.get(type(v))) is not None:
+        return fn(v)
+    return f"<{type(v).__name__}>"
+
+
+# 其他模块中定义的值类型的字符串形式
+STR_CONVERTERS: dict[type, Callable[[Any], str]] = {}
+
+
+def register_str(cls: type, fn: Callable[[Any], str]) -> None:
+    STR_CONVERTERS[cls] = fn
+
+
+def type_name(v: KObjectRef) -> str:
+    return "none" if v is None else type(v).__name__
+
+
+type BinaryOperator = Callable[[Any, Any], KObjectRef]
+
+# 二元运算表: (运算符, 左操作数类型, 右操作数类型) -> 实现. 新的类型用 register_operator 加入
+OPERATORS: dict[tuple[str, type, type], BinaryOperator] = {}
+
+
+def register_operator(op: str, left: type, right: type, fn: BinaryOperator) -> None:
+    OPERATORS[op, left, right] = fn
+
+
+def unsupported(op: str, left: KObjectRef, right: KObjectRef) -> NoReturn:
+    raise KError(f"Unsupported operand types for {op}: {type_name(left)} and {type_name(right)}.")
+
+
+def binary(op: str, left: KObjectRef, right: KObjectRef) -> KObjectRef:
+    if (fn := OPERATORS.get((op, type(left), type(right)))) is None:
+        unsupported(op, left, right)
+    return fn(left, right)
+
+
+def binary_operator(op: str) -> Callable[[KObjectRef, KObjectRef], KObjectRef]:
+    """运算符固定的 binary, 一次查表完成分派"""
+    operators = OPERATORS
+
+    def operate(left: KObjectRef, right: KObjectRef) -> KObjectRef:
+        if (fn := operators.get((op, type(left), type(right)))) is None:
+            unsupported(op, left, right)
+        return fn(left, right)
+
+    return operate
+
+
+def int_div(a: KInt, b: KInt) -> KInt:
+    """向零取整, 用整数运算避免大整数经过 float 丢失精度"""
+    if b.v == 0:
+        raise KError("Division by zero.")
+    q = abs(a.v) // abs(b.v)
+    return KInt(q if (a.v < 0) == (b.v < 0) else -q)
+
+
+def int_mod(a: KInt, b: KInt) -> KInt:
+    """与 / 一致: 余数的符号与被除数相同, 保证 a / b * b + a % b == a"""
+    if b.v == 0:
+        raise KError("Division by zero.")
+    r = abs(a.v) % abs(b.v)
+    return KInt(-r if a.v < 0 else r)
+
+
+# 另一侧的整数超出 float 的范围时, Python 抛出 OverflowError
+FLOAT_OVERFLOW = "Integer too large to convert to float."
+
+
+def float_add(a: KInt | KFloat, b: KInt | KFloat) -> KFloat:
+    try:
+        return KFloat(a.v + b.v)
+    except OverflowError as e:
+        raise KError(FLOAT_OVERFLOW) from e
+
+
+def float_sub(a: KInt | KFloat, b: KInt | KFloat) -> KFloat:
+    try:
+        return KFloat(a.v - b.v)
+    except OverflowError as e:
+        raise KError(FLOAT_OVERFLOW) from e
+
+
+def float_mul(a: KInt | KFloat, b: KInt | KFloat) -> KFloat:
+    try:
+        return KFloat(a.v * b.v)
+    except OverflowError as e:
+        raise KError(FLOAT_OVERFLOW) from e
+
+
+def float_div(a: KInt | KFloat, b: KInt | KFloat) -> KFloat:
+    try:
+        return KFloat(a.v / b.v)
+    except ZeroDivisionError as e:
+        raise KError("Division by zero.") from e
+    except OverflowError as e:
+        raise KError(FLOAT_OVERFLOW) from e
+
+
+def float_mod(a: KInt | KFloat, b: KInt | KFloat) -> KFloat:
+    """fmod 与整数的 % 一样向零取整"""
+    if b.v == 0:
+        raise KError("Division by zero.")
+    try:
+        return KFloat(math.fmod(a.v, b.v))
+    except OverflowError as e:
+        raise KError(FLOAT_OVERFLOW) from e
+
+
+INT_OPERATORS: dict[str, BinaryOperator] = {
+    "+": lambda a, b: KInt(a.v + b.v),
+    "-": lambda a, b: KInt(a.v - b.v),
+    "*": lambda a, b: KInt(a.v * b.v),
+    "/": int_div,
+    "%": int_mod,
+}
+# 任一侧为 KFloat 时结果为 KFloat
+FLOAT_OPERATORS: dict[str, BinaryOperator] = {
+    "+": float_add,
+    "-": float_sub,
+    "*": float_mul,
+    "/": float_div,
+    "%": float_mod,
+}
+COMPARISON_OPERATORS: dict[str, BinaryOperator] = {
+    "==": lambda a, b: TRUE if a.v == b.v else FALSE,
+    "!=": lambda a, b: TRUE if a.v != b.v else FALSE,
+    ">": lambda a, b: TRUE if a.v > b.v else FALSE,
+    "<": lambda a, b: TRUE if a.v < b.v else FALSE,
+}
+
+for _op, _fn in INT_OPERATORS.items():
+    register_operator(_op, KInt, KInt, _fn)
+for _left, _right in ((KInt, KFloat), (KFloat, KInt), (KFloat, KFloat)):
+    for _op, _fn in FLOAT_OPERATORS.items():
+        register_operator(_op, _left, _right, _fn)
+for _left, _right in ((KInt, KInt), (KInt, KFloat), (KFloat, KInt), (KFloat, KFloat)):
+    for _op, _fn in COMPARISON_OPERATORS.items():
+        register_operator(_op, _left, _right, _fn)
+register_operator("+", KString, KString, KString.extend)
+register_operator("==", KString, KString, lambda a, b: TRUE if a.value == b.value else FALSE)
+register_operator("!=", KString, KString, lambda a, b: TRUE if a.value != b.value else FALSE)
@@ -1,8 +1,27 @@
 from __future__ import annotations
 import abc
 import enum
-from typing import Any, MutableMapping, TypeAlias, override
-import weakref
+import functools
+import inspect
+from types import NoneType
+import typing
+from typing import Any, Callable, Iterable, MutableMapping, NoReturn, Optional, TypeAlias, override
+from karray import KArray
+from runtime import (
+    FALSE,
+    FLOAT_OVERFLOW,
+    TRUE,
+    KCallable,
+    KError,
+    KFloat,
+    KInt,
+    KObjectRef,
+    KString,
+    KType,
+    register_str,
+    type_name,
+)
+from runtime import KObject as KRuntimeObject
 
 
 class KResult[T, E]:
@@ -57,34 +76,94 @@ class KObjectUtils:
     ...
 
 
-class KMetaInfo:
-    def __init__(
-        self,
-        name: str,
-        bind_: weakref.ref[KValue],
-        attr: list[str],
-        base: list[str],
-    ) -> None:
-        self.name, self.bind, self.attr, self.base = name, bind_, attr, base
-
-    def is_subclass_of(self, base: KValue) -> bool:
-        meta_info = base.get_meta_info()
-        return meta_info in (cls.get_meta_info() for cls in self.base)
+def c3_merge(sequences: list[list[KMetaInfo]]) -> list[KMetaInfo]:
+    result: list[KMetaInfo] = []
+    sequences = [seq for seq in sequences if seq]
+    while sequences:
+        for seq in sequences:
+            head = seq[0]
+            if not any(head in other[1:] for other in sequences):
+                break
+        else:
+            raise TypeError("Cannot create a consistent method resolution order.")
+        result.append(head)
+        sequences = [rest for seq in sequences if (rest := seq[1:] if seq[0] is head else seq)]
+    return result
 
-    def is_instance_of(self, base: KValue) -> bool:
-        return self == base.get_meta_info()
 
-    def __eq__(self, __value: object) -> bool:
-        return (
-            isinstance(__value, KMetaInfo)
-            and __value.attr == self.attr
-            and __value.bind == self.bind
-            and __value.base == self.base
-            and __value.name == self.name
-        )
+class KMetaInfo:
+    """
+    类型的元信息, 每个类型在其作用域 (KTypeScope) 中只有一个实例, 同类型的对象共享;
+    比较用 is. mro 在创建时按 C3 线性化算好. 每个类型占用 ancestors 位图中的一位,
+    子类型检查只需一次移位与按位与.
+    """
+
+    __slots__ = ("name", "bases", "mro", "bit", "ancestors", "table")
+
+    def __init__(self, name: str, bases: list[KMetaInfo], table: dict[str, KMetaInfo]) -> None:
+        self.name, self.bases = name, tuple(bases)
+        linearized = c3_merge([list(b.mro) for b in bases] + [list(bases)])
+        self.mro: tuple[KMetaInfo, ...] = (self, *linearized)
+        # 所在作用域的类型表; 位的编号只在同一张表内有意义
+        self.table = table
+        self.bit = len(table)
+        self.ancestors = 0
+        for cls in self.mro:
+            self.ancestors |= 1 << cls.bit
+
+    def is_subclass_of(self, base: KMetaInfo) -> bool:
+        """base 在 self 的 MRO 中 (包括 self 本身)"""
+        return self.ancestors >> base.bit & 1 == 1 and self.table is base.table
+
+    def is_instance_of(self, base: KMetaInfo) -> bool:
+        return self is base
+
+    def __repr__(self) -> str:
+        return f"<KMetaInfo {self.name}>"
+
+
+class KTypeScope:
+    """
+    类型名的作用域: 名字在作用域内唯一, 基类只能是同一作用域中的类型.
+    ancestors 位图的宽度等于作用域中的类型数, 不超过一个机器字 (约 60 个类型) 时
+    子类型检查是常数时间, 更多时代价随字数线性增长. 因此类型按使用者分作用域,
+    例如导出的 Python 类型与运行时创建的类型互不影响; clear() 丢弃作用域中的所有类型,
+    之前创建的类型仍可使用, 但与之后创建的类型互不相关
+    """
+
+    __slots__ = ("types",)
+
+    def __init__(self) -> None:
+        self.types: dict[str, KMetaInfo] = {}
+
+    def define(self, name: str, base: list[str]) -> KMetaInfo:
+        """取得已登记的类型, 没有时按基类名创建"""
+        types = self.types
+        if (meta_info := types.get(name)) is not None:
+            if [b.name for b in meta_info.bases] != base:
+                raise TypeError(f"Type {name} is already defined with bases {meta_info.bases}.")
+            return meta_info
+        bases = []
+        for base_name in base:
+            if (base_info := types.get(base_name)) is None:
+                raise TypeError(f"Base type {base_name} of {name} is not defined.")
+            bases.append(base_info)
+        meta_info = types[name] = KMetaInfo(name, bases, types)
+        return meta_info
+
+    def clear(self) -> None:
+        self.types = {}
+
+
+# KUserDefinedObject 默认的作用域; 批量执行时每个脚本开始前清空
+USER_TYPES = KTypeScope()
+# KExportType 导出的 Python 类型, 在导入扩展模块时登记, 整个进程共用
+EXPORT_TYPES = KTypeScope()
 
 
 class KObject(abc.ABC):
+    __slots__ = ()
+
     @abc.abstractmethod
     def get_meta_info(self) -> KMetaInfo:
         ...
@@ -100,68 +179,217 @@ class KObject(abc.ABC):
         ...
 
 
+class Shape:
+    """
+    隐藏类: 属性名 -> 槽位下标. 按相同顺序加入相同属性的对象共享同一个 Shape,
+    属性值保存在对象的槽位列表中.
+    """
+
+    __slots__ = ("names", "index", "transitions")
+
+    def __init__(self, names: tuple[str, ...] = ()) -> None:
+        self.names = names
+        self.index = {name: i for i, name in enumerate(names)}
+        self.transitions: dict[str, Shape] = {}
+
+    def lookup(self, name: str) -> int:
+        return self.index.get(name, -1)
+
+    def add(self, name: str) -> Shape:
+        if (shape := self.transitions.get(name)) is None:
+            shape = self.transitions[name] = Shape(self.names + (name,))
+        return shape
+
+    def __repr__(self) -> str:
+        return f"<Shape {self.names}>"
+
+
+ROOT_SHAPE = Shape()
+
+# 运算符 -> 对象上实现该运算的属性名
+MAGIC_ATTRIBUTES: dict[KOperatorType, str] = {
+    KOperatorType.ADD: "__add__",
+    KOperatorType.SUB: "__sub__",
+    KOperatorType.MUL: "__mul__",
+    KOperatorType.DIV: "__div__",
+    KOperatorType.MOD: "__mod__",
+    KOperatorType.EQUAL: "__eq__",
+    KOperatorType.NOT_EQUAL: "__ne__",
+    KOperatorType.MORE_THAN: "__gt__",
+    KOperatorType.LESS_THAN: "__lt__",
+    KOperatorType.CALL: "__call__",
+    KOperatorType.INPLACE_ADD: "__iadd__",
+    KOperatorType.INPLACE_SUB: "__isub__",
+    KOperatorType.INPLACE_MUL: "__imul__",
+    KOperatorType.INPLACE_DIV: "__idiv__",
+    KOperatorType.INPLACE_MOD: "__imod__",
+}
+# 失败的结果不携带信息, 共用一个实例
+UNSUPPORTED: KResult = KResult.Err()
+MISSING: Any = object()
+
+
 class KUserDefinedObject(KObject):
-    def __init__(self, name: str, attr: dict[str, KValue], base: list[str]) -> None:
-        self.meta_info = KMetaInfo(name, weakref.ref(self), list(attr.keys()), base)
-        self.name, self.attr, self.base = name, attr, base
+    __slots__ = ("meta_info", "name", "base", "shape", "slots")
+
+    def __init__(
+        self,
+        name: str,
+        attr: dict[str, KValue],
+        base: list[str],
+        scope: Optional[KTypeScope] = None,
+    ) -> None:
+        self.meta_info = (scope or USER_TYPES).define(name, base)
+        self.name, self.base = name, base
+        shape = ROOT_SHAPE
+        for key in attr:
+            shape = shape.add(key)
+        self.shape = shape
+        self.slots: list[KValue] = list(attr.values())
+
+    @property
+    def attr(self) -> dict[str, KValue]:
+        return dict(zip(self.shape.names, self.slots))
+
+    def get_attr(self, name: str) -> Any:
+        """属性值, 不存在时返回 MISSING"""
+        index = self.shape.lookup(name)
+        return self.slots[index] if index >= 0 else MISSING
+
+    def set_attr(self, name: str, value: KValue) -> None:
+        if (index := self.shape.lookup(name)) >= 0:
+            self.slots[index] = value
+        else:
+            self.shape = self.shape.add(name)
+            self.slots.append(value)
 
     @override
     def get_meta_info(self) -> KMetaInfo:
         return self.meta_info
 
+    @override
+    def support(self, operator: KOperatorType) -> bool:
+        if operator in (KOperatorType.GET_ATTR, KOperatorType.SET_ATTR):
+            return True
+        name = MAGIC_ATTRIBUTES.get(operator)
+        return name is not None and self.shape.lookup(name) >= 0
+
     @override
     def send_msg(
         self, operator: KOperatorType, params: list[Any]
     ) -> KResult[KValue, str]:
-        match operator:
-            case KOperatorType.ADD if len(params) == 1:
-                if "__add__" in self.attr:
-                    return self.attr["__add__"].send_msg(KOperatorType.CALL, params)
-            case KOperatorType.CALL:
-                if "__call__" in self.attr:
-                    return self.attr["__call__"].send_msg(KOperatorType.CALL, params)
-            case KOperatorType.CONSTRCUTOR:
-                raise NotImplementedError
-            case KOperatorType.DIV:
-                pass
-            case KOperatorType.EQUAL:
-                pass
-            case KOperatorType.GET_ATTR if len(params) == 1:
-                return (
-                    KResult.Ok(self.attr[params[0]])
-                    if params[0] in self.attr
-                    else KResult.Err()
-                )
-            case KOperatorType.INPLACE_ADD:
-                pass
-            case KOperatorType.INPLACE_DIV:
-                pass
-            case KOperatorType.INPLACE_MOD:
-                pass
-            case KOperatorType.INPLACE_MUL:
-                pass
-            case KOperatorType.INPLACE_SUB:
-                pass
-            case KOperatorType.LESS_THAN:
-                pass
-            case KOperatorType.MOD:
-                pass
-            case KOperatorType.MORE_THAN:
-                pass
-            case KOperatorType.MUL:
-                pass
-            case KOperatorType.NOT_EQUAL:
-                pass
-            case KOperatorType.SET_ATTR:
-                pass
-            case KOperatorType.SUB:
-                pass
-            case _:
-                return KResult.Err()
+        if operator is KOperatorType.GET_ATTR and len(params) == 1:
+            value = self.get_attr(params[0])
+            return UNSUPPORTED if value is MISSING else KResult.Ok(value)
+        if operator is KOperatorType.SET_ATTR and len(params) == 2:
+            self.set_attr(params[0], params[1])
+            return KResult.Ok(params[1])
+        if operator is KOperatorType.CONSTRCUTOR:
+            raise NotImplementedError
+        if (name := MAGIC_ATTRIBUTES.get(operator)) is not None:
+            if (fn := self.get_attr(name)) is not MISSING:
+                return fn.send_msg(KOperatorType.CALL, params)
+        return UNSUPPORTED
+
+
+# 调用点缓存的 shape 数上限; 超过后该调用点不再缓存
+POLYMORPHIC_LIMIT = 4
+
+
+class AttributeCache:
+    """
+    属性访问点的内联缓存. 单态时比较一次 shape 即可取到槽位, 多态时依次比较至多
+    POLYMORPHIC_LIMIT 个 shape; 命中时不分配对象.
+    """
+
+    __slots__ = ("name", "shape", "index", "polymorphic", "megamorphic")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        # 第一次见到的 shape 与槽位; 其他 shape 放在 polymorphic 中
+        self.shape: Optional[Shape] = None
+        self.index = -1
+        self.polymorphic: dict[Shape, int] = {}
+        self.megamorphic = False
+
+    def find(self, shape: Shape) -> int:
+        if shape is self.shape:
+            return self.index
+        if (index := self.polymorphic.get(shape)) is not None:
+            return index
+        index = shape.lookup(self.name)
+        if index < 0 or self.megamorphic:
+            return index
+        if self.shape is None:
+            self.shape, self.index = shape, index
+        elif len(self.polymorphic) + 1 < POLYMORPHIC_LIMIT:
+            self.polymorphic[shape] = index
+        else:
+            self.megamorphic = True
+        return index
+
+
+class GetAttrSite(AttributeCache):
+    __slots__ = ()
+
+    def get(self, obj: KUserDefinedObject) -> Any:
+        """属性值, 不存在时返回 MISSING"""
+        index = self.find(obj.shape)
+        return obj.slots[index] if index >= 0 else MISSING
+
+
+class SetAttrSite(AttributeCache):
+    """
+    写属性的调用点; 已有属性按缓存的槽位写入, 新属性沿 shape 的转移加入
+    """
+
+    __slots__ = ()
+
+    def set(self, obj: KUserDefinedObject, value: KValue) -> None:
+        if (index := self.find(obj.shape)) >= 0:
+            obj.slots[index] = value
+        else:
+            obj.set_attr(self.name, value)
+
+
+class CallSite:
+    """调用对象 __call__ 属性的调用点"""
+
+    __slots__ = ("callee",)
+
+    def __init__(self) -> None:
+        self.callee = GetAttrSite(MAGIC_ATTRIBUTES[KOperatorType.CALL])
+
+    def call(self, obj: KUserDefinedObject, params: list[Any]) -> KResult[KValue, str]:
+        if (fn := self.callee.get(obj)) is MISSING:
+            return UNSUPPORTED
+        return fn.send_msg(KOperatorType.CALL, params)
 
 
 class KExtensionObject(KObject):
-    ...
+    """由 KExportType 导出的 Python 类型的实例, value 为被包装的 Python 对象"""
+
+    __slots__ = ("meta_info", "value")
+
+    def __init__(self, meta_info: KMetaInfo, value: Any) -> None:
+        self.meta_info, self.value = meta_info, value
+
+    def __repr__(self) -> str:
+        return f"<{self.meta_info.name} {self.value!r}>"
+
+    @override
+    def get_meta_info(self) -> KMetaInfo:
+        return self.meta_info
+
+    @override
+    def support(self, operator: KOperatorType) -> bool:
+        return False
+
+    @override
+    def send_msg(
+        self, operator: KOperatorType, params: list[Any]
+    ) -> KResult[KValue, str]:
+        return UNSUPPORTED
 
 
 KValue: TypeAlias = KObject
@@ -180,17 +408,235 @@ class KExtensionTypeAttributeWrapper:
     ...
 
 
-class KExportFunction:
-    ...
+# 导出函数的参数与返回值的自动转换, 按 Python 类型给出生成代码中的
+# (参数检查, 取出 Python 值, 包装返回值); {0} 为变量名. bool 与 K 的比较结果一样用 KInt 0/1
+CONVERSIONS: dict[Any, tuple[str, str, str]] = {
+    int: ("type({0}) is KInt", "{0}.v", "KInt({0})"),
+    float: (
+        "(type({0}) is KFloat or type({0}) is KInt)",
+        "({0}.v if type({0}) is KFloat else to_float({0}.v))",
+        "KFloat({0})",
+    ),
+    str: ("type({0}) is KString", "{0}.value", "KString({0})"),
+    bool: ("type({0}) is KInt", "({0}.v != 0)", "(TRUE if {0} else FALSE)"),
+}
+# to_k 中 Python 值的装箱
+BOXES: dict[type, Callable[[Any], KObjectRef]] = {
+    int: KInt,
+    float: KFloat,
+    str: KString,
+    bool: lambda v: TRUE if v else FALSE,
+}
+# 可以直接出现在注解中的 K 值类型, 只检查类型, 不做转换
+K_VALUE_TYPES: tuple[type, ...] = (KInt, KFloat, KString, KArray, KType, KRuntimeObject, KObject)
+# 生成的函数的文件名前缀
+SOURCE_PREFIX = "<k-export "
+# 导出的全局名字 -> 可调用对象; Interpreter 的全局作用域包含这里的名字
+EXPORTS: dict[str, KCallable] = {}
+
+
+def type_label(t: Any) -> str:
+    if t is Any or t is inspect.Parameter.empty:
+        return "any"
+    if t is bool:
+        return "int"
+    if (exported := KExportType.registry.get(t)) is not None:
+        return exported.name
+    return getattr(t, "__name__", str(t))
+
+
+def conversion(t: Any, namespace: dict[str, Any]) -> tuple[str, str, str]:
+    """t 对应的转换代码; 代码中用到的对象放入 namespace. 无法转换的注解在导出时报告 TypeError"""
+    if (code := CONVERSIONS.get(t)) is not None:
+        return code
+    if t is Any or t is inspect.Parameter.empty:
+        # 参数原样传入; 返回值按运行时的类型转换
+        return "True", "{0}", "to_k({0})"
+    # 同名的类可能有多个, 命名空间中的名字按序号区分
+    key = f"t{len(namespace)}"
+    if (exported := KExportType.registry.get(t)) is not None:
+        namespace[key] = exported.meta_info
+        return (
+            f"(type({{0}}) is KExtensionObject and {{0}}.meta_info is {key})",
+            "{0}.value",
+            f"KExtensionObject({key}, {{0}})",
+        )
+    if isinstance(t, type) and issubclass(t, K_VALUE_TYPES):
+        namespace[key] = t
+        return f"isinstance({{0}}, {key})", "{0}", "{0}"
+    raise TypeError(f"Can not export a value annotated as {t!r}.")
+
+
+def to_k(v: Any) -> KObjectRef:
+    """按运行时的类型把 Python 值转换为 K 值"""
+    if v is None or isinstance(v, K_VALUE_TYPES):
+        return v  # type:ignore
+    if (box := BOXES.get(type(v))) is not None:
+        return box(v)
+    if (exported := KExportType.registry.get(type(v))) is not None:
+        return KExtensionObject(exported.meta_info, v)  # type:ignore
+    raise KError(f"Can not convert {type(v).__name__} to a K value.")
+
+
+def compile_export(
+    fn: Callable, name: str, params: tuple[Any, ...], returns: Any
+) -> Callable[..., KObjectRef]:
+    """
+    生成定长参数的包装函数: 逐个检查参数类型, 取出 Python 值调用 fn, 再包装返回值.
+    参数直接按位置传入, 调用时不分配参数列表
+    """
+    namespace: dict[str, Any] = {
+        "fn": fn,
+        "KInt": KInt,
+        "KFloat": KFloat,
+        "KString": KString,
+        "KExtensionObject": KExtensionObject,
+        "TRUE": TRUE,
+        "FALSE": FALSE,
+        "to_k": to_k,
+        "to_float": to_float,
+        "mismatch": functools.partial(mismatch, name, params),
+    }
+    names = [f"a{i}" for i in range(len(params))]
+    codes = [conversion(t, namespace) for t in params]
+    checks = [check.format(n) for n, (check, _, _) in zip(names, codes) if check != "True"]
+    values = ", ".join(value.format(n) for n, (_, value, _) in zip(names, codes))
+    lines = [f"def call({', '.join(names)}):"]
+    if checks:
+        lines.append(f"    if not ({' and '.join(checks)}):")
+        lines.append(f"        mismatch({', '.join(names)})")
+    if returns is None or returns is NoneType:
+        lines += [f"    fn({values})", "    return None"]
+    else:
+        lines.append(f"    return {conversion(returns, namespace)[2].format(f'fn({values})')}")
+    filename = f"{SOURCE_PREFIX}{name}>"
+    exec(compile("\n".join(lines), filename, "exec"), namespace)  # pylint: disable=exec-used
+    return namespace["call"]
+
+
+def to_float(v: int) -> float:
+    """KInt 传给 float 参数; 与运算符一样, 超出 float 范围时报告 KError"""
+    try:
+        return float(v)
+    except OverflowError as e:
+        raise KError(FLOAT_OVERFLOW) from e
+
+
+def mismatch(name: str, params: tuple[Any, ...], *args: KObjectRef) -> NoReturn:
+    expected = ", ".join(type_label(t) for t in params)
+    got = ", ".join(type_name(a) for a in args)
+    raise KError(f"{name}() expects ({expected}), got ({got}).")
+
+
+def signature(
+    fn: Callable, skip: int = 0, owner: Optional[type] = None
+) -> tuple[tuple[Any, ...], Any]:
+    """
+    由注解得到 (参数类型, 返回类型); 没有注解的参数不做转换. 跳过前 skip 个参数.
+    owner 为方法所属的类, 类装饰器执行时类名还没有绑定, 注解中的类名按它解析
+    """
+    localns = {owner.__name__: owner} if owner is not None else None
+    hints = typing.get_type_hints(fn, localns=localns)
+    params = []
+    for param in list(inspect.signature(fn).parameters.values())[skip:]:
+        if param.kind not in (param.POSITIONAL_ONLY, param.POSITIONAL_OR_KEYWORD):
+            raise TypeError(f"{fn.__qualname__}: only positional parameters can be exported.")
+        params.append(hints.get(param.name, Any))
+    return tuple(params), hints.get("return", Any)
+
+
+class KExportFunction(KCallable):
+    """
+    导出给 K 的 Python 函数. 参数个数固定, 参数与返回值按类型在 KInt/KFloat/KString
+    与 int/float/str 之间自动转换. 虚拟机与树遍历解释器按位置调用 call, 不构造参数列表;
+    其他调用者经过 __call__ 传入参数列表
+    """
+
+    def __init__(
+        self,
+        fn: Callable,
+        name: Optional[str] = None,
+        params: Optional[tuple[Any, ...]] = None,
+        returns: Any = MISSING,
+    ) -> None:
+        if params is None or returns is MISSING:
+            hinted_params, hinted_returns = signature(fn)
+            params = hinted_params if params is None else params
+            returns = hinted_returns if returns is MISSING else returns
+        self.name = name or fn.__name__
+        self.params: tuple[Any, ...] = params
+        self.arity = len(params)
+        self.call = compile_export(fn, self.name, params, returns)
+        super().__init__(self.__call__)
 
+    def __call__(self, args: list[KObjectRef]) -> KObjectRef:
+        if len(args) != self.arity:
+            raise KError(f"{self.name}() takes {self.arity} arguments, got {len(args)}.")
+        return self.call(*args)
 
-class KExportConstructor:
-    ...
+    def __repr__(self) -> str:
+        return f"<KExportFunction {self.name}>"
+
+
+class KExportConstructor(KExportFunction):
+    """导出类型的构造函数, 参数来自 cls.__init__ 的注解, 返回包装后的实例"""
+
+    def __init__(self, cls: type, name: str) -> None:
+        params, _ = signature(cls.__init__, 1, cls)  # type:ignore
+        super().__init__(cls, name, params, cls)
 
 
 class KExportType:
-    ...
+    """
+    导出给 K 的 Python 类型: 构造函数以类型名导出, 方法以 "类型名_方法名" 导出,
+    第一个参数为实例. K 没有属性访问语法, 方法只能这样调用.
+    实例在 K 中是 KExtensionObject; 以该类型注解的参数与返回值自动包装与解包
+    """
+
+    # Python 类型 -> 导出信息, 供生成转换代码时查找
+    registry: dict[type, KExportType] = {}
+
+    def __init__(
+        self, cls: type, name: Optional[str] = None, methods: Optional[Iterable[str]] = None
+    ) -> None:
+        self.cls, self.name = cls, name or cls.__name__
+        for other in KExportType.registry.values():
+            if other.name == self.name and other.cls is not cls:
+                raise TypeError(f"Type {self.name} is already exported by {other.cls!r}.")
+        self.meta_info = EXPORT_TYPES.define(self.name, [])
+        # 先登记, 方法与构造函数的注解中可以出现类型本身
+        KExportType.registry[cls] = self
+        if methods is None:
+            methods = [
+                attr
+                for attr, v in vars(cls).items()
+                if not attr.startswith("_") and inspect.isfunction(v)
+            ]
+        self.exports: dict[str, KCallable] = {self.name: KExportConstructor(cls, self.name)}
+        for method in methods:
+            fn = getattr(cls, method)
+            params, returns = signature(fn, 1, cls)
+            exported = f"{self.name}_{method}"
+            self.exports[exported] = KExportFunction(fn, exported, (cls, *params), returns)
+
+    def __repr__(self) -> str:
+        return f"<KExportType {self.name}>"
+
+
+def export[F: Callable](fn: F) -> F:
+    """把函数按注解导出到全局作用域, 名字为函数名; 返回原函数"""
+    EXPORTS[fn.__name__] = KExportFunction(fn)
+    return fn
+
+
+def export_type[C: type](cls: C) -> C:
+    """导出类型的构造函数与公开方法; 返回原类型"""
+    EXPORTS.update(KExportType(cls).exports)
+    return cls
 
 
 class KGloablObjectPool:
     ...
+
+
+register_str(KExtensionObject, lambda obj: f"<{obj.meta_info.name}>")
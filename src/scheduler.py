@@ -0,0 +1,115 @@
+from __future__ import annotations
+from collections import deque
+import time
+from typing import Iterable, Optional
+from frontend import FrontendCache
+from interpreter import VM, Compiler, Interpreter, Preempted, Suspended
+from optimizer import DEFAULT_PASSES
+from runtime import DEFAULT_STACK_LIMIT, KError, KObjectRef
+
+# 任务状态
+READY, DONE, FAILED = "ready", "done", "failed"
+
+
+class Task:  # pylint: disable=too-many-instance-attributes
+    """
+    调度器中的一个 K 程序; 在自己的 VM 中执行, 被抢占时状态留在 VM 里.
+    budget 为整个程序最多消耗的燃料, None 表示不限
+    """
+
+    def __init__(self, name: str, vm: VM, budget: Optional[int]) -> None:
+        self.name, self.vm, self.budget = name, vm, budget
+        self.status = READY
+        self.result: KObjectRef = None
+        self.error: Optional[KError] = None
+        self.used = 0
+        self.slices = 0
+        self.created = time.perf_counter()
+        self.finished = 0.0
+
+    def __repr__(self) -> str:
+        return f"<Task {self.name} {self.status}>"
+
+    @property
+    def latency(self) -> float:
+        """从加入调度器到结束的时间"""
+        return self.finished - self.created
+
+
+class Scheduler:
+    """
+    在一个线程中协作式地交替执行多个 K 程序: 每个任务每次最多运行 quantum 份燃料,
+    用完后让出, 排到就绪队列的末尾. 长时间运行的程序因此不会阻塞短程序,
+    短程序的完成时间只取决于排在它前面的任务数与时间片的大小
+    """
+
+    def __init__(
+        self,
+        quantum: int = 1000,
+        passes: Iterable[str] = DEFAULT_PASSES,
+        stack_limit: int = DEFAULT_STACK_LIMIT,
+        cache: Optional[FrontendCache] = None,
+    ) -> None:
+        if quantum <= 0:
+            raise KError(f"Quantum must be positive, got {quantum}.")
+        self.quantum = quantum
+        self.passes = tuple(passes)
+        self.stack_limit = stack_limit
+        self.cache = cache
+        self.ready: deque[Task] = deque()
+        self.tasks: list[Task] = []
+
+    def spawn(self, src: str, name: Optional[str] = None, budget: Optional[int] = None) -> Task:
+        """编译 src 并加入就绪队列; 语法错误在这里直接抛出"""
+        interpreter = Interpreter("vm", self.passes, self.stack_limit, self.cache)
+        vm = VM(self.stack_limit)
+        vm.start(Compiler().compile_body(interpreter.frontend(src)), interpreter.env)
+        task = Task(name or f"task-{len(self.tasks)}", vm, budget)
+        self.tasks.append(task)
+        self.ready.append(task)
+        return task
+
+    def step(self) -> Optional[Task]:
+        """运行就绪队列头部的任务一个时间片, 返回该任务; 队列为空时返回 None"""
+        if not self.ready:
+            return None
+        task = self.ready.popleft()
+        fuel = self.quantum
+        if task.budget is not None:
+            fuel = min(fuel, task.budget - task.used)
+        task.vm.fuel = fuel
+        task.slices += 1
+        try:
+            task.result = task.vm.resume()
+        except Preempted:
+            task.used += fuel
+            if task.budget is not None and task.used >= task.budget:
+                self.finish(task, KError(f"Out of fuel: more than {task.budget} calls."))
+            else:
+                self.ready.append(task)
+            return task
+        except Suspended as e:
+            task.used += fuel
+            self.finish(task, e.cancel())
+            return task
+        except KError as e:
+            # 出错时 VM 不回写剩余的燃料, 按整个时间片计
+            task.used += fuel
+            self.finish(task, e)
+            return task
+        task.used += fuel - task.vm.fuel
+        self.finish(task)
+        return task
+
+    @staticmethod
+    def finish(task: Task, error: Optional[KError] = None) -> None:
+        task.status = DONE if error is None else FAILED
+        task.error = error
+        task.finished = time.perf_counter()
+        task.vm.state = None
+
+    def run(self) -> list[Task]:
+        """运行直到所有任务结束"""
+        while self.step() is not None:
+            pass
+        return self.tasks
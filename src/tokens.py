@@ -1,8 +1,24 @@
+from __future__ import annotations
+import bisect
+import enum
 from abc import ABC
-from typing import Any
+from array import array
+from typing import Any, Iterator, Optional
+
+STRING_ESCAPES = (("\\t", "\t"), ("\\n", "\n"), ("\\r", "\r"), ('\\"', '"'))
+
+
+def unescape(value: str) -> str:
+    if "\\" not in value:
+        return value
+    for escaped, char in STRING_ESCAPES:
+        value = value.replace(escaped, char)
+    return value
 
 
 class Token(ABC):
+    __slots__ = ("value",)
+
     def __init__(self, value: Any) -> None:
         super().__init__()
         self.value = value
@@ -36,6 +52,8 @@ class Token(ABC):
 
 
 class NumTok(Token):
+    __slots__ = ()
+
     def __init__(self, value: float | int) -> None:
         super().__init__(value)
 
@@ -44,6 +62,8 @@ class NumTok(Token):
 
 
 class IntTok(NumTok):
+    __slots__ = ()
+
     def __init__(self, value: int) -> None:
         super().__init__(value)
 
@@ -52,6 +72,8 @@ class IntTok(NumTok):
 
 
 class FloatTok(NumTok):
+    __slots__ = ()
+
     def __init__(self, value: float) -> None:
         super().__init__(value)
 
@@ -60,20 +82,18 @@ class FloatTok(NumTok):
 
 
 class StringTok(Token):
+    __slots__ = ()
+
     def __init__(self, value: str) -> None:
-        _value = (
-            value.replace("\\t", "\t")
-            .replace("\\n", "\n")
-            .replace("\\r", "\r")
-            .replace('"', '"')
-        )
-        super().__init__(_value)
+        super().__init__(unescape(value))
 
     def is_stringtok(self) -> bool:
         return True
 
 
 class IdentifierTok(Token):
+    __slots__ = ()
+
     def __init__(self, value: str) -> None:
         super().__init__(value)
 
@@ -82,6 +102,8 @@ class IdentifierTok(Token):
 
 
 class OperatorTok(Token):
+    __slots__ = ()
+
     def __init__(self, value: str) -> None:
         super().__init__(value)
 
@@ -90,8 +112,133 @@ class OperatorTok(Token):
 
 
 class EOFTok(Token):
+    __slots__ = ()
+
     def __init__(self) -> None:
         super().__init__(-1)
 
     def is_eof(self) -> bool:
         return True
+
+
+class TokKind(enum.IntEnum):
+    EOF = 0
+    FLOAT = 1
+    INT = 2
+    STRING = 3
+    OPERATOR = 4
+    IDENTIFIER = 5
+
+
+TOKEN_TYPES: dict[TokKind, type[Token]] = {
+    TokKind.FLOAT: FloatTok,
+    TokKind.INT: IntTok,
+    TokKind.STRING: StringTok,
+    TokKind.OPERATOR: OperatorTok,
+    TokKind.IDENTIFIER: IdentifierTok,
+}
+
+
+class TokenStream:
+    """
+    以数组保存的 token 序列: 每个 token 只占一个种类码与两个偏移量, 值在读取时才生成
+    """
+
+    __slots__ = ("src", "kinds", "starts", "ends", "_newlines")
+
+    def __init__(
+        self,
+        src: str,
+        kinds: Optional[array] = None,
+        starts: Optional[array] = None,
+        ends: Optional[array] = None,
+    ) -> None:
+        self.src = src
+        self.kinds = kinds if kinds is not None else array("B")
+        self.starts = starts if starts is not None else array("I")
+        self.ends = ends if ends is not None else array("I")
+        self._newlines: Optional[array] = None
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def __getitem__(self, index: int) -> TokenView:
+        return TokenView(self, index)
+
+    def __iter__(self) -> Iterator[TokenView]:
+        return (TokenView(self, i) for i in range(len(self.kinds)))
+
+    def kind(self, index: int) -> TokKind:
+        if index >= len(self.kinds):
+            return TokKind.EOF
+        return TokKind(self.kinds[index])
+
+    def text(self, index: int) -> str:
+        return self.src[self.starts[index] : self.ends[index]]
+
+    def value(self, index: int) -> Any:
+        match self.kind(index):
+            case TokKind.INT:
+                return int(self.text(index))
+            case TokKind.FLOAT:
+                return float(self.text(index))
+            case TokKind.STRING:
+                return unescape(self.text(index))
+            case TokKind.EOF:
+                return -1
+            case _:
+                return self.text(index)
+
+    def token(self, index: int) -> Token:
+        if (kind := self.kind(index)) == TokKind.EOF:
+            return EOFTok()
+        return TOKEN_TYPES[kind](self.value(index))
+
+    def line_col(self, offset: int) -> tuple[int, int]:
+        """offset 所在的行号与列号, 均从 1 开始"""
+        if self._newlines is None:
+            self._newlines = array("I")
+            find, index = self.src.find, -1
+            while (index := find("\n", index + 1)) != -1:
+                self._newlines.append(index)
+        line = bisect.bisect_left(self._newlines, offset)
+        line_begin = self._newlines[line - 1] + 1 if line else 0
+        return line + 1, offset - line_begin + 1
+
+
+class TokenView:
+    __slots__ = ("stream", "index")
+
+    def __init__(self, stream: TokenStream, index: int) -> None:
+        self.stream, self.index = stream, index
+
+    @property
+    def span(self) -> tuple[int, int]:
+        return self.stream.starts[self.index], self.stream.ends[self.index]
+
+    def get_value(self) -> Any:
+        return self.stream.value(self.index)
+
+    def is_identifiertok(self) -> bool:
+        return self.stream.kind(self.index) == TokKind.IDENTIFIER
+
+    def is_inttok(self) -> bool:
+        return self.stream.kind(self.index) == TokKind.INT
+
+    def is_floattok(self) -> bool:
+        return self.stream.kind(self.index) == TokKind.FLOAT
+
+    def is_stringtok(self) -> bool:
+        return self.stream.kind(self.index) == TokKind.STRING
+
+    def is_numtok(self) -> bool:
+        return self.stream.kind(self.index) in (TokKind.INT, TokKind.FLOAT)
+
+    def is_eof(self) -> bool:
+        return self.stream.kind(self.index) == TokKind.EOF
+
+    def is_operator_tok(self) -> bool:
+        return self.stream.kind(self.index) == TokKind.OPERATOR
+
+    def __repr__(self) -> str:
+        return repr(self.stream.token(self.index))
@@ -1,4 +1,6 @@
-from typing import NoReturn, Optional
+import contextlib
+import gc
+from typing import Iterator, NoReturn, Optional
 
 
 def error(msg: str = "Crashed for Unknown Reason.") -> NoReturn:
@@ -22,3 +24,15 @@ def is_err[T](_v: Optional[T]) -> bool:  # type: ignore
 
 def unreachable() -> NoReturn:
     error("Unreachable Code.")
+
+
+@contextlib.contextmanager
+def gc_paused() -> Iterator[None]:
+    """暂停循环垃圾回收; 大量创建无环对象时可避免 GC 的反复全量扫描"""
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()